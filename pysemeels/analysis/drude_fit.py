@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeels.analysis.drude_fit
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Fit of the Drude plasmon model to every spectrum of a stack or a spectrum image.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+
+# Standard library modules.
+from collections import namedtuple
+import logging
+
+# Third party modules.
+import numpy as np
+from scipy.optimize import least_squares
+
+# Local modules.
+
+# Project modules.
+from pysemeels.egerton2011.drude import drude_spectra, drude_loss_functions, drude_angular_factors
+from pysemeels.analysis.pixel_fit import PixelFitEngine
+
+# Globals and constants variables.
+#: Results of :py:meth:`DrudeFitEngine.fit`, one array element per spectrum.
+DrudeFitResults = namedtuple("DrudeFitResults", ["plasmon_energy_eV", "plasmon_width_eV", "thickness_nm", "residual",
+                                                 "success"])
+#: Minimum initial plasmon energy and width (eV).
+_MINIMUM_PARAMETER_eV = 1.0e-3
+
+
+def guess_drude_parameters(energies_eV, intensities):
+    """
+    Estimate the plasmon energy and width of spectra from the position and width of their maximum.
+
+    Near its maximum, the Drude energy loss function is a Lorentzian with a full width at half maximum equal to the
+    plasmon width, so the inverse of the intensities is a parabola. The parabola is fitted by linear least squares to
+    the channels above half the maximum of all spectra at once. The maximum position and the width above half
+    maximum are used when the parabola is not valid.
+
+    :param energies_eV: energy axis shared by all spectra.
+    :param intensities: intensities of the spectra, shape (n_spectra, n_channels).
+    :return: the plasmon energy and width of each spectrum, shape (n_spectra, 2).
+    """
+    energies_eV = np.asarray(energies_eV, dtype=np.float64)
+    intensities = np.asarray(intensities, dtype=np.float64)
+
+    peak_energies_eV = energies_eV[np.argmax(intensities, axis=-1)]
+    maximums = np.max(intensities, axis=-1, keepdims=True)
+    mask = (intensities >= 0.5 * maximums) & (intensities > 0.0)
+
+    # 1/y = a x^2 + b x + c weighted by y^2 is linear: minimize sum (y (a x^2 + b x + c) - 1)^2.
+    x = energies_eV - peak_energies_eV[:, np.newaxis]
+    yx = np.where(mask, intensities, 0.0)[..., np.newaxis] * np.stack([x * x, x, np.ones_like(x)], axis=-1)
+    normal_matrices = np.einsum('nci,ncj->nij', yx, yx)
+    normal_vectors = np.sum(yx, axis=1)
+    a, b, c = np.einsum('nij,nj->ni', np.linalg.pinv(normal_matrices), normal_vectors).T
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shifts_eV = -b / (2.0 * a)
+        half_widths2_eV2 = c / a - shifts_eV ** 2
+    valid = (a > 0.0) & (half_widths2_eV2 > 0.0) & np.isfinite(shifts_eV) & (np.abs(shifts_eV) < np.ptp(energies_eV))
+
+    guesses = np.empty((len(intensities), 2))
+    guesses[:, 0] = np.where(valid, peak_energies_eV + np.where(valid, shifts_eV, 0.0), peak_energies_eV)
+    channel_width_eV = np.abs(energies_eV[1] - energies_eV[0])
+    guesses[:, 1] = np.where(valid, 2.0 * np.sqrt(np.where(valid, half_widths2_eV2, 0.0)),
+                             np.count_nonzero(mask, axis=-1) * channel_width_eV)
+
+    return np.maximum(guesses, 2.0 * _MINIMUM_PARAMETER_eV)
+
+
+def _drude_components(parameters, energies_eV, eb, volume_factor, surface_factor):
+    """
+    Compute the volume single scattering for a thickness of 1 nm and the surface single scattering, the angular
+    factors of :py:func:`pysemeels.egerton2011.drude.drude_angular_factors` being computed once for all fits.
+    """
+    _eps, elf, srfelf = drude_loss_functions(energies_eV, parameters[0], parameters[1], eb)
+    return volume_factor * elf, surface_factor * srfelf
+
+
+def _thickness_nm(volint, srfint, intensities):
+    """
+    Compute the thickness minimizing the residuals, the single scattering being linear in the thickness.
+    """
+    norm = np.dot(volint, volint)
+    if not norm > 0.0:
+        return 0.0
+    return max(0.0, np.dot(volint, intensities - srfint) / norm)
+
+
+def _residuals(parameters, energies_eV, intensities, eb, volume_factor, surface_factor):
+    """
+    Residuals of the Drude single scattering with the best thickness for a plasmon energy and width.
+    """
+    volint, srfint = _drude_components(parameters, energies_eV, eb, volume_factor, surface_factor)
+    thickness_nm = _thickness_nm(volint, srfint, intensities)
+    return thickness_nm * volint + srfint - intensities
+
+
+def _fit_spectra(intensities, initial_guesses, energies_eV, warm_start, eb, e0, beta):
+    """
+    Fit the Drude model to spectra one after the other.
+
+    :param intensities: intensities of the spectra, shape (n_spectra, n_channels).
+    :param initial_guesses: plasmon energy and width of each spectrum, shape (n_spectra, 2).
+    :param energies_eV: energy axis shared by all spectra.
+    :param bool warm_start: use the solution of the previous spectrum as the initial values of the next fit.
+    :param float eb: binding energy (eV).
+    :param float e0: incident energy (keV).
+    :param float beta: collection semi-angle (mrad).
+    :return: the fitted values, shape (n_spectra, 4), nan for a failed fit, and the success of each fit.
+    :rtype: tuple
+    """
+    volume_factor, surface_factor = drude_angular_factors(energies_eV, e0, beta)
+    model_arguments = (eb, volume_factor, surface_factor)
+
+    values = np.full((len(intensities), len(DrudeFitResults._fields) - 1), np.nan)
+    success = np.zeros(len(intensities), dtype=bool)
+
+    parameters = None
+    for spectrum_id, spectrum_intensities in enumerate(intensities):
+        if parameters is None:
+            parameters = initial_guesses[spectrum_id]
+
+        try:
+            fit_results = least_squares(_residuals, parameters, method='lm',
+                                        args=(energies_eV, spectrum_intensities) + model_arguments)
+        except ValueError as message:
+            logging.warning("Cannot fit spectrum %i: %s", spectrum_id, message)
+            parameters = None
+            continue
+
+        if not fit_results.success or np.any(fit_results.x <= 0.0):
+            logging.debug("Fit of spectrum %i failed: %s", spectrum_id, fit_results.message)
+            parameters = None
+            continue
+
+        volint, srfint = _drude_components(fit_results.x, energies_eV, *model_arguments)
+        thickness_nm = _thickness_nm(volint, srfint, spectrum_intensities)
+        residual = np.sqrt(2.0 * fit_results.cost / len(spectrum_intensities))
+        values[spectrum_id] = [fit_results.x[0], fit_results.x[1], thickness_nm, residual]
+        success[spectrum_id] = True
+
+        if warm_start:
+            parameters = fit_results.x
+        else:
+            parameters = None
+
+    return values, success
+
+
+class DrudeFitEngine(PixelFitEngine):
+    """
+    Fit the Drude single scattering distribution of :py:func:`pysemeels.egerton2011.drude.drude` to a stack of
+    spectra.
+
+    The intensities are single scattering distributions relative to the zero-loss integral per eV, as computed by
+    the Drude model. The plasmon energy and width are fitted, while the thickness is computed directly at each
+    iteration since the single scattering is linear in the thickness. The initial values come from
+    :py:func:`guess_drude_parameters`. See :py:class:`pysemeels.analysis.pixel_fit.PixelFitEngine` for the fit order
+    and the workers.
+    """
+    results_class = DrudeFitResults
+    fit_description = "Drude spectra"
+
+    def __init__(self, energies_eV, e0_keV, beta_mrad, binding_energy_eV=0.0, fit_range_eV=None, warm_start=True,
+                 workers=1, chunk_size=256):
+        """
+        :param energies_eV: energy axis shared by all spectra.
+        :param float e0_keV: incident energy.
+        :param float beta_mrad: collection semi-angle.
+        :param float binding_energy_eV: binding energy of the Drude model.
+        :param tuple fit_range_eV: minimum and maximum energy losses fitted, all positive energy losses if None.
+        :param bool warm_start: use the solution of the neighbouring spectrum as the initial values of a fit.
+        :param int workers: number of processes used to fit the spectra.
+        :param int chunk_size: number of spectra fitted by a process at a time.
+        """
+        super(DrudeFitEngine, self).__init__(warm_start, workers, chunk_size)
+
+        self.energies_eV = np.asarray(energies_eV, dtype=np.float64)
+        self.e0_keV = e0_keV
+        self.beta_mrad = beta_mrad
+        self.binding_energy_eV = binding_energy_eV
+        self.fit_range_eV = fit_range_eV
+
+    def find_fit_channels(self):
+        """
+        Find the channels fitted, the positive energy losses inside the fit range.
+
+        :return: mask of the fitted channels.
+        """
+        mask = self.energies_eV > 0.0
+        if self.fit_range_eV is not None:
+            energy_min_eV, energy_max_eV = self.fit_range_eV
+            mask &= (self.energies_eV >= energy_min_eV) & (self.energies_eV <= energy_max_eV)
+
+        if np.count_nonzero(mask) < 3:
+            raise ValueError("Not enough channels in the fit range: {}".format(self.fit_range_eV))
+
+        return mask
+
+    def prepare_fit(self, ordered_intensities):
+        """
+        Return the Drude fit function, the fitted channels and initial guess of each spectrum and the shared
+        arguments.
+        """
+        mask = self.find_fit_channels()
+        energies_eV = self.energies_eV[mask]
+        fitted_intensities = ordered_intensities[:, mask]
+        initial_guesses = guess_drude_parameters(energies_eV, fitted_intensities)
+
+        arguments = (energies_eV, self.warm_start, self.binding_energy_eV, self.e0_keV, self.beta_mrad)
+        return _fit_spectra, (fitted_intensities, initial_guesses), arguments
+
+
+def create_drude_map(energies_eV, shape, e0_keV=200.0, beta_mrad=5.0, noise=0.0, random_state=None):
+    """
+    Create a synthetic map of Drude single scattering spectra with smoothly varying parameters.
+
+    :param energies_eV: energy axis of the spectra.
+    :param tuple shape: number of rows and columns of the map.
+    :param float e0_keV: incident energy.
+    :param float beta_mrad: collection semi-angle.
+    :param float noise: standard deviation of the gaussian noise relative to the maximum of each spectrum.
+    :param random_state: :py:class:`numpy.random.RandomState` of the noise.
+    :return: the intensities, shape (n_y, n_x, n_channels), and the plasmon energy, width and thickness maps.
+    :rtype: tuple
+    """
+    rows, columns = np.meshgrid(np.linspace(0.0, 1.0, shape[0]), np.linspace(0.0, 1.0, shape[1]), indexing='ij')
+    plasmon_energies_eV = 14.0 + 4.0 * rows
+    plasmon_widths_eV = 2.0 + 2.0 * columns
+    thicknesses_nm = 40.0 + 60.0 * rows * columns
+
+    intensities = drude_spectra(energies_eV, plasmon_energies_eV, plasmon_widths_eV, 0.0, e0_keV, beta_mrad,
+                                thicknesses_nm).ssd
+    if noise > 0.0:
+        if random_state is None:
+            random_state = np.random.RandomState()
+        scales = noise * np.max(intensities, axis=-1, keepdims=True)
+        intensities = intensities + random_state.normal(0.0, 1.0, intensities.shape) * scales
+
+    return intensities, plasmon_energies_eV, plasmon_widths_eV, thicknesses_nm
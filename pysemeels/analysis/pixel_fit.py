@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeels.analysis.pixel_fit
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Parallel fit of a model to every spectrum of a stack or a spectrum image.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+
+# Standard library modules.
+import abc
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import time
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeels.tools.task_window import iterate_chunk_results, maximum_pending_tasks
+
+# Globals and constants variables.
+
+
+def serpentine_indices(shape):
+    """
+    Return the index of the spectra in fit order, a map is visited in a serpentine order so that the previous
+    spectrum is always a neighbour pixel.
+
+    :param tuple shape: shape of the stack of spectra without the channel axis.
+    :return: the flat index of each spectrum in fit order.
+    """
+    spectrum_indices = np.arange(int(np.prod(shape))).reshape(shape)
+    if spectrum_indices.ndim == 2:
+        spectrum_indices[1::2] = spectrum_indices[1::2, ::-1].copy()
+
+    return spectrum_indices.ravel()
+
+
+def _fit_blocks(blocks, fit_spectra, *arguments):
+    """
+    Fit the blocks of spectra of a task.
+
+    :param list blocks: arrays with one element per spectrum of each block, see :py:meth:`PixelFitEngine.prepare_fit`.
+    :param fit_spectra: fit function of the engine.
+    :return: the list of the fitted values and success of each block.
+    """
+    return [fit_spectra(*block, *arguments) for block in blocks]
+
+
+class PixelFitEngine(abc.ABC):
+    """
+    Fit a model to each spectrum of a stack of spectra or of a map.
+
+    The spectra are fitted in the order of :py:func:`serpentine_indices`, so each fit can start from the solution of
+    a neighbouring spectrum. With more than one worker, blocks of spectra are fitted in a process pool, each block
+    starting from the guess of its first spectrum. At most
+    :py:data:`pysemeels.tools.task_window.MAX_PENDING_TASKS_PER_WORKER` blocks per worker are pending, so the blocks
+    sent to the workers do not copy the whole stack of spectra.
+
+    A subclass defines :py:attr:`results_class` and :py:attr:`fit_description`, and returns its fit function in
+    :py:meth:`prepare_fit`.
+    """
+    #: Named tuple of the results, the fitted values followed by the success of each fit.
+    results_class = None
+    #: Name of the fitted spectra in the log message.
+    fit_description = "spectra"
+
+    def __init__(self, warm_start=True, workers=1, chunk_size=256):
+        """
+        :param bool warm_start: use the solution of the neighbouring spectrum as the initial values of a fit.
+        :param int workers: number of processes used to fit the spectra.
+        :param int chunk_size: number of spectra fitted by a process at a time.
+        """
+        self.warm_start = warm_start
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+        self.number_fits = 0
+        self.time_s = 0.0
+        self.fits_per_s = 0.0
+
+    @abc.abstractmethod
+    def prepare_fit(self, ordered_intensities):
+        """
+        Return the function fitting a block of spectra and its arguments.
+
+        The function is called as `fit_spectra(*spectrum_arrays, *arguments)` and returns the fitted values, shape
+        (n_spectra, n_values), and the success of each fit. It must be a module function to be sent to the worker
+        processes.
+
+        :param ordered_intensities: intensities of the spectra in fit order, shape (n_spectra, n_channels).
+        :return: the fit function, the arrays with one element per spectrum, split in blocks for the workers, and the
+            other arguments.
+        :rtype: tuple
+        """
+
+    def fit(self, intensities):
+        """
+        Fit all spectra.
+
+        :param intensities: intensities of the spectra, shape (n_spectra, n_channels) or (n_y, n_x, n_channels) for
+            a map.
+        :return: the fitted values with the shape of the intensities without the channel axis, nan for a failed fit.
+        :rtype: :py:attr:`results_class`
+        """
+        start_time_s = time.perf_counter()
+
+        intensities = np.asarray(intensities, dtype=np.float64)
+        shape = intensities.shape[:-1]
+        spectrum_indices = serpentine_indices(shape)
+        ordered_intensities = intensities.reshape(-1, intensities.shape[-1])[spectrum_indices]
+        number_fits = len(ordered_intensities)
+
+        fit_spectra, spectrum_arrays, arguments = self.prepare_fit(ordered_intensities)
+
+        if self.workers == 1:
+            ordered_values, ordered_success = fit_spectra(*spectrum_arrays, *arguments)
+        else:
+            chunk_size = max(1, self.chunk_size)
+            blocks = [tuple(array[start:start + chunk_size] for array in spectrum_arrays)
+                      for start in range(0, number_fits, chunk_size)]
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                chunk_results = list(iterate_chunk_results(executor, _fit_blocks, blocks, (fit_spectra, *arguments),
+                                                           maximum_pending=maximum_pending_tasks(self.workers)))
+            if chunk_results:
+                ordered_values = np.concatenate([values for values, _success in chunk_results])
+                ordered_success = np.concatenate([success for _values, success in chunk_results])
+            else:
+                ordered_values = np.empty((0, len(self.results_class._fields) - 1))
+                ordered_success = np.empty(0, dtype=bool)
+
+        values = np.empty_like(ordered_values)
+        values[spectrum_indices] = ordered_values
+        success = np.empty_like(ordered_success)
+        success[spectrum_indices] = ordered_success
+
+        self.number_fits = number_fits
+        self.time_s = time.perf_counter() - start_time_s
+        self.fits_per_s = number_fits / self.time_s if self.time_s > 0.0 else 0.0
+        logging.info("Fitted %i %s (%i failed) in %.1f s: %.1f fits/s", number_fits, self.fit_description,
+                     number_fits - np.count_nonzero(success), self.time_s, self.fits_per_s)
+
+        fitted_values = [values[:, value_id].reshape(shape) for value_id in range(values.shape[1])]
+        return self.results_class(*fitted_values, success.reshape(shape))
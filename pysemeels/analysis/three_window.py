@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeels.analysis.three_window
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Three-window EFTEM elemental mapping: power-law background, net signal and jump ratio maps.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+from collections import namedtuple
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeels.eftem import EFTEM_PRE_LOW, EFTEM_PRE_HIGH, EFTEM_POST
+
+# Globals and constants variables.
+#: Maps computed by :py:class:`ThreeWindowEngine`, each with the shape of the micrographs.
+ThreeWindowResults = namedtuple("ThreeWindowResults", ["net_signal", "jump_ratio", "background", "exponent"])
+
+#: Shape of the tiles processed at a time, 2 MiB for each float64 map.
+THREE_WINDOW_TILE_SHAPE = (512, 512)
+
+
+def iter_tiles(shape, tile_shape=THREE_WINDOW_TILE_SHAPE):
+    """
+    Iterate over the tiles of an image in row order.
+
+    :param tuple shape: (rows, columns) of the image.
+    :param tuple tile_shape: (rows, columns) of a tile, the tiles of the last row and column can be smaller.
+    :return: generator of (row slice, column slice) of each tile.
+    """
+    number_rows, number_columns = shape[:2]
+    tile_rows, tile_columns = max(1, tile_shape[0]), max(1, tile_shape[1])
+    for row in range(0, number_rows, tile_rows):
+        for column in range(0, number_columns, tile_columns):
+            yield (slice(row, min(row + tile_rows, number_rows)),
+                   slice(column, min(column + tile_columns, number_columns)))
+
+
+def window_energies_eV(energies_eV, segments_channel):
+    """
+    Return the energy at the center of the PreL, PreH and Post segments of the detector.
+
+    :param energies_eV: energy of each channel of the spectrum.
+    :param dict segments_channel: (first, last) channel of each segment, e.g.
+        :py:attr:`pysemeels.hitachi.eels_su.elv_file.ElvFile.segments_channel`.
+    :return: the energies of the low pre-edge, high pre-edge and post-edge windows.
+    :rtype: tuple
+    """
+    energies = []
+    for label in [EFTEM_PRE_LOW, EFTEM_PRE_HIGH, EFTEM_POST]:
+        first_channel, last_channel = segments_channel[label]
+        energies.append(float(energies_eV[(first_channel + last_channel) // 2]))
+
+    return tuple(energies)
+
+
+class ThreeWindowEngine(object):
+    """
+    Three-window elemental mapping with a power-law background :math:`B(E) = A E^{-r}` fitted on each pixel.
+
+    The exponent is computed in closed form from the two pre-edge windows
+
+    .. math::
+        r = \\frac{\\ln(I_1 / I_2)}{\\ln(E_2 / E_1)}
+
+    and the background extrapolated in the post-edge window is :math:`B_3 = I_2 (E_2 / E_3)^r`. The net signal is
+    :math:`I_3 - B_3` and the jump ratio :math:`I_3 / I_2`. The three windows must have the same width.
+
+    The pixels with a pre-edge intensity that is not positive have no power-law background, their maps are NaN.
+
+    The micrographs are processed by tiles, each tile of the inputs is read, e.g. from a h5py dataset, and written in
+    the output maps before the next tile, so the memory used is bounded by the tile shape and not by the micrograph
+    size.
+    """
+    def __init__(self, energy_pre_low_eV, energy_pre_high_eV, energy_post_eV, tile_shape=THREE_WINDOW_TILE_SHAPE,
+                 dtype=np.float64):
+        """
+
+        :param float energy_pre_low_eV: energy loss of the low energy pre-edge window :math:`E_1`.
+        :param float energy_pre_high_eV: energy loss of the high energy pre-edge window :math:`E_2`.
+        :param float energy_post_eV: energy loss of the post-edge window :math:`E_3`.
+        :param tuple tile_shape: (rows, columns) of the tiles processed at a time.
+        :param dtype: data type of the maps, e.g. `np.float32` for large micrographs.
+        :raise ValueError: if the energies are not positive and increasing.
+        """
+        if not 0.0 < energy_pre_low_eV < energy_pre_high_eV < energy_post_eV:
+            raise ValueError("Window energies must be positive and increasing: {}, {}, {}".format(
+                energy_pre_low_eV, energy_pre_high_eV, energy_post_eV))
+
+        self.energy_pre_low_eV = energy_pre_low_eV
+        self.energy_pre_high_eV = energy_pre_high_eV
+        self.energy_post_eV = energy_post_eV
+
+        self.tile_shape = tile_shape
+        self.dtype = dtype
+
+    def compute_tile(self, pre_low, pre_high, post):
+        """
+        Compute the maps of one tile.
+
+        :param pre_low: intensities :math:`I_1` of the low energy pre-edge window.
+        :param pre_high: intensities :math:`I_2` of the high energy pre-edge window.
+        :param post: intensities :math:`I_3` of the post-edge window.
+        :rtype: :py:class:`ThreeWindowResults`
+        """
+        pre_low = np.asarray(pre_low, dtype=self.dtype)
+        pre_high = np.asarray(pre_high, dtype=self.dtype)
+        post = np.asarray(post, dtype=self.dtype)
+
+        valid = (pre_low > 0.0) & (pre_high > 0.0)
+
+        exponent = np.full(pre_high.shape, np.nan, dtype=self.dtype)
+        np.divide(pre_low, pre_high, out=exponent, where=valid)
+        np.log(exponent, out=exponent, where=valid)
+        exponent /= np.log(self.energy_pre_high_eV / self.energy_pre_low_eV)
+
+        background = exponent * np.log(self.energy_pre_high_eV / self.energy_post_eV)
+        np.exp(background, out=background)
+        background *= pre_high
+
+        net_signal = np.subtract(post, background)
+
+        jump_ratio = np.full(pre_high.shape, np.nan, dtype=self.dtype)
+        np.divide(post, pre_high, out=jump_ratio, where=valid)
+
+        return ThreeWindowResults(net_signal, jump_ratio, background, exponent)
+
+    def compute(self, pre_low, pre_high, post, out=None):
+        """
+        Compute the maps of the whole micrographs tile by tile.
+
+        :param pre_low: low energy pre-edge micrograph, a numpy array, memory map or h5py dataset.
+        :param pre_high: high energy pre-edge micrograph.
+        :param post: post-edge micrograph.
+        :param out: preallocated maps, e.g. h5py datasets to write maps larger than the memory, new arrays if None.
+        :type out: :py:class:`ThreeWindowResults`
+        :rtype: :py:class:`ThreeWindowResults`
+        :raise ValueError: if the micrographs do not have the same shape.
+        """
+        shape = tuple(pre_low.shape)
+        if tuple(pre_high.shape) != shape or tuple(post.shape) != shape:
+            raise ValueError("Micrographs do not have the same shape: {}, {}, {}".format(
+                shape, tuple(pre_high.shape), tuple(post.shape)))
+
+        if out is None:
+            out = ThreeWindowResults(*[np.empty(shape, dtype=self.dtype) for _field in ThreeWindowResults._fields])
+
+        for tile in iter_tiles(shape, self.tile_shape):
+            results = self.compute_tile(pre_low[tile], pre_high[tile], post[tile])
+            for output_map, tile_map in zip(out, results):
+                output_map[tile] = tile_map
+
+        return out
+
+    def compute_eftem(self, eftem, out=None):
+        """
+        Compute the maps of the :py:data:`pysemeels.eftem.EFTEM_PRE_LOW`, :py:data:`pysemeels.eftem.EFTEM_PRE_HIGH`
+        and :py:data:`pysemeels.eftem.EFTEM_POST` micrographs of an EFTEM data set.
+
+        :param eftem: micrographs imported or read from a HDF5 file.
+        :type eftem: :py:class:`pysemeels.eftem.Eftem`
+        :param out: preallocated maps, new arrays if None.
+        :type out: :py:class:`ThreeWindowResults`
+        :rtype: :py:class:`ThreeWindowResults`
+        :raise KeyError: if one of the three micrographs is missing.
+        """
+        micrographs = eftem.micrographs
+        return self.compute(micrographs[EFTEM_PRE_LOW], micrographs[EFTEM_PRE_HIGH], micrographs[EFTEM_POST], out)
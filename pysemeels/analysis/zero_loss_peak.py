@@ -26,10 +26,10 @@ Analyze the zero loss peak from an EELS spectrum.
 ###############################################################################
 
 # Standard library modules.
+from collections import namedtuple
 
 # Third party modules.
 import numpy as np
-import scipy.stats
 from lmfit.models import VoigtModel
 
 # Local modules.
@@ -37,6 +37,15 @@ from lmfit.models import VoigtModel
 # Project modules.
 
 # Globals and constants variables.
+#: Results of :py:func:`compute_fwhm_batch`, one array element per spectrum.
+ZeroLossPeakBatchResults = namedtuple("ZeroLossPeakBatchResults", ["max_intensity_index", "roi_indices", "position_eV",
+                                                                   "maximum", "background", "fwhm_eV", "fwtm_eV",
+                                                                   "fwfm_eV"])
+#: Results of :py:func:`compute_statistics_batch`, one array element per spectrum.
+ZeroLossPeakStatistics = namedtuple("ZeroLossPeakStatistics", ["number_counts", "minimum_eV", "maximum_eV", "mean_eV",
+                                                               "variance_eV2", "std_eV", "skewness", "kurtosis"])
+#: Number of spectra processed together when computing the widths in :py:func:`compute_fwhm_batch`.
+_BATCH_BLOCK_SIZE = 128
 
 
 class ZeroLossPeak():
@@ -67,7 +76,8 @@ class ZeroLossPeak():
         self.position_eV = self.energies_eV[self.max_intensity_index]
 
         eV_channel = self.energies_eV[1] - self.energies_eV[0]
-        self.roi_indices = (int(self.max_intensity_index - 4.0 / eV_channel), int(self.max_intensity_index + 4.0 / eV_channel))
+        self.roi_indices = (int(self.max_intensity_index - 4.0 / eV_channel),
+                            int(self.max_intensity_index + 4.0 / eV_channel))
 
     def compute_fwhm(self):
         self.find_position()
@@ -105,20 +115,16 @@ class ZeroLossPeak():
     def compute_statistics(self):
         self.find_position()
 
-        data = []
-        for energy_eV, counts in zip(self.energies_eV[self.roi_indices[0]:self.roi_indices[1]], self.intensities[self.roi_indices[0]:self.roi_indices[1]]):
-            data.extend([energy_eV for _i in range(int(counts))])
-
-        data = np.array(data)
-        describe = scipy.stats.describe(data)
-        self.number_counts = describe.nobs
-        self.minimum_eV = describe.minmax[0]
-        self.maximum_eV = describe.minmax[1]
-        self.mean_eV = describe.mean
-        self.variance_eV2 = describe.variance
-        self.std_eV = np.sqrt(describe.variance)
-        self.skewness = describe.skewness
-        self.kurtosis = describe.kurtosis
+        statistics = compute_statistics_batch(self.energies_eV, self.intensities[np.newaxis, :],
+                                              np.array([self.roi_indices]))
+        self.number_counts = statistics.number_counts[0]
+        self.minimum_eV = statistics.minimum_eV[0]
+        self.maximum_eV = statistics.maximum_eV[0]
+        self.mean_eV = statistics.mean_eV[0]
+        self.variance_eV2 = statistics.variance_eV2[0]
+        self.std_eV = statistics.std_eV[0]
+        self.skewness = statistics.skewness[0]
+        self.kurtosis = statistics.kurtosis[0]
 
     def fit(self):
         x = self.energies_eV
@@ -139,11 +145,157 @@ class ZeroLossPeak():
         self.fit_results_height = values['height']
 
 
+def _roi_indices(energies_eV, max_intensity_indices, width_eV=4.0):
+    """
+    Compute the region of interest of each spectrum, +/- `width_eV` around the maximum intensity channel.
+
+    :param energies_eV: energies of each spectrum, shape (n_spectra, n_channels), or energy axis shared by all
+        spectra, shape (n_channels,).
+    :param max_intensity_indices: channel of the maximum intensity of each spectrum.
+    :param float width_eV: half width of the region of interest.
+    :return: first and last channels of the region of interest, shape (n_spectra, 2).
+    """
+    eV_channel = energies_eV[..., 1] - energies_eV[..., 0]
+    roi_indices = np.empty((len(max_intensity_indices), 2), dtype=int)
+    roi_indices[:, 0] = np.trunc(max_intensity_indices - width_eV / eV_channel)
+    roi_indices[:, 1] = np.trunc(max_intensity_indices + width_eV / eV_channel)
+
+    return roi_indices
+
+
+def _width_eV(energies_eV, mask):
+    """
+    Compute the energy width between the first and last channels selected by the mask of each spectrum.
+
+    :param energies_eV: energies of each spectrum, shape (n_spectra, n_channels).
+    :param mask: selected channels of each spectrum, shape (n_spectra, n_channels).
+    :return: width of each spectrum, nan if no channel is selected.
+    """
+    number_channels = mask.shape[1]
+    first_indices = np.argmax(mask, axis=1)
+    last_indices = number_channels - 1 - np.argmax(mask[:, ::-1], axis=1)
+
+    first_energies_eV = np.take_along_axis(energies_eV, first_indices[:, np.newaxis], axis=1)[:, 0]
+    last_energies_eV = np.take_along_axis(energies_eV, last_indices[:, np.newaxis], axis=1)[:, 0]
+
+    return np.where(np.any(mask, axis=1), last_energies_eV - first_energies_eV, np.nan)
+
+
+def compute_fwhm_batch(energies_eV, intensities):
+    """
+    Compute the zero loss peak position, maximum, background and widths of many spectra at once.
+
+    The results are the same as :py:meth:`ZeroLossPeak.compute_fwhm` for each spectrum, but every step is done with
+    axis-wise numpy operations on the whole stack. The background is the mean of the intensities between the
+    background channel limits, gathered in a (n_spectra, n_background_channels) window.
+
+    :param energies_eV: energy axis, shared by all spectra with shape (n_channels,) or one per spectrum with shape
+        (n_spectra, n_channels).
+    :param intensities: intensities of the spectra, shape (n_spectra, n_channels).
+    :return: the results, a width is nan if no channel is above the threshold.
+    :rtype: :py:class:`ZeroLossPeakBatchResults`
+    """
+    intensities = np.atleast_2d(np.asarray(intensities, dtype=np.float64))
+    number_spectra, number_channels = intensities.shape
+    energies_eV = np.broadcast_to(np.asarray(energies_eV, dtype=np.float64), intensities.shape)
+    spectrum_indices = np.arange(number_spectra)
+
+    max_intensity_indices = np.argmax(intensities, axis=1)
+    position_eV = energies_eV[spectrum_indices, max_intensity_indices]
+    maximum = intensities[spectrum_indices, max_intensity_indices]
+
+    eV_channel = energies_eV[:, 1] - energies_eV[:, 0]
+    roi_indices = _roi_indices(energies_eV, max_intensity_indices)
+
+    # Same limits as the slice intensities[background_min:background_max] of the single spectrum method.
+    background_min = np.clip(np.trunc(roi_indices[:, 0] - 2.0 / eV_channel).astype(int), 0, number_channels)
+    background_max = np.trunc(roi_indices[:, 0] + 2.0 / eV_channel).astype(int)
+    background_max = np.clip(np.where(background_max < 0, background_max + number_channels, background_max),
+                             0, number_channels)
+    number_background_channels = np.maximum(background_max - background_min, 0)
+    window_indices = background_min[:, np.newaxis] + np.arange(max(number_background_channels.max(initial=0), 1))
+    window_mask = window_indices < background_max[:, np.newaxis]
+    window_intensities = np.take_along_axis(intensities, np.minimum(window_indices, number_channels - 1), axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        background = np.sum(window_intensities, axis=1, where=window_mask) / number_background_channels
+    background[number_background_channels <= 0] = np.nan
+
+    # The widths are computed by blocks of spectra to keep the temporary arrays small.
+    fwhm_eV = np.empty(number_spectra)
+    fwtm_eV = np.empty(number_spectra)
+    fwfm_eV = np.empty(number_spectra)
+    for start in range(0, number_spectra, _BATCH_BLOCK_SIZE):
+        block = slice(start, start + _BATCH_BLOCK_SIZE)
+        net_intensities = intensities[block] - background[block, np.newaxis]
+        net_maximum = (maximum[block] - background[block])[:, np.newaxis]
+        fwhm_eV[block] = _width_eV(energies_eV[block], net_intensities >= net_maximum / 2.0)
+        fwtm_eV[block] = _width_eV(energies_eV[block], net_intensities >= net_maximum / 10.0)
+        fwfm_eV[block] = _width_eV(energies_eV[block], net_intensities >= net_maximum / 20.0)
+
+    return ZeroLossPeakBatchResults(max_intensity_indices, roi_indices, position_eV, maximum, background, fwhm_eV,
+                                    fwtm_eV, fwfm_eV)
+
+
+def compute_statistics_batch(energies_eV, intensities, roi_indices=None):
+    """
+    Compute the statistics of the energy distribution in the zero loss peak region of many spectra at once.
+
+    Each spectrum is used as a histogram: the energy of a channel is weighted by its number of counts, truncated to an
+    integer as in the original event list approach. The weighted moments give the same results as
+    :py:func:`scipy.stats.describe` on the list of events without creating it: unbiased variance, biased skewness and
+    Fisher kurtosis.
+
+    :param energies_eV: energy axis, shared by all spectra with shape (n_channels,) or one per spectrum with shape
+        (n_spectra, n_channels).
+    :param intensities: intensities of the spectra, shape (n_spectra, n_channels).
+    :param roi_indices: first and last channels used for each spectrum, shape (n_spectra, 2), +/- 4 eV around the
+        maximum intensity if None.
+    :return: the statistics, nan values for a spectrum without counts in its region of interest.
+    :rtype: :py:class:`ZeroLossPeakStatistics`
+    """
+    intensities = np.atleast_2d(np.asarray(intensities, dtype=np.float64))
+    number_spectra, number_channels = intensities.shape
+    energies_eV = np.broadcast_to(np.asarray(energies_eV, dtype=np.float64), intensities.shape)
+
+    if roi_indices is None:
+        roi_indices = _roi_indices(energies_eV, np.argmax(intensities, axis=1))
+    roi_indices = np.asarray(roi_indices, dtype=int).reshape(number_spectra, 2)
+
+    # Same channels as the slice intensities[roi_indices[0]:roi_indices[1]], negative limits start from the end.
+    roi_limits = np.clip(np.where(roi_indices < 0, roi_indices + number_channels, roi_indices), 0, number_channels)
+    channels = np.arange(number_channels)
+    roi_mask = (channels >= roi_limits[:, 0:1]) & (channels < roi_limits[:, 1:2])
+
+    weights = np.where(roi_mask, np.maximum(np.trunc(intensities), 0.0), 0.0)
+    number_counts = np.sum(weights, axis=1).astype(np.int64)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_eV = np.sum(weights * energies_eV, axis=1) / number_counts
+        deviations_eV = energies_eV - mean_eV[:, np.newaxis]
+        weighted_deviations2_eV2 = weights * deviations_eV ** 2
+        moment2_eV2 = np.sum(weighted_deviations2_eV2, axis=1) / number_counts
+        moment3_eV3 = np.sum(weighted_deviations2_eV2 * deviations_eV, axis=1) / number_counts
+        moment4_eV4 = np.sum(weighted_deviations2_eV2 * deviations_eV ** 2, axis=1) / number_counts
+
+        variance_eV2 = moment2_eV2 * number_counts / (number_counts - 1)
+        skewness = moment3_eV3 / moment2_eV2 ** 1.5
+        kurtosis = moment4_eV4 / moment2_eV2 ** 2 - 3.0
+
+    has_counts = weights > 0.0
+    minimum_eV = np.min(energies_eV, axis=1, where=has_counts, initial=np.inf)
+    maximum_eV = np.max(energies_eV, axis=1, where=has_counts, initial=-np.inf)
+    no_counts = number_counts == 0
+    minimum_eV[no_counts] = np.nan
+    maximum_eV[no_counts] = np.nan
+
+    return ZeroLossPeakStatistics(number_counts, minimum_eV, maximum_eV, mean_eV, variance_eV2, np.sqrt(variance_eV2),
+                                  skewness, kurtosis)
+
+
 if __name__ == '__main__':
     import matplotlib.pyplot as plt
     from pysemeels import get_current_module_path
     from pysemeels.hitachi.eels_su.elv_file import ElvFile
-    import numpy as np
 
     elv_file_path = get_current_module_path(__file__, "../../test_data/hitachi/eels_su/30kV_7eV.elv")
     with open(elv_file_path, 'r') as elv_text_file:
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeels.analysis.zero_loss_peak_fit
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Fit the zero loss peak of many EELS spectra with a Voigt model.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+from collections import namedtuple
+import logging
+
+# Third party modules.
+import numpy as np
+from scipy.special import wofz
+from lmfit import Model
+from lmfit.lineshapes import voigt
+from lmfit.models import guess_from_peak
+
+# Local modules.
+
+# Project modules.
+from pysemeels.analysis.pixel_fit import PixelFitEngine
+from pysemeels.analysis.zero_loss_peak import _roi_indices
+
+# Globals and constants variables.
+#: Results of :py:meth:`ZeroLossPeakFitEngine.fit`, one array element per spectrum.
+ZeroLossPeakFitResults = namedtuple("ZeroLossPeakFitResults", ["position_eV", "fwhm_eV", "sigma_eV", "gamma_eV", "area",
+                                                               "height", "success"])
+
+
+def _voigt(x, amplitude=1.0, center=0.0, sigma=1.0):
+    """
+    Voigt line shape with gamma equal to sigma, the default constraint of :py:class:`lmfit.models.VoigtModel`.
+
+    The constraint is in the function instead of a parameter expression, which lmfit would evaluate with asteval at
+    each iteration of the fit.
+    """
+    return voigt(x, amplitude, center, sigma, sigma)
+
+
+def create_voigt_model():
+    """
+    Create the Voigt model used by :py:class:`ZeroLossPeakFitEngine`.
+
+    :return: a model with the amplitude, center and sigma parameters of :py:class:`lmfit.models.VoigtModel`.
+    :rtype: :py:class:`lmfit.Model`
+    """
+    model = Model(_voigt)
+    model.set_param_hint('sigma', min=0.0)
+
+    return model
+
+
+def _voigt_fwhm_height(amplitude, sigma):
+    """
+    Compute the full width at half maximum and height of a Voigt line shape with gamma equal to sigma, with the same
+    formulas as :py:class:`lmfit.models.VoigtModel`.
+    """
+    gamma = sigma
+    fwhm = 1.0692 * gamma + np.sqrt(0.8664 * gamma ** 2 + 5.545083 * sigma ** 2)
+    height = (amplitude / (max(1.0e-15, sigma * np.sqrt(2.0 * np.pi)))) * \
+        np.real(wofz((1j * gamma) / (max(1.0e-15, sigma * np.sqrt(2.0)))))
+
+    return fwhm, height
+
+
+def _fit_spectra(intensities, roi_indices, energies_eV, warm_start=True, model=None):
+    """
+    Fit the zero loss peak of spectra one after the other.
+
+    :param intensities: intensities of the spectra, shape (n_spectra, n_channels).
+    :param roi_indices: first and last channels fitted for each spectrum, shape (n_spectra, 2).
+    :param energies_eV: energy axis shared by all spectra.
+    :param bool warm_start: use the solution of the previous spectrum as the initial values of the next fit.
+    :param model: model used for all fits, a new one from :py:func:`create_voigt_model` if None.
+    :return: the fitted values, shape (n_spectra, 6), and the success of each fit.
+    :rtype: tuple
+    """
+    if model is None:
+        model = create_voigt_model()
+
+    values = np.full((len(intensities), len(ZeroLossPeakFitResults._fields) - 1), np.nan)
+    success = np.zeros(len(intensities), dtype=bool)
+
+    parameters = None
+    for spectrum_id, (roi_min, roi_max) in enumerate(roi_indices):
+        x = energies_eV[roi_min:roi_max]
+        y = intensities[spectrum_id, roi_min:roi_max]
+
+        try:
+            if parameters is None:
+                parameters = guess_from_peak(model, y, x, False, ampscale=1.5, sigscale=0.65)
+
+            fit_results = model.fit(y, parameters, x=x, calc_covar=False)
+        except (ValueError, TypeError) as message:
+            logging.warning("Cannot fit spectrum %i: %s", spectrum_id, message)
+            parameters = None
+            continue
+
+        amplitude = fit_results.params['amplitude'].value
+        center = fit_results.params['center'].value
+        sigma = fit_results.params['sigma'].value
+        fwhm, height = _voigt_fwhm_height(amplitude, sigma)
+        values[spectrum_id] = [center, fwhm, sigma, sigma, amplitude, height]
+        success[spectrum_id] = fit_results.success
+
+        if warm_start and fit_results.success:
+            parameters = fit_results.params
+        else:
+            parameters = None
+
+    return values, success
+
+
+class ZeroLossPeakFitEngine(PixelFitEngine):
+    """
+    Fit the zero loss peak of a stack of spectra with a Voigt model.
+
+    Compared to :py:meth:`pysemeels.analysis.zero_loss_peak.ZeroLossPeak.fit`, only the region of interest around
+    the maximum intensity is fitted, the same model object without parameter expressions is reused and the
+    covariance is not computed. See :py:class:`pysemeels.analysis.pixel_fit.PixelFitEngine` for the fit order and
+    the workers.
+    """
+    results_class = ZeroLossPeakFitResults
+    fit_description = "zero loss peaks"
+
+    def __init__(self, energies_eV, roi_width_eV=4.0, warm_start=True, workers=1, chunk_size=256):
+        """
+        :param energies_eV: energy axis shared by all spectra.
+        :param float roi_width_eV: half width of the fitted region around the maximum intensity.
+        :param bool warm_start: use the solution of the neighbouring spectrum as the initial values of a fit.
+        :param int workers: number of processes used to fit the spectra.
+        :param int chunk_size: number of spectra fitted by a process at a time.
+        """
+        super(ZeroLossPeakFitEngine, self).__init__(warm_start, workers, chunk_size)
+
+        self.energies_eV = np.asarray(energies_eV, dtype=np.float64)
+        self.roi_width_eV = roi_width_eV
+
+        self.model = create_voigt_model()
+
+    def find_roi_indices(self, intensities):
+        """
+        Find the fitted region of each spectrum, the same region as
+        :py:meth:`pysemeels.analysis.zero_loss_peak.ZeroLossPeak.find_position` clipped to the spectrum.
+
+        :param intensities: intensities of the spectra, shape (n_spectra, n_channels).
+        :return: first and last channels of the region of each spectrum, shape (n_spectra, 2).
+        """
+        number_channels = intensities.shape[-1]
+        roi_indices = _roi_indices(self.energies_eV, np.argmax(intensities, axis=-1), self.roi_width_eV)
+
+        return np.clip(roi_indices, 0, number_channels)
+
+    def prepare_fit(self, ordered_intensities):
+        """
+        Return the Voigt fit function, the intensities and region of each spectrum and the shared arguments.
+        """
+        roi_indices = self.find_roi_indices(ordered_intensities)
+        return _fit_spectra, (ordered_intensities, roi_indices), (self.energies_eV, self.warm_start, self.model)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeels.calibration_store
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Content addressed storage of the gain correction and dark current vectors shared by many spectra.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import hashlib
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeels.hdf5_storage import create_dataset
+
+# Globals and constants variables.
+#: Project level group with the distinct calibration vectors.
+HDF5_GROUP_CALIBRATIONS = "calibrations"
+#: Content hash of a calibration vector.
+HDF5_ATTRIBUTE_CALIBRATION_KEY = "calibration key"
+
+
+def calibration_key(data):
+    """
+    Compute the content hash key of a calibration vector.
+
+    The key depends on the values, the data type and the shape of the vector.
+
+    :param data: calibration vector.
+    :rtype: str
+    """
+    data = np.ascontiguousarray(data)
+
+    data_hash = hashlib.sha256()
+    data_hash.update(data.dtype.str.encode("ascii"))
+    data_hash.update(str(data.shape).encode("ascii"))
+    data_hash.update(data.tobytes())
+
+    return data_hash.hexdigest()
+
+
+class CalibrationStore(object):
+    """
+    Store each distinct calibration vector (gain corrections, dark currents) once in a project level group.
+
+    The spectra reference the stored vector with a HDF5 hard link, so the spectrum groups keep the same dataset names
+    and the readers do not need to know about the store. The vectors read through the store are cached in memory and
+    shared between the spectra, they are read-only.
+    """
+    def __init__(self, group=None, storage_options=None):
+        """
+
+        :param `h5py.group` group: project level group of the calibration vectors, only the memory cache of
+            :py:meth:`read` is used if None.
+        :param storage_options: chunking, compression and data type of the calibration datasets.
+        :type storage_options: :py:class:`pysemeels.hdf5_storage.Hdf5StorageOptions`
+        """
+        self.group = group
+        self.storage_options = storage_options
+
+        self._cache = {}
+
+    def __len__(self):
+        return len(self._cache)
+
+    def link(self, spectrum_group, name, data):
+        """
+        Add the calibration vector to the store if it is new and link it in the spectrum group.
+
+        :param `h5py.group` spectrum_group: group of the spectrum.
+        :param str name: name of the dataset in the spectrum group.
+        :param data: calibration vector.
+        :return: the content hash key of the vector.
+        :rtype: str
+        :raise ValueError: if the store has no group.
+        """
+        if self.group is None:
+            raise ValueError("Cannot link a calibration vector without the group of the calibration store")
+
+        key = calibration_key(data)
+
+        if key not in self.group:
+            dataset = create_dataset(self.group, key, data, self.storage_options)
+            dataset.attrs[HDF5_ATTRIBUTE_CALIBRATION_KEY] = key
+
+        spectrum_group[name] = self.group[key]
+
+        return key
+
+    def read(self, dataset):
+        """
+        Read a calibration vector, the vectors stored with a key are read only once.
+
+        :param `h5py.Dataset` dataset: calibration dataset.
+        :rtype: `np.array`
+        """
+        key = dataset.attrs.get(HDF5_ATTRIBUTE_CALIBRATION_KEY)
+        if key is None:
+            return dataset[...]
+
+        if isinstance(key, bytes):
+            key = key.decode("ascii")
+
+        if key not in self._cache:
+            data = dataset[...]
+            data.flags.writeable = False
+            self._cache[key] = data
+
+        return self._cache[key]
+
+    def clear(self):
+        """
+        Clear the memory cache.
+        """
+        self._cache = {}
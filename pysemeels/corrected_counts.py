@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeels.corrected_counts
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Gain and dark current correction of the raw counts of EELS spectra.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+from concurrent.futures import ThreadPoolExecutor
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+
+# Globals and constants variables.
+#: Number of spectra corrected at a time by :py:func:`correct_counts_batch`, 8 MiB of float64 counts of 1024 channels.
+BATCH_CHUNK_SIZE = 1024
+
+
+def correct_counts(raw_counts, dark_currents, gain_corrections, dtype=np.float64, out=None):
+    """
+    Compute the net counts corrected for the dark current and gain.
+
+    The corrected or net counts are calculated for each channel as
+
+    .. math::
+        N = \\frac{C - D}{G}
+
+    The arrays are broadcast together and the result is computed in the output array without temporary arrays.
+
+    :param raw_counts: raw counts :math:`C`.
+    :param dark_currents: dark currents :math:`D`.
+    :param gain_corrections: gain corrections :math:`G`.
+    :param dtype: data type of the new output array, e.g. `np.float32` for large batches.
+    :param out: output array, a new array if None.
+    :return: the net counts.
+    :rtype: `np.array`
+    """
+    raw_counts = np.asarray(raw_counts)
+    dark_currents = np.asarray(dark_currents)
+    gain_corrections = np.asarray(gain_corrections)
+
+    if out is None:
+        shape = np.broadcast_shapes(raw_counts.shape, dark_currents.shape, gain_corrections.shape)
+        out = np.empty(shape, dtype=dtype)
+
+    np.subtract(raw_counts, dark_currents, out=out)
+    np.divide(out, gain_corrections, out=out)
+
+    return out
+
+
+def correct_counts_batch(raw_counts, dark_currents, gain_corrections, dtype=np.float64, out=None,
+                         chunk_size=BATCH_CHUNK_SIZE, workers=1):
+    """
+    Compute the net counts of a stack of spectra sharing the same dark currents and gain corrections.
+
+    The stack is corrected by chunks of `chunk_size` spectra along the first axis, so only one chunk of a
+    :py:class:`numpy.memmap` stack, e.g. from
+    :py:meth:`pysemeels.hitachi.eels_su.map.raw_spectra.RawSpectra.read_memmap`, is read in memory at a time and each
+    chunk is written directly in the output array.
+    With more than one worker, the chunks are corrected by threads, numpy releases the GIL in the computation.
+
+    :param raw_counts: raw counts of shape (n_spectra, n_channels).
+    :param dark_currents: dark currents of shape (n_channels,).
+    :param gain_corrections: gain corrections of shape (n_channels,).
+    :param dtype: data type of the new output array, e.g. `np.float32` for large batches.
+    :param out: preallocated output array of shape (n_spectra, n_channels), a new array if None.
+    :param int chunk_size: number of spectra corrected at a time.
+    :param int workers: number of threads, None uses the default of :py:class:`concurrent.futures.ThreadPoolExecutor`.
+    :return: the net counts.
+    :rtype: `np.array`
+    :raise ValueError: if the raw counts are not a 2-D stack or the output array does not have their shape.
+    """
+    raw_counts = np.asanyarray(raw_counts)
+    dark_currents = np.asarray(dark_currents)
+    gain_corrections = np.asarray(gain_corrections)
+
+    if raw_counts.ndim != 2:
+        raise ValueError("Raw counts must be a (n_spectra, n_channels) array: {}".format(raw_counts.shape))
+
+    if out is None:
+        out = np.empty(raw_counts.shape, dtype=dtype)
+    elif out.shape != raw_counts.shape:
+        raise ValueError("Output shape {} is not the raw counts shape {}".format(out.shape, raw_counts.shape))
+
+    chunk_size = max(1, chunk_size)
+    chunks = [slice(start, start + chunk_size) for start in range(0, raw_counts.shape[0], chunk_size)]
+
+    def correct_chunk(chunk):
+        correct_counts(raw_counts[chunk], dark_currents, gain_corrections, out=out[chunk])
+
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            correct_chunk(chunk)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Consume the results to raise the exceptions of the threads.
+            list(executor.map(correct_chunk, chunks))
+
+    return out
+
+
+def counts_input_property(attribute_name, doc=None):
+    """
+    Create a property for an input array of the corrected counts that resets the cached counts when it is replaced.
+
+    The value is stored in the `_<attribute_name>` attribute of the data container, which must have a
+    `invalidate_counts()` method, see :py:class:`CorrectedCountsMixin`.
+
+    :param str attribute_name: name of the property.
+    :param str doc: documentation of the property.
+    :rtype: property
+    """
+    private_name = "_" + attribute_name
+
+    def getter(self):
+        return getattr(self, private_name, None)
+
+    def setter(self, value):
+        setattr(self, private_name, value)
+        self.invalidate_counts()
+
+    return property(getter, setter, doc=doc)
+
+
+class CorrectedCountsMixin(object):
+    """
+    Cached net counts computed from the `raw_counts`, `dark_currents` and `gain_corrections` attributes.
+
+    The counts are computed on the first access of :py:attr:`counts` and reused until :py:meth:`invalidate_counts` is
+    called. The data container calls it when one of the arrays is replaced, e.g. with
+    :py:func:`counts_input_property`. The arrays are not checked on each access, so after a modification in place,
+    e.g. appending to a list of raw counts, the caller has to call :py:meth:`invalidate_counts`.
+    """
+    _cached_counts = None
+
+    @property
+    def counts(self):
+        """
+        Net counts corrected for the gain and dark current, computed again only after :py:meth:`invalidate_counts`,
+        see :py:func:`pysemeels.corrected_counts.correct_counts`.
+
+        :rtype: `np.array`
+        """
+        if self._cached_counts is None:
+            self.compute_counts()
+        return self._cached_counts
+
+    def compute_counts(self, dtype=np.float64, out=None):
+        """
+        Compute and cache the net counts.
+
+        :param dtype: data type of the counts, e.g. `np.float32` to halve the memory of large batches.
+        :param out: preallocated output array, the counts are computed in place in this array.
+        :return: the net counts.
+        :rtype: `np.array`
+        """
+        self._cached_counts = correct_counts(self.raw_counts, self.dark_currents, self.gain_corrections, dtype, out)
+        return self._cached_counts
+
+    def invalidate_counts(self):
+        """
+        Discard the cached net counts, they are computed again on the next access.
+
+        Call this method after modifying `raw_counts`, `dark_currents` or `gain_corrections` in place.
+        """
+        self._cached_counts = None
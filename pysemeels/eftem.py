@@ -26,14 +26,148 @@ EELS EFTEM and electron micrograph data.
 ###############################################################################
 
 # Standard library modules.
+import os.path
 
 # Third party modules.
+import numpy as np
 
 # Local modules.
 
 # Project modules.
+from pysemeels.hdf5_storage import create_dataset, MICROGRAPH_STORAGE_OPTIONS
 
 # Globals and constants variables.
+#: Label of the micrograph of the low energy pre-edge window.
+EFTEM_PRE_LOW = "PreL"
+#: Label of the micrograph of the high energy pre-edge window.
+EFTEM_PRE_HIGH = "PreH"
+#: Label of the micrograph of the post-edge window.
+EFTEM_POST = "Post"
+
+#: Extensions of the micrograph files imported by :py:meth:`Eftem.import_data`, in order of preference for a label.
+MICROGRAPH_EXTENSIONS = (".tif", ".bmp")
+#: Maximum chunk shape of the micrograph datasets, a tile is read without reading the whole micrograph.
+MICROGRAPH_CHUNK_SHAPE = (256, 256)
+
+#: Downsampling factors of the overview pyramid of each micrograph.
+PYRAMID_FACTORS = (2, 4, 8)
+#: Group of the overview pyramids, with a sub group for each micrograph label.
+HDF5_GROUP_PYRAMID = "pyramid"
+#: Downsampling factor of an overview dataset.
+HDF5_ATTRIBUTE_DOWNSAMPLING_FACTOR = "downsampling factor"
+#: Group of the extra parameters, the same group as :py:data:`pysemeels.raw_spectrum.HDF5_GROUP_EXTRA_PARAMETERS`.
+HDF5_GROUP_EXTRA_PARAMETERS = "extra parameters"
+
+
+def read_micrograph(file_path):
+    """
+    Read a micrograph file, e.g. a 8 or 16 bits TIFF file of the SU9000 EELS detector.
+
+    Pillow, installed with matplotlib, is used to read the file.
+
+    :param str file_path: path of the micrograph file.
+    :return: the image, shape (rows, columns) for a gray scale image.
+    :rtype: `np.array`
+    """
+    from PIL import Image
+
+    with Image.open(file_path) as image:
+        return np.array(image)
+
+
+def _check_factor(factor):
+    if isinstance(factor, bool) or not isinstance(factor, (int, np.integer)) or factor < 1:
+        raise ValueError("The downsampling factor {!r} is not a positive integer".format(factor))
+
+
+def _sum_blocks(sums, row_sizes, column_sizes, factor):
+    """
+    Sum blocks of factor x factor elements and the number of pixels of the blocks along the rows and the columns.
+    """
+    row_starts = np.arange(0, sums.shape[0], factor)
+    column_starts = np.arange(0, sums.shape[1], factor)
+
+    sums = np.add.reduceat(sums, row_starts, axis=0, dtype=np.float64)
+    sums = np.add.reduceat(sums, column_starts, axis=1)
+
+    return sums, np.add.reduceat(row_sizes, row_starts), np.add.reduceat(column_sizes, column_starts)
+
+
+def _block_means(sums, row_sizes, column_sizes, dtype):
+    block_sizes = np.outer(row_sizes, column_sizes).reshape(sums.shape[:2] + (1,) * (sums.ndim - 2))
+    means = sums / block_sizes
+
+    if np.issubdtype(dtype, np.integer):
+        return np.round(means).astype(dtype)
+    return means.astype(dtype)
+
+
+def downsample_image(image, factor):
+    """
+    Downsample an image by averaging blocks of factor x factor pixels.
+
+    The blocks of the last rows and columns can be smaller when the image shape is not a multiple of the factor, they
+    are the mean of their pixels. An integer image keeps its data type, the mean is rounded.
+
+    :param image: image of shape (rows, columns) or (rows, columns, colors).
+    :param int factor: downsampling factor.
+    :return: the image of shape (ceil(rows / factor), ceil(columns / factor)).
+    :rtype: `np.array`
+    :raise ValueError: if the factor is not a positive integer.
+    """
+    _check_factor(factor)
+
+    image = np.asarray(image)
+    row_sizes = np.ones(image.shape[0], dtype=np.int64)
+    column_sizes = np.ones(image.shape[1], dtype=np.int64)
+
+    sums, row_sizes, column_sizes = _sum_blocks(image, row_sizes, column_sizes, factor)
+    return _block_means(sums, row_sizes, column_sizes, image.dtype)
+
+
+def create_pyramid(image, factors=PYRAMID_FACTORS):
+    """
+    Create the overview pyramid of an image.
+
+    Each level sums the blocks of the previous level and keeps the number of pixels of each block, so a level is the
+    exact mean of the full resolution pixels, rounded only once, as :py:func:`downsample_image` of the image.
+
+    :param image: image of shape (rows, columns) or (rows, columns, colors).
+    :param factors: increasing downsampling factors, each a multiple of the previous one.
+    :return: the downsampled image of each factor.
+    :rtype: dict
+    :raise ValueError: if a factor is not a positive integer or not a multiple of the previous factor.
+    """
+    image = np.asarray(image)
+    sums = image
+    row_sizes = np.ones(image.shape[0], dtype=np.int64)
+    column_sizes = np.ones(image.shape[1], dtype=np.int64)
+
+    pyramid = {}
+    previous_factor = 1
+    for factor in factors:
+        _check_factor(factor)
+        if factor <= previous_factor or factor % previous_factor != 0:
+            raise ValueError("The downsampling factor {:d} is not a larger multiple of the previous factor {:d}"
+                             .format(factor, previous_factor))
+
+        sums, row_sizes, column_sizes = _sum_blocks(sums, row_sizes, column_sizes, factor // previous_factor)
+        previous_factor = factor
+        pyramid[factor] = _block_means(sums, row_sizes, column_sizes, image.dtype)
+
+    return pyramid
+
+
+def _pyramid_dataset_name(factor):
+    return "{:d}x".format(factor)
+
+
+def _create_micrograph_dataset(group, name, image, storage_options):
+    image = np.asarray(image)
+    chunks = tuple(min(size, chunk_size) for size, chunk_size in zip(image.shape, MICROGRAPH_CHUNK_SHAPE))
+    chunks += image.shape[len(chunks):]
+
+    return create_dataset(group, name, image, storage_options, is_counts=True, chunks=chunks)
 
 
 class Eftem(object):
@@ -47,10 +181,20 @@ class Eftem(object):
         """
         self.name = name
 
+        self.extra_parameters = {}
+
+        #: Micrograph of each label, e.g. :py:data:`EFTEM_PRE_LOW` or "SE", a numpy array or a h5py dataset.
+        self.micrographs = {}
+        #: Overview pyramid of each micrograph label: downsampled image of each factor, see :py:func:`create_pyramid`.
+        self.pyramids = {}
+
     def read_hdf5(self, parent_group):
         """
         Read the micrographs from the HDF5 parent group.
 
+        The micrographs and their overview pyramids are not read, they are h5py datasets and only the chunks of a slice
+        are read from the file when it is accessed. The HDF5 file has to stay open while they are used.
+
         :param `h5py.group` parent_group: read the data from this group.
         :return: None.
         :raises ValueError: If the parent group `parent_group` does not have the correct name.
@@ -60,11 +204,114 @@ class Eftem(object):
         else:
             raise ValueError("The parent group does not contain the project")
 
-    def write_hdf5(self, parent_group):
+        self.extra_parameters = {}
+        if HDF5_GROUP_EXTRA_PARAMETERS in project_group:
+            extra_parameters_group = project_group[HDF5_GROUP_EXTRA_PARAMETERS]
+            for name in extra_parameters_group.attrs:
+                self.extra_parameters[name] = extra_parameters_group.attrs[name]
+
+        self.micrographs = {}
+        for label, dataset in project_group.items():
+            if getattr(dataset, "ndim", 0) >= 2:
+                self.micrographs[label] = dataset
+
+        self.pyramids = {}
+        if HDF5_GROUP_PYRAMID in project_group:
+            for label, pyramid_group in project_group[HDF5_GROUP_PYRAMID].items():
+                self.pyramids[label] = {int(dataset.attrs[HDF5_ATTRIBUTE_DOWNSAMPLING_FACTOR]): dataset
+                                        for dataset in pyramid_group.values()}
+
+    def write_hdf5(self, parent_group, storage_options=None, pyramid_factors=PYRAMID_FACTORS):
         """
-        Write the micrographs into the parent group `parent_group`.
+        Write the micrographs, their overview pyramids and the extra parameters into the parent group `parent_group`.
+
+        Each micrograph is a chunked dataset with tiles of at most :py:data:`MICROGRAPH_CHUNK_SHAPE` pixels. The
+        pyramid levels of each micrograph are written in the group :py:data:`HDF5_GROUP_PYRAMID`, so an overview is
+        read without reading the micrograph. The missing pyramids are computed, see :py:meth:`compute_pyramids`.
 
         :param `h5py.group` parent_group: write micrographs into this group.
+        :param storage_options: compression of the micrographs, gzip compression with shuffle if None.
+        :type storage_options: :py:class:`pysemeels.hdf5_storage.Hdf5StorageOptions`
+        :param pyramid_factors: downsampling factors of the pyramids, no pyramid if empty.
         :return: None.
         """
         project_group = parent_group.require_group(self.name)
+
+        if storage_options is None:
+            storage_options = MICROGRAPH_STORAGE_OPTIONS
+
+        if self.extra_parameters:
+            parameters_group = project_group.require_group(HDF5_GROUP_EXTRA_PARAMETERS)
+            for name in self.extra_parameters:
+                parameters_group.attrs[name] = self.extra_parameters[name]
+
+        if pyramid_factors:
+            self.compute_pyramids(pyramid_factors)
+
+        for label, micrograph in sorted(self.micrographs.items()):
+            _create_micrograph_dataset(project_group, label, micrograph, storage_options)
+
+            if pyramid_factors:
+                pyramid_group = project_group.require_group(HDF5_GROUP_PYRAMID).require_group(label)
+                for factor in pyramid_factors:
+                    dataset = _create_micrograph_dataset(pyramid_group, _pyramid_dataset_name(factor),
+                                                         self.pyramids[label][factor], storage_options)
+                    dataset.attrs[HDF5_ATTRIBUTE_DOWNSAMPLING_FACTOR] = factor
+
+    def compute_pyramids(self, factors=PYRAMID_FACTORS):
+        """
+        Compute the overview pyramid of the micrographs without a pyramid with these factors.
+
+        :param factors: increasing downsampling factors, each a multiple of the previous one.
+        :return: the pyramid of each micrograph label.
+        :rtype: dict
+        """
+        for label, micrograph in self.micrographs.items():
+            pyramid = self.pyramids.get(label, {})
+            if not all(factor in pyramid for factor in factors):
+                self.pyramids[label] = create_pyramid(micrograph[...], factors)
+
+        return self.pyramids
+
+    def get_overview(self, label, factor):
+        """
+        Return the downsampled micrograph of the pyramid level, the micrograph itself for a factor of 1.
+
+        :param str label: label of the micrograph.
+        :param int factor: downsampling factor of the overview.
+        :return: the overview image, a numpy array or a h5py dataset.
+        :raise KeyError: if the micrograph or the pyramid level does not exist.
+        """
+        if factor == 1:
+            return self.micrographs[label]
+
+        return self.pyramids[label][factor]
+
+    def import_data(self, folder, extra_parameters=None):
+        """
+        Import the micrographs of an EFTEM folder.
+
+        The micrographs are the files `<folder name>-<label>.tif` of the folder, e.g. `map-PreL.tif`, `map-PreH.tif`,
+        `map-Post.tif` and `map-SE.tif`. A `.bmp` file is only imported if there is no `.tif` file with the same label.
+
+        :param str folder: folder of the micrographs.
+        :param dict extra_parameters: Extra parameters to add as attribute in this data group.
+        :return: None.
+        """
+        if extra_parameters:
+            self.extra_parameters.update(extra_parameters)
+
+        prefix = os.path.basename(os.path.normpath(folder)) + "-"
+        file_paths = {}
+        for file_name in sorted(os.listdir(folder)):
+            basename, extension = os.path.splitext(file_name)
+            extension = extension.lower()
+            if extension in MICROGRAPH_EXTENSIONS and basename.startswith(prefix) and len(basename) > len(prefix):
+                label = basename[len(prefix):]
+                preference = MICROGRAPH_EXTENSIONS.index(extension)
+                if label not in file_paths or preference < file_paths[label][0]:
+                    file_paths[label] = (preference, os.path.join(folder, file_name))
+
+        for label, (_preference, file_path) in sorted(file_paths.items()):
+            self.micrographs[label] = read_micrograph(file_path)
+            self.pyramids.pop(label, None)
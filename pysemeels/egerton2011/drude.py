@@ -27,6 +27,7 @@ Simulation of a low-loss spectrum using Drude model.
 
 # Standard library modules.
 import logging
+from collections import namedtuple
 
 # Third party modules.
 import numpy as np
@@ -36,6 +37,11 @@ import numpy as np
 # Project modules.
 
 # Globals and constants variables.
+DrudeResults = namedtuple('DrudeResults', ['energies_eV', 'eps1', 'eps2', 'elf', 'srfelf', 'rereps', 'ssd', 'volint',
+                                           'srfint', 'ps', 'pv', 'lam', 'lamfe'])
+
+#: Trapezoidal integration, ``np.trapz`` was renamed ``np.trapezoid`` in numpy 2.
+_trapezoid = getattr(np, "trapezoid", None) or np.trapz
 
 
 def drude(ep, ew, eb, epc, e0, beta, nn, tnm):
@@ -44,7 +50,7 @@ def drude(ep, ew, eb, epc, e0, beta, nn, tnm):
     this program generates:
     EPS1, EPS2 from modified Eq. (3.40), ELF=Im(-1/EPS) from Eq. (3.42),
     single scattering from Eq. (4.26) and SRFINT from Eq. (4.31)
-    The output is e,ssd into the file Drude.ssd (for use in Flog etc.)
+    Use :func:`write_drude_files` to save e,ssd into the file Drude.ssd (for use in Flog etc.)
     and e,eps1 ,eps2 into Drude.eps (for use in Kroeger etc.)
     Gives probabilities relative to zero-loss integral (I0 = 1) per eV
     Details in R.F.Egerton: EELS in the Electron Microscope, 3rd edition, Springer 2011)
@@ -60,54 +66,149 @@ def drude(ep, ew, eb, epc, e0, beta, nn, tnm):
     logging.info('number of data points : %g', nn)
     logging.info('thickness(nm) : %g', tnm)
 
-    b = beta / 1000. # rad
-    T = 1000. * e0 * (1. + e0 / 1022.12) / (1. + e0 / 511.06)**2  # eV
-    tgt = 1000. * e0 * (1022.12 + e0) / (511.06 + e0)  # eV
-    rk0 = 2590. * (1. + e0 / 511.06) * np.sqrt(2. * T / 511060)
-    fideps = open('Drude.eps', 'w')
-    fidssd = open('Drude.ssd', 'w')
+    results = drude_grid(ep, ew, eb, epc, e0, beta, nn, tnm)
+
+    logging.info('Ps(2surfaces+begrenzung terms)=%g,Pv=t/lambda(beta)= %g', results.ps, results.pv)
+    logging.info('Volume-plasmon MFP(nm) = %g, Free-electron MFP(nm) = %f', results.lam, results.lamfe)
+    logging.info('--------------------------------')
+
+    return results
 
+
+def drude_grid(ep, ew, eb, epc, e0, beta, nn, tnm):
+    """
+    Compute the Drude model of :func:`drude` for many parameter sets at once, without logging or file output.
+
+    The parameters *ep*, *ew*, *eb*, *beta* and *tnm* can be scalars or arrays broadcastable together,
+    e.g. ``ep[:, np.newaxis]`` and ``tnm[np.newaxis, :]`` for a plasmon energy by thickness grid.
+    The energy axis is shared by all parameter sets and is the last axis of the spectra.
+
+    :param ep: plasmon energy (eV).
+    :param ew: plasmon width FWHM (eV).
+    :param eb: binding energy (eV).
+    :param float epc: energy per channel (eV).
+    :param float e0: incident energy (keV).
+    :param beta: collection semi-angle (mrad).
+    :param int nn: number of channels.
+    :param tnm: thickness (nm).
+    :return: :class:`DrudeResults` with the spectra of shape ``broadcast shape + (nn,)`` and
+        the integrated probabilities and mean free paths of the broadcast shape.
+    """
     iw = np.arange(2, nn+2)
     e = epc * (iw - 1.0)
-    eps = 1.0 - ep**2 / (e**2 - eb**2 + e * ew * 1.0j)
+
+    return drude_spectra(e, ep, ew, eb, e0, beta, tnm)
+
+
+def drude_spectra(energies_eV, ep, ew, eb, e0, beta, tnm):
+    """
+    Compute the Drude model of :func:`drude_grid` on any energy loss axis.
+
+    :param energies_eV: positive energy losses (eV), shared by all parameter sets.
+    :param ep: plasmon energy (eV).
+    :param ew: plasmon width FWHM (eV).
+    :param eb: binding energy (eV).
+    :param float e0: incident energy (keV).
+    :param beta: collection semi-angle (mrad).
+    :param tnm: thickness (nm).
+    :return: :class:`DrudeResults` with the spectra of shape ``broadcast shape + energies_eV.shape``.
+    """
+    ep, ew, eb, beta, tnm = np.broadcast_arrays(*[np.asarray(value, dtype=np.float64)
+                                                  for value in (ep, ew, eb, beta, tnm)])
+    b = beta / 1000.  # rad
+    T = 1000. * e0 * (1. + e0 / 1022.12) / (1. + e0 / 511.06)**2  # eV
+    tgt = 1000. * e0 * (1022.12 + e0) / (511.06 + e0)  # eV
+
+    e = np.asarray(energies_eV, dtype=np.float64)
+    # Parameters on the leading axes, energy loss on the last axis.
+    eps, elf, srfelf = drude_loss_functions(e, ep[..., np.newaxis], ew[..., np.newaxis], eb[..., np.newaxis])
     eps1 = np.real(eps)
     eps2 = np.imag(eps)
+    rereps = eps1 / (eps1 * eps1 + eps2 * eps2)
+    volume_factor, surface_factor = drude_angular_factors(e, e0, beta[..., np.newaxis])
+    srfint = surface_factor * srfelf  # probability per eV
+    volint = tnm[..., np.newaxis] * volume_factor * elf  # probability per eV
+    ssd = volint + srfint
+
+    # Integrate over all energy loss
+    Ps = _trapezoid(srfint, e, axis=-1)  # 2 surfaces but includes negative begrenzungs contribn.
+    Pv = _trapezoid(volint, e, axis=-1)  # integrated volume probability
+    lam = tnm / Pv  # does NOT depend on free-electron approximation (no damping).
+    lamfe = 4. * 0.05292 * T / ep / np.log(1.0 + (b * tgt / ep)**2)  # Eq.(3.44) approximation
+
+    return DrudeResults(e, eps1, eps2, elf, srfelf, rereps, ssd, volint, srfint, Ps[()], Pv[()], lam[()], lamfe[()])
+
+
+def drude_loss_functions(energies_eV, ep, ew, eb):
+    """
+    Compute the dielectric function EPS from modified Eq. (3.40), ELF=Im(-1/EPS) from Eq. (3.42)
+    and the surface loss function Im(-4/(1+EPS)) - ELF for 2 surfaces.
+
+    :param energies_eV: energy losses (eV), broadcastable with the parameters.
+    :param ep: plasmon energy (eV).
+    :param ew: plasmon width FWHM (eV).
+    :param eb: binding energy (eV).
+    :return: the complex dielectric function, the energy loss function and the surface loss function.
+    :rtype: tuple
+    """
+    e = energies_eV
+    eps = 1.0 - ep**2 / (e**2 - eb**2 + e * ew * 1.0j)
     # eps1 = 1.0 - ep**2  / (e**2 + ew**2)
     # eps2 = ew * ep**2 / e / (e**2 + ew**2)
     elf = ep**2 * e * ew / ((e**2 - ep**2)**2 + (e * ew)**2)
-    rereps = eps1 / (eps1 * eps1 + eps2 * eps2)
-    the = e / tgt  # varies with energy loss!
     # srfelf = 4..*eps2./((1+eps1).^2+eps2.^2) - elf %equivalent
-    srfelf = np.imag(-4.0 / (1.0 + eps)) - elf # for 2 surfaces
+    srfelf = np.imag(-4.0 / (1.0 + eps)) - elf  # for 2 surfaces
+
+    return eps, elf, srfelf
+
+
+def drude_angular_factors(energies_eV, e0, beta):
+    """
+    Compute the factors converting the loss functions into single scattering probabilities per eV:
+    the volume factor of Eq. (4.26) for a thickness of 1 nm and the surface factor of Eq. (4.31).
+
+    :param energies_eV: positive energy losses (eV), broadcastable with *beta*.
+    :param float e0: incident energy (keV).
+    :param beta: collection semi-angle (mrad).
+    :return: the volume and surface factors.
+    :rtype: tuple
+    """
+    b = np.asarray(beta, dtype=np.float64) / 1000.  # rad
+    T = 1000. * e0 * (1. + e0 / 1022.12) / (1. + e0 / 511.06)**2  # eV
+    tgt = 1000. * e0 * (1022.12 + e0) / (511.06 + e0)  # eV
+    rk0 = 2590. * (1. + e0 / 511.06) * np.sqrt(2. * T / 511060)
+
+    the = energies_eV / tgt  # varies with energy loss!
     angdep = np.arctan(b / the) / the - b / (b * b + the * the)
-    srfint = angdep * srfelf / (3.1416 * 0.0529 * rk0 * T)  # probability per eV
     anglog = np.log(1.0 + b * b / the / the)
-    volint = tnm / 3.1416 / 0.0529 / T / 2. * elf * anglog  # probability per eV
-    ssd = volint + srfint
 
-    # %fprintf(fidssd,['%0.15g %0.15g %0.15g %0.15g \n'], [evolintsrfintssd])
-    # fprintf(fidssd,['%0.15g %0.15g\n'], [essd])
-    # fprintf(fideps,['%0.15g %0.15g %0.15g \n'], [eeps1eps2])
-    # fclose(fidssd)
-    # fclose(fideps)
-    # %fprintf(1,'For Ep(eV) = %f, width(eV) = %f, Eb(eV) = %f, eV/ch = %f \n',ep,ew,eb,epc)
-    # %fprintf(1,'beta(mrad) = %f, E0(keV) = %f, t(nm) = %f, #chan = %f\n',beta,e0,tnm,nn)
-
-    # %Integrate over all energy loss
-    Ps = np.trapz(srfint, e) # 2 surfaces but includes negative begrenzungs contribn.
-    Pv = np.trapz(volint, e) # integrated volume probability
-    lam = tnm / Pv # does NOT depend on free-electron approximation (no damping).
-    lamfe = 4. * 0.05292 * T / ep / np.log(1.0 + (b * tgt / ep)**2)  # Eq.(3.44) approximation
-    logging.info('Ps(2surfaces+begrenzung terms)=%g,Pv=t/lambda(beta)= %g', Ps, Pv)
-    logging.info('Volume-plasmon MFP(nm) = %g, Free-electron MFP(nm) = %f', lam, lamfe)
-    logging.info('--------------------------------')
+    return 1.0 / 3.1416 / 0.0529 / T / 2. * anglog, angdep / (3.1416 * 0.0529 * rk0 * T)
+
+
+def write_drude_files(results, eps_file_path="Drude.eps", ssd_file_path="Drude.ssd"):
+    """
+    Write the Drude spectra of one parameter set in the Egerton (2011) text format.
+
+    The file Drude.ssd contains e,ssd (for use in Flog etc.) and
+    Drude.eps contains e,eps1,eps2 (for use in Kroeger etc.).
+
+    :param DrudeResults results: results of :func:`drude` or one parameter set of :func:`drude_grid`.
+    :param str eps_file_path: path of the dielectric function file, not written if `None`.
+    :param str ssd_file_path: path of the single scattering distribution file, not written if `None`.
+    """
+    if np.ndim(results.ssd) != 1:
+        raise ValueError("Only the results of one parameter set can be written: {}".format(np.shape(results.ssd)))
+
+    if ssd_file_path is not None:
+        np.savetxt(ssd_file_path, np.column_stack((results.energies_eV, results.ssd)), fmt="%0.15g")
 
-    return e, eps1, eps2, elf, srfelf, rereps, ssd, volint, srfint, Ps, Pv, lam, lamfe
+    if eps_file_path is not None:
+        np.savetxt(eps_file_path, np.column_stack((results.energies_eV, results.eps1, results.eps2)), fmt="%0.15g")
 
 
 def plot_figure():
-    energies_eV, eps1, eps2, im_eps, im4_eps, re_eps, probabilities_total, probabilities_volume, probabilities_surface, ps, pv, mfp_volume_nm, mfp_free_nm = drude(
-        15, 3, 0, 0.1, 200, 5, 500, 50)
+    (energies_eV, eps1, eps2, im_eps, im4_eps, re_eps, probabilities_total, probabilities_volume, probabilities_surface,
+     ps, pv, mfp_volume_nm, mfp_free_nm) = drude(15, 3, 0, 0.1, 200, 5, 500, 50)
 
     plt.figure()
     plt.title('Drude dielectric data')
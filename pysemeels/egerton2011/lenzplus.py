@@ -52,6 +52,7 @@ LenzplusResults2 = namedtuple('LenzplusResults2', ['t_lambda_beta'])
 
 LenzplusResults3 = namedtuple('LenzplusResults3', ['p_unscat', 'p_el', 'p_inel', 'p_total', 'I0_I', 'Ii_I', 'lnIt_I0'])
 
+
 def lenz_plus(e0, e, z, beta, toli):
     # Get E0(keV), Ebar(eV), Z, BeTa(mrad)
     logging.info('----------------------------------')  # start input
@@ -60,6 +61,62 @@ def lenz_plus(e0, e, z, beta, toli):
 
     logging.info('E0(keV), Ebar(eV), Z, BeTa(mrad) are: %g, %g, %g, %g', e0, e, z, beta)
 
+    result1, result2, result3_wo_broadening, result3_w_broadening = lenz_plus_grid(e0, e, z, beta, toli)
+
+    logging.info('Theta0 = %0.4E rad \t\t\t\t\t ThetaE = %0.4E rad', result1.theta0_rad, result1.thetae_rad_rad)
+    logging.info('dSe/dOmega = %0.4E nm^2/sr \t\t\t dSi/dOmega = %0.4E nm^2/sr', result1.dse_domega,
+                 result1.dsi_domega)
+    logging.info('dSe/dBeta = %0.4E nm^2/rad \t\t\t dSi/dBeta = %0.4E nm^2/rad', result1.dse_dbeta, result1.dsi_dbeta)
+    logging.info('Sigma(elastic) = %0.4E nm^2 \t\t\t Sigma(inelastic) = %0.4E nm^2', result1.sigma_elastic_nm2,
+                 result1.sigma_inelastic_nm2)
+    logging.info('F(elastic) = %0.4E \t\t\t\t\t F(inelastic) = %0.4E', result1.f_elastic, result1.f_inelastic)
+    logging.info('total-inelastic/total-elastic ratio = %0.4E', result1.total_inelastic_elastic_ratio)
+
+    # Get t/lambdaI
+    if toli != 0:
+        logging.info('t/lambda(beta)= %0.4E', result2.t_lambda_beta)
+
+        result3 = result3_wo_broadening
+        logging.info('p(unscat) = %0.4E \t\t P(el) = %0.4E neglecting elastic broadening', result3.p_unscat,
+                     result3.p_el)
+        logging.info('p(inel) = %0.4E \t\t\t P(in+el) = %0.4E neglecting inelastic broadening', result3.p_inel,
+                     result3.p_total)
+        logging.info('I0/I = %0.4E \t\t\t\t Ii/I = %0.4E neglecting angular broadening', result3.I0_I, result3.Ii_I)
+        logging.info('ln(It/I0) = %0.4E without broadening', result3.lnIt_I0)
+
+        result3 = result3_w_broadening
+        logging.info('P(unscat) = %0.4E \t\t P(el only) = %0.4E with elastic broadening', result3.p_unscat,
+                     result3.p_el)
+        # ang distrib of inel+el taken same as broadened elastic
+        logging.info('P(inel only) = %0.4E \t\t P(in+el) = %0.4E with inelastic broadening', result3.p_inel,
+                     result3.p_total)
+        logging.info('I0/I = %0.4E \t\t\t\t Ii/I = %0.4E with angular broadening', result3.I0_I, result3.Ii_I)
+        logging.info('ln(It/I0) = %0.4E with angular broadening', result3.lnIt_I0)
+
+    return result1, result2, result3_wo_broadening, result3_w_broadening
+
+
+def lenz_plus_grid(e0, e, z, beta, toli):
+    """
+    Compute the results of :func:`lenz_plus` for many cases at once, without logging.
+
+    All parameters can be scalars or arrays broadcastable together, e.g. ``z[:, np.newaxis, np.newaxis]``,
+    ``e0[np.newaxis, :, np.newaxis]`` and ``beta[np.newaxis, np.newaxis, :]`` for a table of collection efficiency
+    by element, incident energy and aperture.
+
+    :param e0: incident energy (keV).
+    :param e: mean energy loss (eV), 6.75 Z eV when 0.
+    :param z: atomic number.
+    :param beta: collection semi-angle (mrad).
+    :param toli: thickness over the total inelastic mean free path.
+    :return: :class:`LenzplusResults`, :class:`LenzplusResults2` and :class:`LenzplusResults3` without and with
+        angular broadening, each field being an array of the broadcast shape.
+    :rtype: tuple
+    """
+    e0, e, z, beta, toli = np.broadcast_arrays(*[np.asarray(value, dtype=np.float64)
+                                                 for value in (e0, e, z, beta, toli)])
+    e = np.where(e == 0, 6.75 * z, e)
+
     gt = 500 * e0 * (1022 + e0) / (511 + e0)
     te = e / 2 / gt
     a0 = .0529
@@ -69,7 +126,6 @@ def lenz_plus(e0, e, z, beta, toli):
     coeff = 4 * gm * gm * z / a0 / a0 / k0 ** 4
     r0 = .0529 / z ** .3333  # units of nm
     t0 = 1 / k0 / r0
-    logging.info('Theta0 = %0.4E rad \t\t\t\t\t ThetaE = %0.4E rad', t0, te)
     b = beta / 1000
     b2 = b * b
     te2 = te * te
@@ -91,64 +147,60 @@ def lenz_plus(e0, e, z, beta, toli):
     selim = 4 * 3.142 * gm * gm * z ** 1.333 / k0 / k0  # asymptotic elastic
     f1e = 1 / (1 + t02 / b2)
     sigel = f1e * selim
-
-    logging.info('dSe/dOmega = %0.4E nm^2/sr \t\t\t dSi/dOmega = %0.4E nm^2/sr', dsedom, dsidom)
-    logging.info('dSe/dBeta = %0.4E nm^2/rad \t\t\t dSi/dBeta = %0.4E nm^2/rad', dsedb, dsidb)
-    logging.info('Sigma(elastic) = %0.4E nm^2 \t\t\t Sigma(inelastic) = %0.4E nm^2', sigel, sigin)
-    logging.info('F(elastic) = %0.4E \t\t\t\t\t F(inelastic) = %0.4E', f1e, f1i)
     nu = silim / selim
-    logging.info('total-inelastic/total-elastic ratio = %0.4E', nu)
 
-    result1 = LenzplusResults(t0, te, dsedom, dsidom, dsedb, dsidb, sigel, sigin, f1e, f1i, nu)
+    result1 = LenzplusResults(t0[()], te[()], dsedom[()], dsidom[()], dsedb[()], dsidb[()], sigel[()], sigin[()],
+                              f1e[()], f1i[()], nu[()])
+
+    # t/lambdaI
+    tole = toli / nu
+    xe = np.exp(-tole)
+    xi = np.exp(-toli)
+    fie = f1e * f1i
+    pun = xe * xi
+    pel = (1 - xe) * xi * f1e
+    pz = pun + pel
+    pin = xe * (1 - xi) * f1i
+    pie = (1 - xi) * (1 - xe) * fie
+    pi = pin + pie
+    pt = pz + pi
+    lr = np.log(pt / pz)
+
+    result3_wo_broadening = LenzplusResults3(pun[()], pel[()], pin[()], pie[()], pz[()], pi[()], lr[()])
+
+    f2e = 1 / (1 + 1.7 ** 2 * t02 / b2)
+    f3e = 1 / (1 + 2.2 ** 2 * t02 / b2)
+    f4e = 1 / (1 + 2.7 ** 2 * t02 / b2)
+    pe = xe * (tole * f1e + tole ** 2 * f2e / 2 + tole ** 3 * f3e / 6 + tole ** 4 * f4e / 24)
+    peni = pe * xi
+    pu = xi * xe
+    rz = pu + peni  # unscattered and el/no-inel compts.
+    # pel=xi*xe*(np.exp(tole*f1e)-1) #not used
+    # pz=pun+pel #not used
+    pi = xi * (np.exp(toli * f1i) - 1)
+    pine = xe * pi
+    pie = pi * pe
+    ri = pine + pie  # ang distrib of inel+el taken same as broadened elastic
+    rt = rz + ri
+    lr = np.log(rt / rz)
+
+    result3_w_broadening = LenzplusResults3(pu[()], peni[()], pine[()], pie[()], rz[()], ri[()], lr[()])
+
+    result2 = LenzplusResults2((toli * f1i)[()])
 
-    # Get t/lambdaI
-    if toli != 0:
-        logging.info('t/lambda(beta)= %0.4E', toli * f1i)
-
-        tole = toli / nu
-        xe = np.exp(-tole)
-        xi = np.exp(-toli)
-        fie = f1e * f1i
-        pun = xe * xi
-        pel = (1 - xe) * xi * f1e
-        pz = pun + pel
-        pin = xe * (1 - xi) * f1i
-        pie = (1 - xi) * (1 - xe) * fie
-        pi = pin + pie
-
-        logging.info('p(unscat) = %0.4E \t\t P(el) = %0.4E neglecting elastic broadening', pun, pel)
-        logging.info('p(inel) = %0.4E \t\t\t P(in+el) = %0.4E neglecting inelastic broadening', pin, pie)
-        logging.info('I0/I = %0.4E \t\t\t\t Ii/I = %0.4E neglecting angular broadening', pz, pi)
-        pt = pz + pi
-        lr = np.log(pt / pz)
-        logging.info('ln(It/I0) = %0.4E without broadening', lr)
-
-        result3_wo_broadening = LenzplusResults3(pun, pel, pin, pie, pz, pi, lr)
-
-        f2e = 1 / (1 + 1.7 ** 2 * t02 / b2)
-        f3e = 1 / (1 + 2.2 ** 2 * t02 / b2)
-        f4e = 1 / (1 + 2.7 ** 2 * t02 / b2)
-        pe = xe * (tole * f1e + tole ** 2 * f2e / 2 + tole ** 3 * f3e / 6 + tole ** 4 * f4e / 24)
-        peni = pe * xi
-        pu = xi * xe
-        rz = pu + peni  # unscattered and el/no-inel compts.
-        # pel=xi*xe*(np.exp(tole*f1e)-1) #not used
-        # pz=pun+pel #not used
-        pi = xi * (np.exp(toli * f1i) - 1)
-        pine = xe * pi
-        pie = pi * pe
-        ri = pine + pie
-
-        logging.info('P(unscat) = %0.4E \t\t P(el only) = %0.4E with elastic broadening', pu, peni)
-        # ang distrib of inel+el taken same as broadened elastic
-        logging.info('P(inel only) = %0.4E \t\t P(in+el) = %0.4E with inelastic broadening', pine, pie)
-        logging.info('I0/I = %0.4E \t\t\t\t Ii/I = %0.4E with angular broadening', rz, ri)
-        rt = rz + ri
-        lr = np.log(rt / rz)
-        logging.info('ln(It/I0) = %0.4E with angular broadening', lr)
+    return result1, result2, result3_wo_broadening, result3_w_broadening
 
-        result3_w_broadening = LenzplusResults3(pu, peni, pine, pie, rz, ri, lr)
 
-        result2 = LenzplusResults2(toli * f1i)
+def to_structured_array(results):
+    """
+    Convert results of :func:`lenz_plus_grid` into a structured array with one field per result field.
 
-    return result1, result2, result3_wo_broadening, result3_w_broadening
+    :param results: a :class:`LenzplusResults`, :class:`LenzplusResults2` or :class:`LenzplusResults3`.
+    :return: structured array of the broadcast shape.
+    """
+    values = np.broadcast_arrays(*results)
+    array = np.empty(values[0].shape, dtype=[(field, np.float64) for field in results._fields])
+    for field, value in zip(results._fields, values):
+        array[field] = value
+
+    return array
@@ -30,7 +30,9 @@ Version 10.11.26
 ###############################################################################
 
 # Standard library modules.
+from functools import lru_cache
 import logging
+import math
 
 # Third party modules.
 import numpy as np
@@ -41,6 +43,12 @@ import matplotlib.pyplot as plt
 # Project modules.
 
 # Globals and constants variables.
+#: Number of scattering orders summed for each channel.
+NUMBER_ORDERS = 15
+#: Number of spectra computed together by :py:func:`spec_gen_batch`, bounds the size of the intermediate arrays of
+#: shape (order, spectrum, channel).
+SPECTRA_CHUNK_SIZE = 64
+
 
 def spec_gen(ep, wp, wz, ez, epc, a0, tol, nd, back, fback, cpe):
 
@@ -68,7 +76,6 @@ def spec_gen(ep, wp, wz, ez, epc, a0, tol, nd, back, fback, cpe):
     logging.info('instrumental noise/background (e.g. 0.1): %g', fback)
     logging.info('spectral total_spectra per beam electron (e.g. 0.1): %g', cpe)
 
-
     logging.info('-------------------------------\n')
     fpoiss = cpe ** 0.5
     sz = wz/1.665  # convert from FWHM to standard deviation
@@ -113,6 +120,144 @@ def spec_gen(ep, wp, wz, ez, epc, a0, tol, nd, back, fback, cpe):
 
     return eout, outssd, outpsd
 
+
+@lru_cache(maxsize=8)
+def _compatibility_random_numbers(nd):
+    """
+    Compute the pseudo-random numbers of :py:func:`spec_gen` used for the noise of each channel.
+
+    The sequence does not depend on the spectrum parameters, only on the number of channels, so it is computed once
+    with the same scalar arithmetic as :py:func:`spec_gen`.
+
+    :param int nd: number of channels.
+    :return: the random numbers of the first and last scattering orders of each channel, read-only.
+    :rtype: tuple
+    """
+    random_numbers = np.empty(nd * NUMBER_ORDERS)
+    rlnum = 1.23456
+    for index in range(len(random_numbers)):
+        rndnum = 2 * (float(math.trunc(rlnum)) - rlnum)
+        random_numbers[index] = rndnum
+        rlnum = 9.8765 * rndnum
+
+    random_numbers = random_numbers.reshape(nd, NUMBER_ORDERS)
+    first_order_numbers = random_numbers[:, 1].copy()
+    last_order_numbers = random_numbers[:, -1].copy()
+    first_order_numbers.flags.writeable = False
+    last_order_numbers.flags.writeable = False
+
+    return first_order_numbers, last_order_numbers
+
+
+def _scattering_distributions(eout, ep, wp, tol, sz, hz):
+    """
+    Compute the noiseless single and plural scattering distributions of a chunk of spectra.
+
+    :param eout: energy losses (nd,).
+    :param ep: plasmon energies of the spectra (n_spectra,).
+    :param wp: plasmon FWHM of the spectra (n_spectra,).
+    :param tol: t/lambda of the spectra (n_spectra,).
+    :param float sz: standard deviation of the zero-loss peak.
+    :param float hz: height of the zero-loss peak.
+    :return: the single (n_spectra, nd) and plural (n_spectra, nd) scattering distributions.
+    :rtype: tuple
+    """
+    ep = ep[np.newaxis, :, np.newaxis]
+    wp = wp[np.newaxis, :, np.newaxis]
+    tol = tol[np.newaxis, :, np.newaxis]
+    sp = wp/1.665
+
+    # Arrays of shape (order, spectrum, channel), the sum over the first axis is done in the order of spec_gen.
+    orders = np.arange(NUMBER_ORDERS).reshape(-1, 1, 1)
+    factorials = np.array([float(math.factorial(order)) for order in range(NUMBER_ORDERS)]).reshape(-1, 1, 1)
+    e = eout[np.newaxis, np.newaxis, :]
+
+    # The operations are done in place on the largest array, the results equal spec_gen up to rounding.
+    sn = np.sqrt(sz*sz+orders*sp*sp)
+    xpnt = e - orders*ep
+    np.square(xpnt, out=xpnt)
+    xpnt /= sn*sn
+    is_negligible = xpnt > 20.0
+    np.negative(xpnt, out=xpnt)
+    dne = np.exp(xpnt, out=xpnt)
+    dne[is_negligible] = 0.0
+    dne *= hz*sz/sn/factorials*tol**orders
+    psd = np.add.reduce(dne, axis=0)
+
+    return dne[1], psd
+
+
+def spec_gen_batch(ep, wp, wz, ez, epc, a0, tol, nd, back, fback, cpe, random_state=None,
+                   chunk_size=SPECTRA_CHUNK_SIZE):
+    """
+    Generate many plural-scattering spectra at once with array operations over the spectra, orders and channels.
+
+    The parameters are the same as :py:func:`spec_gen`; `ep`, `wp` and `tol` can be arrays which are broadcast
+    together, one spectrum for each element.
+
+    :param random_state: random numbers generator, :py:class:`numpy.random.RandomState` or
+        :py:class:`numpy.random.Generator`, used for the noise. If None, the pseudo-random sequence of
+        :py:func:`spec_gen` is reproduced and each spectrum is the same as :py:func:`spec_gen` with its parameters.
+    :param int chunk_size: number of spectra computed together, the intermediate arrays have
+        :py:data:`NUMBER_ORDERS` x `chunk_size` x `nd` elements. The spectra do not depend on the chunk size.
+    :return: the energy losses (nd,), the single (n_spectra, nd) and plural (n_spectra, nd) scattering distributions.
+    :rtype: tuple
+    """
+    ep, wp, tol = np.broadcast_arrays(np.atleast_1d(np.asarray(ep, dtype=np.float64)),
+                                      np.atleast_1d(np.asarray(wp, dtype=np.float64)),
+                                      np.atleast_1d(np.asarray(tol, dtype=np.float64)))
+    ep = ep.ravel()
+    wp = wp.ravel()
+    tol = tol.ravel()
+    number_spectra = len(ep)
+
+    fpoiss = cpe ** 0.5
+    sz = wz/1.665  # convert from FWHM to standard deviation
+    hz = a0/sz/1.772  # height of ZLP (epc* removed)
+
+    eout = np.arange(1, nd + 1) * epc - ez
+
+    if random_state is None:
+        first_order_numbers, last_order_numbers = _compatibility_random_numbers(nd)
+        first_order_numbers = np.broadcast_to(first_order_numbers, (number_spectra, nd))
+        last_order_numbers = np.broadcast_to(last_order_numbers, (number_spectra, nd))
+    else:
+        first_order_numbers = random_state.uniform(-2.0, 2.0, (number_spectra, nd))
+        last_order_numbers = random_state.uniform(-2.0, 2.0, (number_spectra, nd))
+
+    outssd = np.empty((number_spectra, nd))
+    outpsd = np.empty((number_spectra, nd))
+
+    chunk_size = max(1, chunk_size)
+    for start_id in range(0, number_spectra, chunk_size):
+        chunk = slice(start_id, start_id + chunk_size)
+        ssd, psd = _scattering_distributions(eout, ep[chunk], wp[chunk], tol[chunk], sz, hz)
+
+        bnoise = fback*back*first_order_numbers[chunk]
+        snoise = fpoiss*(np.sqrt(ssd)*first_order_numbers[chunk])
+        outssd[chunk] = ssd + np.sqrt(snoise*snoise+bnoise*bnoise) + back
+
+        snoise = fpoiss*(np.sqrt(psd)*last_order_numbers[chunk])
+        outpsd[chunk] = psd + np.sqrt(snoise*snoise+bnoise*bnoise)+back
+
+    return eout, outssd, outpsd
+
+
+def spec_gen_vectorized(ep, wp, wz, ez, epc, a0, tol, nd, back, fback, cpe, random_state=None):
+    """
+    Generate a plural-scattering spectrum like :py:func:`spec_gen` with array operations instead of loops over the
+    channels and orders.
+
+    :param random_state: random numbers generator used for the noise, the pseudo-random sequence of
+        :py:func:`spec_gen` is reproduced if None.
+    :return: the energy losses, the single and plural scattering distributions.
+    :rtype: tuple
+    """
+    eout, outssd, outpsd = spec_gen_batch(ep, wp, wz, ez, epc, a0, tol, nd, back, fback, cpe, random_state)
+
+    return eout, outssd[0], outpsd[0]
+
+
 def create_figure(eout, outssd, outpsd):
     plt.figure()
     plt.plot(eout, outssd, 'b', label='SSD')
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeels.hdf5_storage
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Storage options (chunking, compression and data type) of the HDF5 datasets.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import logging
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+
+# Globals and constants variables.
+
+
+class Hdf5StorageOptions(object):
+    """
+    Storage options of the HDF5 datasets.
+
+    The default options create contiguous, uncompressed datasets with the data type of the data, i.e. the default
+    behavior of :py:meth:`h5py.Group.create_dataset`.
+
+    .. note::
+        A project with many small chunked datasets should be created with `h5py.File(..., libver='latest')`, the
+        chunk index of the older file format adds a few kB per dataset.
+    """
+    def __init__(self, compression=None, compression_level=None, shuffle=False, chunks=None, counts_dtype=None,
+                 float_dtype=None):
+        """
+
+        :param str compression: compression filter: None, "gzip" or "lzf".
+        :param int compression_level: gzip compression level (0 to 9).
+        :param bool shuffle: use the shuffle filter, which improves the compression of integer and float data.
+        :param chunks: chunk shape, True for a shape selected by h5py, or None for contiguous storage when no filter is
+            used.
+        :param counts_dtype: data type of the count datasets, e.g. `np.uint16` like the detector produces. The counts
+            are only converted if all values are integers in the range of the data type.
+        :param float_dtype: data type of the floating point datasets, e.g. `np.float32` to halve the storage.
+        """
+        self.compression = compression
+        self.compression_level = compression_level
+        self.shuffle = shuffle
+        self.chunks = chunks
+        self.counts_dtype = counts_dtype
+        self.float_dtype = float_dtype
+
+    def dataset_kwargs(self):
+        """
+        Return the keyword arguments for :py:meth:`h5py.Group.create_dataset`.
+
+        :rtype: dict
+        """
+        kwargs = {}
+
+        if self.compression is not None:
+            kwargs["compression"] = self.compression
+            if self.compression_level is not None and self.compression == "gzip":
+                kwargs["compression_opts"] = self.compression_level
+        if self.shuffle:
+            kwargs["shuffle"] = True
+        if self.chunks is not None:
+            kwargs["chunks"] = self.chunks
+
+        return kwargs
+
+    def convert_counts(self, data):
+        """
+        Convert the counts to `counts_dtype` if the conversion is lossless.
+
+        :param data: counts to convert.
+        :return: the converted counts or the original counts.
+        """
+        data = np.asarray(data)
+        if self.counts_dtype is None or data.size == 0:
+            return data
+
+        info = np.iinfo(self.counts_dtype)
+        if np.issubdtype(data.dtype, np.floating) and not np.all(np.isfinite(data)):
+            logging.warning("Counts are not converted to %s: not finite values", np.dtype(self.counts_dtype).name)
+            return data
+        if data.min() < info.min or data.max() > info.max or not np.array_equal(data, np.round(data)):
+            logging.warning("Counts are not converted to %s: values out of range or not integers",
+                            np.dtype(self.counts_dtype).name)
+            return data
+
+        return data.astype(self.counts_dtype)
+
+    def convert_floats(self, data):
+        """
+        Convert the floating point data to `float_dtype`.
+
+        :param data: data to convert.
+        :return: the converted data or the original data if it is not floating point data.
+        """
+        data = np.asarray(data)
+        if self.float_dtype is None or not np.issubdtype(data.dtype, np.floating):
+            return data
+
+        return data.astype(self.float_dtype)
+
+
+#: Compressed storage for archive projects: gzip with shuffle filter and counts stored as uint16.
+ARCHIVE_STORAGE_OPTIONS = Hdf5StorageOptions(compression="gzip", compression_level=4, shuffle=True,
+                                             counts_dtype=np.uint16)
+
+#: Fast compressed storage: lzf with shuffle filter and counts stored as uint16.
+FAST_STORAGE_OPTIONS = Hdf5StorageOptions(compression="lzf", shuffle=True, counts_dtype=np.uint16)
+
+
+#: Compressed storage of spectrum images: gzip with shuffle filter, the counts keep their data type.
+SPECTRUM_IMAGE_STORAGE_OPTIONS = Hdf5StorageOptions(compression="gzip", compression_level=4, shuffle=True)
+
+#: Compressed storage of the micrographs: gzip with shuffle filter, the pixels keep their data type.
+MICROGRAPH_STORAGE_OPTIONS = Hdf5StorageOptions(compression="gzip", compression_level=4, shuffle=True)
+
+#: Target size in bytes of a chunk of a spectrum image.
+SPECTRUM_IMAGE_CHUNK_SIZE_B = 256 * 1024
+#: Maximum number of channels in a chunk of a spectrum image.
+SPECTRUM_IMAGE_CHUNK_CHANNELS = 64
+
+
+def spectrum_image_chunks(shape, itemsize, chunk_size_B=SPECTRUM_IMAGE_CHUNK_SIZE_B,
+                          chunk_channels=SPECTRUM_IMAGE_CHUNK_CHANNELS):
+    """
+    Compute the chunk shape of a spectrum image dataset, e.g. a (rows, columns, channels) map or a (points, channels)
+    linescan.
+
+    A chunk is a tile of pixels with a block of channels. The spectrum of a pixel is read from
+    n_channels / chunk_channels chunks and the image at one energy from the tiles covering the image, so neither
+    access reads the whole dataset.
+
+    :param tuple shape: shape of the dataset, the last axis is the channels.
+    :param int itemsize: size in bytes of a value.
+    :param int chunk_size_B: target size in bytes of a chunk.
+    :param int chunk_channels: maximum number of channels in a chunk.
+    :return: the chunk shape.
+    :rtype: tuple
+    """
+    *spatial_shape, number_channels = shape
+    channels = max(1, min(number_channels, chunk_channels))
+
+    number_pixels = max(1, chunk_size_B // (channels * itemsize))
+    if spatial_shape:
+        tile_size = max(1, int(number_pixels ** (1.0 / len(spatial_shape))))
+    else:
+        tile_size = 1
+
+    return tuple(max(1, min(size, tile_size)) for size in spatial_shape) + (channels,)
+
+
+def create_dataset(group, name, data, storage_options=None, is_counts=False, chunks=None):
+    """
+    Create a dataset with the storage options.
+
+    :param `h5py.group` group: group where the dataset is created.
+    :param str name: name of the dataset.
+    :param data: data of the dataset.
+    :param storage_options: storage options, the h5py default storage if None.
+    :type storage_options: :py:class:`Hdf5StorageOptions`
+    :param bool is_counts: use the count data type policy instead of the floating point data type policy.
+    :param tuple chunks: chunk shape used instead of the chunks of the storage options.
+    :return: the new dataset.
+    """
+    if storage_options is None or np.ndim(data) == 0:
+        if chunks is not None and np.ndim(data) > 0:
+            return group.create_dataset(name, data=data, chunks=chunks)
+        return group.create_dataset(name, data=data)
+
+    if is_counts:
+        data = storage_options.convert_counts(data)
+    else:
+        data = storage_options.convert_floats(data)
+
+    kwargs = storage_options.dataset_kwargs()
+    if chunks is not None:
+        kwargs["chunks"] = chunks
+
+    return group.create_dataset(name, data=data, **kwargs)
@@ -27,6 +27,8 @@ Read elv file.
 
 # Standard library modules.
 import csv
+import io
+import functools
 
 # Third party modules.
 import numpy as np
@@ -37,24 +39,108 @@ import pySpectrumFileFormat.emmff.emsa as emsa
 # Project modules.
 from pysemeels.tools.hdf5_file_labels import *
 from pysemeels.hitachi.eels_su import UnitError
+from pysemeels.corrected_counts import CorrectedCountsMixin, counts_input_property
 
 # Globals and constants variables.
-
-
-class SpectrumData():
+#: Number of channels of the spectrum, gain correction and dark current data blocks.
+NUMBER_CHANNELS = 1024
+
+
+def _float_with_unit(unit_ref, label):
+    def converter(value):
+        value, unit = float(value[:-2]), value[-2:]
+        if unit != unit_ref:
+            raise UnitError("{} unit is not {}: {}".format(label, unit_ref, unit))
+        return value
+
+    return converter
+
+
+def _dose(value):
+    value, unit = float(value[:-2]), value[-2:]
+    if unit == "ms":
+        value = value * 1.0e3
+    if unit != "µs" and unit != "ms":
+        raise UnitError("Dose is not µs: {}".format(unit))
+    return value
+
+
+#: Header keywords of the .elv file: (keyword, exact match, attribute name, converter).
+_HEADER_KEYWORDS = (("date", False, "date", str),
+                    ("Time", False, "time", str),
+                    ("comment", False, "comment", str),
+                    ("dose", False, "dose", _dose),
+                    ("Energy Window Width", False, "energy_width", _float_with_unit("eV", "Energy width")),
+                    ("center", False, "dual_det_center", _float_with_unit("ch", "Dual det. center")),
+                    ("Q1", True, "q1", int),
+                    ("Q1S", True, "q1s", int),
+                    ("Q2", True, "q2", int),
+                    ("Q2S", True, "q2s", int),
+                    ("Q3", True, "q3", int),
+                    ("H1", True, "h1", int),
+                    ("H1S", True, "h1s", int),
+                    ("H2", True, "h2", int),
+                    ("H2S", True, "h2s", int),
+                    ("H4", True, "h4", int),
+                    ("ELV-x", False, "elv_x", int),
+                    ("ELV-y", False, "elv_y", int),
+                    ("Spectrum align-x", False, "spectrum_alignment_x", int),
+                    ("Spectrum align-y", False, "spectrum_alignment_y", int),
+                    ("DET alignment-x(spec.)", False, "det_spec_alignment_x", int),
+                    ("DET alignment-y(spec.)", False, "det_spec_alignment_y", int),
+                    ("DET alignment-x(map)", False, "det_map_alignment_x", int),
+                    ("DET alignment-y(map)", False, "det_map_alignment_y", int),
+                    ("Mag", False, "mag", int))
+
+#: Keywords of the header line with many settings separated by commas.
+_SETTING_KEYWORDS = (("LE", False, "le", _float_with_unit("eV", "Energy loss")),
+                     ("Raw", False, "raw", float),
+                     ("Dual det. position", False, "dual_det_position", _float_with_unit("ch", "Dual det. position")),
+                     ("post", False, "dual_det_post", _float_with_unit("ch", "Dual det. post")))
+
+
+@functools.lru_cache(maxsize=None)
+def _find_header_keyword(keyword, header_keywords=None):
+    """
+    Return the attribute name and converter of a header keyword, or (None, None) if the keyword is unknown.
+
+    The results are cached, so the keyword table is only searched once per distinct keyword.
+    """
+    if header_keywords is None:
+        header_keywords = _HEADER_KEYWORDS
+
+    for keyword_ref, exact_match, attribute_name, converter in header_keywords:
+        if (exact_match and keyword == keyword_ref) or (not exact_match and keyword.startswith(keyword_ref)):
+            return attribute_name, converter
+
+    return None, None
+
+
+def _is_data_line(line):
+    """
+    Return True if the line starts with a number, i.e. a line of the spectrum or calibration data blocks.
+    """
+    try:
+        float(line.split(',', 1)[0])
+    except ValueError:
+        return False
+
+    return True
+
+
+class SpectrumData(CorrectedCountsMixin):
     def __init__(self):
         self.energies_eV = []
         self.raw_counts = []
         self.gain_corrections = []
         self.dark_currents = []
 
-    @property
-    def counts(self):
-        corrected_counts = (np.array(self.raw_counts) - np.array(self.dark_currents)) / np.array(self.gain_corrections)
-        return corrected_counts
+    raw_counts = counts_input_property("raw_counts")
+    gain_corrections = counts_input_property("gain_corrections")
+    dark_currents = counts_input_property("dark_currents")
 
 
-class ElvFile():
+class ElvFile(CorrectedCountsMixin):
     energy_windows_eV = [7, 15, 30, 60]
     segments_channel = {"PreL": (300, 300+133),
                         "PreH": (443, 433+133),
@@ -67,7 +153,23 @@ class ElvFile():
         self.gain_corrections = []
         self.dark_currents = []
 
-    def read(self, file):
+    raw_counts = counts_input_property("raw_counts")
+    gain_corrections = counts_input_property("gain_corrections")
+    dark_currents = counts_input_property("dark_currents")
+
+    def read(self, file, fast=False):
+        """
+        Read the .elv file.
+
+        :param file: opened .elv text file.
+        :param bool fast: if True, parse the header with a keyword dispatch table and load the data blocks in bulk as
+            numpy arrays, see :py:meth:`read_fast`.
+        :return: None.
+        """
+        if fast:
+            self.read_fast(file)
+            return
+
         lines = file.readlines()
 
         self.energies_eV = []
@@ -194,6 +296,94 @@ class ElvFile():
                 except ValueError:
                     pass
 
+    def read_fast(self, file):
+        """
+        Read the .elv file with a keyword dispatch table for the header and bulk numpy conversion of the data blocks.
+
+        The header ends with the last line containing a `=`, each header line is dispatched with
+        :py:data:`_HEADER_KEYWORDS`. The spectrum (energy, count) block and the gain correction and dark current block
+        are each converted with one call to numpy. The data attributes are numpy arrays instead of lists:
+        `energies_eV`, `gain_corrections` and `dark_currents` are float64 and `raw_counts` is int64.
+
+        If a data line cannot be converted, the file is parsed again with the legacy line by line parser to keep the
+        same results.
+
+        :param file: opened .elv text file.
+        :return: None.
+        """
+        text = file.read()
+
+        header_end = text.find('\n', text.rfind('=')) + 1
+        if header_end == 0:
+            header_end = len(text)
+
+        data_lines = []
+        for line in text[:header_end].splitlines():
+            if '=' in line:
+                self._read_header_line(line)
+            else:
+                data_lines.append(line)
+        data_lines.extend(text[header_end:].splitlines())
+
+        spectrum_lines = [line for line in data_lines if ',' in line]
+        calibration_lines = [line for line in data_lines if line and ',' not in line]
+
+        try:
+            items = ",".join(spectrum_lines).split(',')
+            if len(items) != 2 * len(spectrum_lines):
+                raise ValueError("Spectrum lines do not have two columns")
+            energies_eV = np.array(items[0::2], dtype=np.float64)
+            raw_counts = np.array(items[1::2], dtype=np.int64)
+            calibrations = np.array(calibration_lines, dtype=np.float64)
+        except ValueError:
+            self.read(io.StringIO(text))
+            energies_eV = np.array(self.energies_eV, dtype=np.float64)
+            raw_counts = np.array(self.raw_counts, dtype=np.int64)
+            calibrations = np.concatenate((np.array(self.gain_corrections, dtype=np.float64),
+                                           np.array(self.dark_currents, dtype=np.float64)))
+
+        self.energies_eV = energies_eV
+        self.raw_counts = raw_counts
+        self.gain_corrections = calibrations[:NUMBER_CHANNELS]
+        self.dark_currents = calibrations[NUMBER_CHANNELS:]
+
+    def read_header(self, file):
+        """
+        Read only the header parameters of the .elv file, the file is read line by line up to the first data line.
+
+        The data attributes are not changed. This is used to catalog many files, only the first kB of each file are
+        read.
+
+        :param file: opened .elv text file.
+        :return: None.
+        """
+        for line in file:
+            if '=' in line:
+                self._read_header_line(line)
+            elif _is_data_line(line):
+                break
+
+    def _read_header_line(self, line):
+        try:
+            keyword, value = line.split('=')
+
+            attribute_name, converter = _find_header_keyword(keyword)
+            if attribute_name is not None:
+                setattr(self, attribute_name, converter(value.strip()))
+        except ValueError:
+            for item in line.split(','):
+                try:
+                    keyword, value = item.strip().split('=')
+                except ValueError:
+                    continue
+
+                attribute_name, converter = _find_header_keyword(keyword, _SETTING_KEYWORDS)
+                if attribute_name is not None:
+                    try:
+                        setattr(self, attribute_name, converter(value.strip()))
+                    except ValueError:
+                        pass
+
     def get_spectrum_data(self):
         spectrum_data = SpectrumData()
         spectrum_data.energies_eV = self.energies_eV
@@ -267,12 +457,6 @@ class ElvFile():
 
         return _parameters
 
-    @property
-    def counts(self):
-        corrected_counts = (np.array(self.raw_counts) - np.array(self.dark_currents)) / np.array(
-            self.gain_corrections)
-        return corrected_counts
-
 
 def plot_spectrum():
     import matplotlib.pyplot as plt
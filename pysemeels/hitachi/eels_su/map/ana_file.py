@@ -26,6 +26,8 @@ Read elv file.
 ###############################################################################
 
 # Standard library modules.
+import io
+import itertools
 
 # Third party modules.
 import h5py
@@ -44,6 +46,62 @@ class Spectrum(object):
         self.counts = []
 
 
+def _parse_block(lines, number_columns):
+    """
+    Convert the CSV lines of a data block to an array with one call to numpy.
+
+    :param list lines: data lines of the block, energy followed by the counts of each point.
+    :param int number_columns: number of values on each line.
+    :return: the block values, shape (number of lines, number of columns).
+    :raise ValueError: if a line does not have the number of columns or a value is not a number.
+    """
+    block = np.loadtxt(io.StringIO("\n".join(lines)), delimiter=',', ndmin=2)
+    if block.shape[1] != number_columns:
+        raise ValueError("Data lines have {:d} columns instead of {:d}".format(block.shape[1], number_columns))
+
+    return block
+
+
+def _is_data_line(line):
+    """
+    Return True if the line starts with a number, i.e. a line of the total spectra or raw data blocks.
+    """
+    try:
+        float(line.split(',', 1)[0])
+    except ValueError:
+        return False
+
+    return True
+
+
+def _as_lines(line):
+    """
+    Return the line in a list to put it back in front of a file iterator, an empty list if None.
+    """
+    return [] if line is None else [line]
+
+
+def _iter_block_lines(lines):
+    """
+    Group the data lines after the header in blocks separated by the "raw data" lines.
+
+    :param lines: iterable over the data lines.
+    :return: generator of (block id, data lines of the block), the block id of the total spectra is -1.
+    """
+    block_id = -1
+    block_lines = []
+    for line in lines:
+        if ',' in line:
+            block_lines.append(line.rstrip())
+
+        if line.startswith("raw data"):
+            yield block_id, block_lines
+            block_id += 1
+            block_lines = []
+
+    yield block_id, block_lines
+
+
 class AnaFile(object):
     def __init__(self):
         self.energies_eV = []
@@ -52,7 +110,21 @@ class AnaFile(object):
         self.spectra = {}
         self.spectrum_id = None
 
-    def read(self, file):
+        #: Raw data blocks of the dense parser, shape (n_blocks, n_points, n_channels).
+        self.raw_spectra = None
+
+    def read(self, file, dense=False):
+        """
+        Read the .ana file.
+
+        :param file: opened .ana text file.
+        :param bool dense: use :py:meth:`read_dense` instead of the dictionaries of :py:class:`Spectrum`.
+        :return: None.
+        """
+        if dense:
+            self.read_dense(file)
+            return
+
         extracting_header_data = True
 
         lines = file.readlines()
@@ -77,6 +149,142 @@ class AnaFile(object):
 
         self.total_spectra = total_spectra
 
+    def read_dense(self, file):
+        """
+        Read the .ana file in preallocated arrays instead of the dictionaries of :py:class:`Spectrum`.
+
+        The energy axis is stored once in `energies_eV`, the total spectra in `total_spectra` with shape
+        (n_points, n_channels) and the raw data blocks in `raw_spectra` with shape (n_blocks, n_points, n_channels).
+        Each data block is converted with one call to numpy. `spectra` stays empty.
+
+        :param file: opened .ana text file.
+        :return: None.
+        :raise ValueError: if there is no total spectra data or a raw data block does not have their shape.
+        """
+        lines = iter(file.read().splitlines())
+
+        self.spectra = {}
+        self.raw_spectra = None
+
+        first_data_line = self._read_header(lines)
+        data_lines = list(itertools.chain(_as_lines(first_data_line), lines))
+        number_blocks = sum(1 for line in data_lines if line.startswith("raw data"))
+
+        for block_id, block_lines in _iter_block_lines(data_lines):
+            if block_id == -1:
+                self._set_total_spectra(block_lines)
+                self.raw_spectra = np.zeros((number_blocks,) + self.total_spectra.shape)
+            else:
+                self.raw_spectra[block_id] = self._parse_raw_data_block(block_id, block_lines)
+
+        self.spectrum_id = number_blocks - 1
+
+    def iter_blocks(self, file):
+        """
+        Read the .ana file line by line and yield the raw data blocks one at a time.
+
+        Only the lines of the current block are kept in memory, the file can be larger than the memory. The header
+        data, `energies_eV` and `total_spectra` are set before the first block is yielded and `spectrum_id` is the
+        last block read.
+
+        :param file: opened .ana text file.
+        :return: generator of (block id, counts) with the counts of the block with shape (n_points, n_channels).
+        :raise ValueError: if there is no total spectra data or a raw data block does not have their shape.
+        """
+        self.spectra = {}
+        self.raw_spectra = None
+        self.spectrum_id = -1
+
+        first_data_line = self._read_header(file)
+
+        for block_id, block_lines in _iter_block_lines(itertools.chain(_as_lines(first_data_line), file)):
+            if block_id == -1:
+                self._set_total_spectra(block_lines)
+            else:
+                block = self._parse_raw_data_block(block_id, block_lines)
+                self.spectrum_id = block_id
+                yield block_id, block
+
+    def read_total_spectra(self, file):
+        """
+        Read the header and the total spectra of the .ana file, the reading stops at the first raw data block.
+
+        The raw data blocks are not parsed, `raw_spectra` stays `None` and `spectra` empty.
+
+        :param file: opened .ana text file.
+        :return: None.
+        :raise ValueError: if there is no total spectra data.
+        """
+        self.spectra = {}
+        self.raw_spectra = None
+        self.spectrum_id = -1
+
+        first_data_line = self._read_header(file)
+
+        for _block_id, block_lines in _iter_block_lines(itertools.chain(_as_lines(first_data_line), file)):
+            self._set_total_spectra(block_lines)
+            break
+
+    def iter_points(self, file):
+        """
+        Read the .ana file line by line and yield the spectrum of each point of each raw data block.
+
+        :param file: opened .ana text file.
+        :return: generator of (block id, point id, counts) with the counts of the point with shape (n_channels,).
+        """
+        for block_id, block in self.iter_blocks(file):
+            for point_id, counts in enumerate(block):
+                yield block_id, point_id, counts
+
+    def read_header(self, file):
+        """
+        Read only the header parameters of the .ana file, the reading stops after the `Mag` keyword or at the first
+        data line, e.g. for the point spectrum .ana files without `Mag` keyword.
+
+        The data attributes are not changed. This is used to catalog many files, only the first kB of each file are
+        read.
+
+        :param file: opened .ana text file.
+        :return: None.
+        """
+        self._read_header(file)
+
+    def _read_header(self, lines):
+        """
+        Extract the header data from the lines up to the last header keyword or the first data line, the following
+        lines are not read.
+
+        :param lines: iterator over the lines of the file.
+        :return: the first data line if the reading stopped on it, None otherwise.
+        """
+        extracting_header_data = True
+        for line in lines:
+            if _is_data_line(line):
+                return line
+
+            extracting_header_data = self._extract_header_data(extracting_header_data, line)
+            if not extracting_header_data:
+                break
+
+        return None
+
+    def _set_total_spectra(self, block_lines):
+        if not block_lines:
+            raise ValueError("No total spectra data in the file")
+
+        block = _parse_block(block_lines, block_lines[0].count(',') + 1)
+        self.energies_eV = block[:, 0]
+        self.total_spectra = np.ascontiguousarray(block[:, 1:].T)
+
+    def _parse_raw_data_block(self, block_id, block_lines):
+        number_points, number_channels = self.total_spectra.shape
+        block = _parse_block(block_lines, number_points + 1)
+        if len(block) != number_channels:
+            raise ValueError("Raw data block {:d} has {:d} channels instead of {:d}".format(
+                block_id, len(block), number_channels))
+
+        return np.ascontiguousarray(block[:, 1:].T)
+
     def _extract_spectra_data(self, line):
         items = line.split(',')
         if len(items) > 1:
@@ -187,9 +395,9 @@ class AnaFile(object):
 
     def save_hdf5(self, hdf5_file_path):
         with h5py.File(hdf5_file_path, 'w') as hdf5_file:
-            dset = hdf5_file.create_dataset("energy (eV)", data=self.energies_eV)
+            hdf5_file.create_dataset("energy (eV)", data=self.energies_eV)
 
-            dset = hdf5_file.create_dataset("total spectra", data=self.total_spectra)
+            hdf5_file.create_dataset("total spectra", data=self.total_spectra)
 
             # self.spectra = {}
 
@@ -202,11 +410,11 @@ class AnaFile(object):
 
 if __name__ == '__main__':
     import matplotlib.pyplot as plt
-    import numpy as np
 
     from pysemeels import get_current_module_path
 
-    ana_file_path = get_current_module_path(__file__, "../../../../test_data/hitachi/eels_su/30kV_march2017_7eV/spectra_1.ana")
+    ana_file_path = get_current_module_path(__file__,
+                                            "../../../../test_data/hitachi/eels_su/30kV_march2017_7eV/spectra_1.ana")
     with open(ana_file_path, 'r') as ana_text_file:
         ana_file = AnaFile()
         ana_file.read(ana_text_file)
@@ -240,4 +448,3 @@ if __name__ == '__main__':
         plt.plot(ana_file.energies_eV, ana_file.total_spectra - np.mean(spectra, axis=0), '.')
 
         plt.show()
-
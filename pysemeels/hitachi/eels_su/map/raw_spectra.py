@@ -26,23 +26,34 @@ Read raw spectra from a map.
 ###############################################################################
 
 # Standard library modules.
+import os
 import struct
 
 # Third party modules.
+import numpy as np
 
 # Local modules.
 
 # Project modules.
+from pysemeels.corrected_counts import correct_counts_batch
 
 # Globals and constants variables.
+#: Number of channels of each raw spectrum.
+NUMBER_CHANNELS = 1024
+#: Data type of the counts in the rawspect-*.dat files, the "1024H" struct format of the Windows acquisition software.
+RAW_SPECTRA_DTYPE = np.dtype("<u2")
+
+
 class Spectrum():
     def __init__(self):
         self.energies_eV = []
         self.counts = []
 
+
 class RawSpectra():
     def __init__(self):
-        pass
+        self.raw_spectra = []
+        self.raw_spectrum_id = 0
 
     def read(self, file):
         self.raw_spectra = []
@@ -62,13 +73,75 @@ class RawSpectra():
             self.raw_spectra.append(counts)
             self.raw_spectrum_id += 1
 
+    def read_memmap(self, file_path, copy=False):
+        """
+        Read all spectra of a file as a (n_spectra, 1024) uint16 array without Python objects for each count.
+
+        :param str file_path: path of the rawspect-*.dat file.
+        :param bool copy: read the file in memory with :py:func:`numpy.fromfile` instead of mapping it with
+            :py:class:`numpy.memmap`.
+        :raise ValueError: if the file size is not a multiple of the size of a spectrum.
+        """
+        spectrum_size_B = NUMBER_CHANNELS * RAW_SPECTRA_DTYPE.itemsize
+        file_size_B = os.path.getsize(file_path)
+        if file_size_B % spectrum_size_B != 0:
+            raise ValueError("File size {:d} B is not a multiple of the spectrum size {:d} B: {}".format(
+                file_size_B, spectrum_size_B, file_path))
+
+        number_spectra = file_size_B // spectrum_size_B
+        shape = (number_spectra, NUMBER_CHANNELS)
+        if number_spectra == 0:
+            self.raw_spectra = np.empty(shape, dtype=RAW_SPECTRA_DTYPE)
+        elif copy:
+            self.raw_spectra = np.fromfile(file_path, dtype=RAW_SPECTRA_DTYPE).reshape(shape)
+        else:
+            self.raw_spectra = np.memmap(file_path, dtype=RAW_SPECTRA_DTYPE, mode='r', shape=shape)
+        self.raw_spectrum_id = number_spectra
+
+    def get_spectrum(self, spectrum_index):
+        """
+        Return the counts of one spectrum, only this spectrum is read from the disk with :py:meth:`read_memmap`.
+
+        :param int spectrum_index: index of the spectrum in the file.
+        :raise IndexError: if the index is outside the spectra read.
+        """
+        return self.raw_spectra[spectrum_index]
+
+    def get_corrected_counts(self, dark_currents, gain_corrections, dtype=np.float64, out=None, workers=1):
+        """
+        Return the net counts of all spectra corrected for the dark current and gain of the map.
+
+        A memory-mapped file is corrected chunk by chunk, see
+        :py:func:`pysemeels.corrected_counts.correct_counts_batch`.
+
+        :param dark_currents: dark currents of each channel.
+        :param gain_corrections: gain corrections of each channel.
+        :param dtype: data type of the new output array, e.g. `np.float32` for large maps.
+        :param out: preallocated (n_spectra, 1024) output array.
+        :param int workers: number of threads used for the correction.
+        :rtype: `np.array`
+        """
+        raw_spectra = self.raw_spectra
+        if not isinstance(raw_spectra, np.ndarray):
+            raw_spectra = np.array(raw_spectra, dtype=RAW_SPECTRA_DTYPE).reshape((-1, NUMBER_CHANNELS))
+
+        return correct_counts_batch(raw_spectra, dark_currents, gain_corrections, dtype=dtype, out=out,
+                                    workers=workers)
+
+    @property
+    def number_spectra(self):
+        return len(self.raw_spectra)
+
+
 if __name__ == '__main__':
     import matplotlib.pyplot as plt
     import numpy as np
 
     from pysemeels import get_current_module_path
 
-    file_path = get_current_module_path(__file__, "../../../../test_data/hitachi/eels_su/30kV_march2017_7eV/RawSpectra/rawspect-1.dat")
+    file_path = get_current_module_path(__file__,
+                                        "../../../../test_data/hitachi/eels_su/30kV_march2017_7eV/RawSpectra/"
+                                        "rawspect-1.dat")
     with open(file_path, 'rb') as raw_spectra_file:
         raw_spectra = RawSpectra()
         raw_spectra.read(raw_spectra_file)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeels.lazy_loading
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Lazy loading of the HDF5 datasets with a bound on the number of loaded data containers.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+from collections import OrderedDict
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+
+# Globals and constants variables.
+
+
+class LoadedDataCache(object):
+    """
+    Least recently used (LRU) bound on the number of data containers with loaded arrays.
+
+    The data containers must have a `unload()` method that releases their loaded arrays. When a container is used and
+    more than `maximum_size` containers are loaded, the least recently used containers are unloaded.
+    """
+    def __init__(self, maximum_size=None):
+        """
+
+        :param int maximum_size: maximum number of loaded data containers, no limit if None.
+        """
+        self.maximum_size = maximum_size
+
+        self._loaded_data = OrderedDict()
+
+    def __len__(self):
+        return len(self._loaded_data)
+
+    def __contains__(self, data):
+        return id(data) in self._loaded_data
+
+    def touch(self, data):
+        """
+        Mark the data container as the most recently used and unload the least recently used containers.
+
+        :param data: data container with a `unload()` method.
+        """
+        key = id(data)
+        if key in self._loaded_data:
+            self._loaded_data.move_to_end(key)
+            return
+
+        self._loaded_data[key] = data
+
+        if self.maximum_size is not None:
+            while len(self._loaded_data) > max(self.maximum_size, 1):
+                _key, oldest_data = self._loaded_data.popitem(last=False)
+                oldest_data.unload()
+
+    def discard(self, data):
+        """
+        Remove the data container from the cache without unloading it.
+        """
+        self._loaded_data.pop(id(data), None)
+
+    def clear(self):
+        """
+        Unload all data containers.
+        """
+        while self._loaded_data:
+            _key, data = self._loaded_data.popitem(last=False)
+            data.unload()
+
+
+def lazy_array_property(attribute_name, doc=None):
+    """
+    Create a property for an array of a data container that is loaded from its HDF5 dataset on first access.
+
+    The data container must have the `_arrays` and `_hdf5_datasets` dictionaries and the `_loaded_data_cache`
+    attribute. Setting the property replaces the array and detaches it from the HDF5 dataset, then calls the
+    `_array_changed(attribute_name)` method of the data container if it has one, e.g. to reset derived data.
+
+    :param str attribute_name: key of the array in `_arrays` and `_hdf5_datasets`.
+    :param str doc: documentation of the property.
+    :rtype: property
+    """
+    def getter(self):
+        array = self._arrays.get(attribute_name)
+        if attribute_name in self._hdf5_datasets:
+            if array is None:
+                array = self._hdf5_datasets[attribute_name][...]
+                self._arrays[attribute_name] = array
+            if self._loaded_data_cache is not None:
+                self._loaded_data_cache.touch(self)
+        return array
+
+    def setter(self, value):
+        self._hdf5_datasets.pop(attribute_name, None)
+        self._arrays[attribute_name] = value
+
+        array_changed = getattr(self, "_array_changed", None)
+        if array_changed is not None:
+            array_changed(attribute_name)
+
+    return property(getter, setter, doc=doc)
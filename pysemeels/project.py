@@ -49,6 +49,9 @@ from pysemeels.si.point import Point
 from pysemeels.si.linescan import Linescan
 from pysemeels.si.map import Map
 from pysemeels.eftem import Eftem
+from pysemeels.lazy_loading import LoadedDataCache
+from pysemeels.calibration_store import CalibrationStore, HDF5_GROUP_CALIBRATIONS
+from pysemeels.metadata_index import MetadataIndex, HDF5_DATASET_METADATA_INDEX
 
 # Globals and constants variables.
 #: Author of the project.
@@ -94,11 +97,26 @@ class Project(object):
         #: Energy filtered and electron micrographs.
         self.energy_filtered_micrographs = []
 
-    def read_hdf5(self, parent_group):
+        #: Raw spectrum by name.
+        self.spectrum_index = {}
+        #: Bound on the number of raw spectra with loaded arrays in lazy mode.
+        self.loaded_spectra_cache = None
+        #: Parameters of the raw spectra for the queries, see :py:meth:`query_spectra`.
+        self.metadata_index = None
+
+    def read_hdf5(self, parent_group, lazy=False, maximum_loaded_spectra=None, share_calibrations=False):
         """
         Read the project data from a HDF5 parent group.
 
+        In lazy mode, the names and parameters of the raw spectra are read immediately, but the arrays of each spectrum
+        are only read on first access. The HDF5 file has to stay open while the spectra are used.
+
         :param `h5py.group` parent_group: read the project from this group.
+        :param bool lazy: read the spectrum arrays on first access.
+        :param int maximum_loaded_spectra: in lazy mode, maximum number of spectra with arrays kept in memory, the least
+            recently used spectra are unloaded. No limit if None.
+        :param bool share_calibrations: read each distinct gain corrections and dark currents vector written with
+            `deduplicate_calibrations` once and share it between the spectra, the shared vectors are read-only.
         :return: None.
         :raises ValueError: If the parent group `parent_group` does not contain a project with the correct name.
         """
@@ -106,11 +124,33 @@ class Project(object):
             project_group = parent_group[self.name]
             self.author = project_group.attrs[HDF5_ATTRIBUTE_AUTHOR]
 
+            self.spectra = []
+            self.si_points = []
+            self.si_line_scans = []
+            self.si_maps = []
+            self.energy_filtered_micrographs = []
+            self.spectrum_index = {}
+            self.metadata_index = None
+
+            self.loaded_spectra_cache = None
+            if lazy:
+                self.loaded_spectra_cache = LoadedDataCache(maximum_loaded_spectra)
+
+            calibration_store = None
+            if share_calibrations and HDF5_GROUP_CALIBRATIONS in project_group:
+                calibration_store = CalibrationStore(project_group[HDF5_GROUP_CALIBRATIONS])
+
             if HDF5_GROUP_SPECTRA in project_group:
                 group = project_group[HDF5_GROUP_SPECTRA]
                 for name in group.keys():
                     data = RawSpectrum(name)
-                    data.read_hdf5(group)
+                    data.read_hdf5(group, lazy=lazy, loaded_data_cache=self.loaded_spectra_cache,
+                                   calibration_store=calibration_store)
+                    self.spectra.append(data)
+                    self.spectrum_index[name] = data
+
+                if HDF5_DATASET_METADATA_INDEX in project_group:
+                    self.metadata_index = MetadataIndex(project_group)
 
             if HDF5_GROUP_SPECTRAL_IMAGING in project_group:
                 si_group = project_group[HDF5_GROUP_SPECTRAL_IMAGING]
@@ -119,33 +159,44 @@ class Project(object):
                     for name in group.keys():
                         data = Point(name)
                         data.read_hdf5(group)
+                        self.si_points.append(data)
 
                 if HDF5_GROUP_LINE_SCANS in si_group:
                     group = si_group[HDF5_GROUP_LINE_SCANS]
                     for name in group.keys():
                         data = Linescan(name)
                         data.read_hdf5(group)
+                        self.si_line_scans.append(data)
 
                 if HDF5_GROUP_MAPS in si_group:
                     group = si_group[HDF5_GROUP_MAPS]
                     for name in group.keys():
                         data = Map(name)
                         data.read_hdf5(group)
+                        self.si_maps.append(data)
 
             if HDF5_GROUP_ENERGY_FILTERED_MICROGRAPHS in project_group:
                 group = project_group[HDF5_GROUP_ENERGY_FILTERED_MICROGRAPHS]
                 for name in group.keys():
                     data = Eftem(name)
                     data.read_hdf5(group)
+                    self.energy_filtered_micrographs.append(data)
 
         else:
             raise ValueError("The parent group does not contain the project")
 
-    def write_hdf5(self, parent_group):
+    def write_hdf5(self, parent_group, storage_options=None, deduplicate_calibrations=False, metadata_index=False):
         """
         Write the values of the current project into the parent group `parent_group`.
 
         :param `h5py.group` parent_group: write project into this group.
+        :param storage_options: chunking, compression and data type of the spectrum datasets, the h5py default if None.
+        :type storage_options: :py:class:`pysemeels.hdf5_storage.Hdf5StorageOptions`
+        :param bool deduplicate_calibrations: store each distinct gain corrections and dark currents vector once in the
+            project, see :py:class:`pysemeels.calibration_store.CalibrationStore`.
+        :param bool metadata_index: write the parameters of the raw spectra in the project metadata index, see
+            :py:class:`pysemeels.metadata_index.MetadataIndex`. The index is rebuilt from the current spectra, an
+            existing index is replaced.
         :return: None.
         """
         project_group = parent_group.require_group(self.name)
@@ -153,9 +204,19 @@ class Project(object):
         project_group.attrs[HDF5_ATTRIBUTE_AUTHOR] = self.author
 
         if self.spectra:
+            calibration_store = None
+            if deduplicate_calibrations:
+                calibration_store = CalibrationStore(project_group.require_group(HDF5_GROUP_CALIBRATIONS),
+                                                     storage_options)
+
             group = project_group.require_group(HDF5_GROUP_SPECTRA)
             for spectrum in self.spectra:
-                spectrum.write_hdf5(group)
+                spectrum.write_hdf5(group, storage_options, calibration_store)
+
+        if metadata_index:
+            self.metadata_index = MetadataIndex()
+            self.metadata_index.update_many((spectrum.name, spectrum.eels_parameters) for spectrum in self.spectra)
+            self.metadata_index.write(project_group)
 
         if self.si_points:
             group = project_group.require_group(HDF5_GROUP_SPECTRAL_IMAGING)
@@ -179,3 +240,23 @@ class Project(object):
             group = project_group.require_group(HDF5_GROUP_ENERGY_FILTERED_MICROGRAPHS)
             for energy_filtered_micrograph in self.energy_filtered_micrographs:
                 energy_filtered_micrograph.write_hdf5(group)
+
+    def query_spectra(self, criteria=None, **kwargs):
+        """
+        Return the raw spectra with parameters matching all criteria, e.g. all 30 kV spectra with a 7 eV energy window::
+
+            project.query_spectra({HDF5_ACCELERATING_VOLTAGE_V: 30000, HDF5_ENERGY_WIDTH_eV: 7.0})
+
+        The metadata index of the project file is used, so in lazy mode no spectrum array is read. Without a metadata
+        index, e.g. a project file written before the index, the index is created in memory from the spectra.
+
+        :param dict criteria: see :py:meth:`pysemeels.metadata_index.MetadataIndex.mask`.
+        :return: list of :py:class:`pysemeels.raw_spectrum.RawSpectrum`.
+        :rtype: list
+        """
+        if self.metadata_index is None:
+            self.metadata_index = MetadataIndex()
+            self.metadata_index.update_many((spectrum.name, spectrum.eels_parameters) for spectrum in self.spectra)
+
+        spectra = {spectrum.name: spectrum for spectrum in self.spectra}
+        return [spectra[name] for name in self.metadata_index.query(criteria, **kwargs) if name in spectra]
@@ -36,6 +36,9 @@ import numpy as np
 # Project modules.
 from pysemeels.hitachi.eels_su.elv_file import ElvFile
 from pysemeels.hitachi.eels_su.elv_text_file import ElvTextParameters
+from pysemeels.hdf5_storage import create_dataset
+from pysemeels.lazy_loading import lazy_array_property
+from pysemeels.corrected_counts import CorrectedCountsMixin
 
 # Globals and constants variables.
 #:
@@ -52,8 +55,13 @@ HDF5_DATASET_GAIN_CORRECTIONS = "gain corrections"
 #:
 HDF5_DATASET_DARK_CURRENTS = "dark currents"
 
+_ARRAY_DATASET_NAMES = {"energies_eV": HDF5_DATASET_ENERGIES_keV,
+                        "raw_counts": HDF5_DATASET_RAW_COUNTS,
+                        "gain_corrections": HDF5_DATASET_GAIN_CORRECTIONS,
+                        "dark_currents": HDF5_DATASET_DARK_CURRENTS}
 
-class RawSpectrum(object):
+
+class RawSpectrum(CorrectedCountsMixin):
     """
     Container for raw EELS spectrum data.
     """
@@ -67,16 +75,58 @@ class RawSpectrum(object):
         self.extra_parameters = {}
         self.eels_parameters = {}
 
+        self._arrays = {}
+        self._hdf5_datasets = {}
+        self._loaded_data_cache = None
+
         self.energies_eV = None
         self.raw_counts = None
         self.gain_corrections = None
         self.dark_currents = None
 
-    def read_hdf5(self, parent_group):
+    energies_eV = lazy_array_property("energies_eV", "Energies (eV) of the channels.")
+    raw_counts = lazy_array_property("raw_counts", "Raw counts of the channels.")
+    gain_corrections = lazy_array_property("gain_corrections", "Gain corrections of the channels.")
+    dark_currents = lazy_array_property("dark_currents", "Dark currents of the channels.")
+
+    def _array_changed(self, attribute_name):
+        if attribute_name in ("raw_counts", "gain_corrections", "dark_currents"):
+            self.invalidate_counts()
+
+    @property
+    def is_loaded(self):
+        """
+        True if no array is waiting to be loaded from the HDF5 file.
+        """
+        return all(self._arrays.get(attribute_name) is not None for attribute_name in self._hdf5_datasets)
+
+    def unload(self):
+        """
+        Release the arrays read from the HDF5 file and the cached counts, they are read again on the next access.
+
+        The arrays set directly are kept.
+        """
+        for attribute_name in self._hdf5_datasets:
+            self._arrays[attribute_name] = None
+        self.invalidate_counts()
+
+        if self._loaded_data_cache is not None:
+            self._loaded_data_cache.discard(self)
+
+    def read_hdf5(self, parent_group, lazy=False, loaded_data_cache=None, calibration_store=None):
         """
         Read the raw EELS spectrum from the HDF5 parent group.
 
+        In lazy mode, only the parameters are read and each array is read from the HDF5 file on first access, so the
+        HDF5 file has to stay open until the arrays are used.
+
         :param `h5py.group` parent_group: read the data from this group.
+        :param bool lazy: read the arrays on first access.
+        :param loaded_data_cache: cache that limits the number of spectra with loaded arrays in lazy mode.
+        :type loaded_data_cache: :py:class:`pysemeels.lazy_loading.LoadedDataCache`
+        :param calibration_store: if not None, the gain corrections and dark currents are read through the store
+            memory cache and shared with the other spectra, also in lazy mode.
+        :type calibration_store: :py:class:`pysemeels.calibration_store.CalibrationStore`
         :return: None.
         :raises ValueError: If the parent group `parent_group` does not have the correct name.
         """
@@ -93,26 +143,49 @@ class RawSpectrum(object):
                 for name in eels_parameters_group.attrs:
                     self.eels_parameters[name] = eels_parameters_group.attrs[name]
 
-            if HDF5_DATASET_ENERGIES_keV in project_group:
-                self.energies_eV = project_group[HDF5_DATASET_ENERGIES_keV][...]
+            if lazy:
+                self._loaded_data_cache = loaded_data_cache
+                for attribute_name, dataset_name in _ARRAY_DATASET_NAMES.items():
+                    if dataset_name in project_group:
+                        self._arrays[attribute_name] = None
+                        self._hdf5_datasets[attribute_name] = project_group[dataset_name]
+                self.invalidate_counts()
+            else:
+                if HDF5_DATASET_ENERGIES_keV in project_group:
+                    self.energies_eV = project_group[HDF5_DATASET_ENERGIES_keV][...]
+
+                if HDF5_DATASET_RAW_COUNTS in project_group:
+                    self.raw_counts = project_group[HDF5_DATASET_RAW_COUNTS][...]
 
-            if HDF5_DATASET_RAW_COUNTS in project_group:
-                self.raw_counts = project_group[HDF5_DATASET_RAW_COUNTS][...]
+                if HDF5_DATASET_GAIN_CORRECTIONS in project_group and calibration_store is None:
+                    self.gain_corrections = project_group[HDF5_DATASET_GAIN_CORRECTIONS][...]
 
-            if HDF5_DATASET_GAIN_CORRECTIONS in project_group:
-                self.gain_corrections = project_group[HDF5_DATASET_GAIN_CORRECTIONS][...]
+                if HDF5_DATASET_DARK_CURRENTS in project_group and calibration_store is None:
+                    self.dark_currents = project_group[HDF5_DATASET_DARK_CURRENTS][...]
 
-            if HDF5_DATASET_DARK_CURRENTS in project_group:
-                self.dark_currents = project_group[HDF5_DATASET_DARK_CURRENTS][...]
+            if calibration_store is not None:
+                if HDF5_DATASET_GAIN_CORRECTIONS in project_group:
+                    self.gain_corrections = calibration_store.read(project_group[HDF5_DATASET_GAIN_CORRECTIONS])
+
+                if HDF5_DATASET_DARK_CURRENTS in project_group:
+                    self.dark_currents = calibration_store.read(project_group[HDF5_DATASET_DARK_CURRENTS])
 
         else:
             raise ValueError("The parent group does not contain the project")
 
-    def write_hdf5(self, parent_group):
+    def write_hdf5(self, parent_group, storage_options=None, calibration_store=None):
         """
         Write the raw EELS spectrum into the parent group `parent_group`.
 
+        The raw counts use the count data type policy of the storage options, e.g. uint16, the other datasets use the
+        floating point data type policy.
+
         :param `h5py.group` parent_group: write data into this group.
+        :param storage_options: chunking, compression and data type of the datasets, the h5py default if None.
+        :type storage_options: :py:class:`pysemeels.hdf5_storage.Hdf5StorageOptions`
+        :param calibration_store: if not None, the gain corrections and dark currents are stored once in the store and
+            linked in the spectrum group.
+        :type calibration_store: :py:class:`pysemeels.calibration_store.CalibrationStore`
         :return: None.
         """
         project_group = parent_group.require_group(self.name)
@@ -128,23 +201,31 @@ class RawSpectrum(object):
                 parameters_group.attrs[name] = self.eels_parameters[name]
 
         if self.energies_eV is not None:
-            project_group.create_dataset(HDF5_DATASET_ENERGIES_keV, data=self.energies_eV)
+            create_dataset(project_group, HDF5_DATASET_ENERGIES_keV, self.energies_eV, storage_options)
 
         if self.raw_counts is not None:
-            project_group.create_dataset(HDF5_DATASET_RAW_COUNTS, data=self.raw_counts)
+            create_dataset(project_group, HDF5_DATASET_RAW_COUNTS, self.raw_counts, storage_options, is_counts=True)
 
         if self.gain_corrections is not None:
-            project_group.create_dataset(HDF5_DATASET_GAIN_CORRECTIONS, data=self.gain_corrections)
+            if calibration_store is None:
+                create_dataset(project_group, HDF5_DATASET_GAIN_CORRECTIONS, self.gain_corrections, storage_options)
+            else:
+                calibration_store.link(project_group, HDF5_DATASET_GAIN_CORRECTIONS, self.gain_corrections)
 
         if self.dark_currents is not None:
-            project_group.create_dataset(HDF5_DATASET_DARK_CURRENTS, data=self.dark_currents)
+            if calibration_store is None:
+                create_dataset(project_group, HDF5_DATASET_DARK_CURRENTS, self.dark_currents, storage_options)
+            else:
+                calibration_store.link(project_group, HDF5_DATASET_DARK_CURRENTS, self.dark_currents)
 
-    def import_data(self, filepath, extra_parameters=None):
+    def import_data(self, filepath, extra_parameters=None, fast_parser=False):
         """
         Import the raw EELS spectrum data (elv file).
 
         :param str filepath: File path of the .elv file.
         :param dict extra_parameters: Extra parameters to add as attribute in this data group.
+        :param bool fast_parser: read the .elv file with the fast parser, see
+            :py:meth:`pysemeels.hitachi.eels_su.elv_file.ElvFile.read_fast`.
         :return: None.
         """
         if extra_parameters:
@@ -152,7 +233,7 @@ class RawSpectrum(object):
 
         with open(filepath, 'r', encoding="ANSI", errors='ignore') as elv_file:
             elv_data = ElvFile()
-            elv_data.read(elv_file)
+            elv_data.read(elv_file, fast=fast_parser)
 
             self.energies_eV = np.array(elv_data.energies_eV)
             self.raw_counts = np.array(elv_data.raw_counts)
@@ -167,26 +248,3 @@ class RawSpectrum(object):
             elv_text_parameters.read(elv_text_file)
 
             self.eels_parameters.update(elv_text_parameters.items())
-
-    @property
-    def counts(self):
-        """
-        Compute the net counts of the EELS spectrum.
-
-        The corrected or net counts are calculated for each channel as
-
-        .. math::
-            N = \\frac{C - D}{G}
-
-        where
-
-            - :math:`N` is the net count
-            - :math:`C` is the raw count
-            - :math:`D` is the dark current
-            - :math:`G` is the gain correction
-
-        :return: Counts corrected for grain and dark current.
-        :rtype: `np.array`
-        """
-        corrected_counts = (self.raw_counts - self.dark_currents) / self.gain_corrections
-        return corrected_counts
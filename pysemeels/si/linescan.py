@@ -26,25 +26,220 @@ Spectral imaging line scan EELS data.
 ###############################################################################
 
 # Standard library modules.
+import os.path
+import re
 
 # Third party modules.
+import numpy as np
 
 # Local modules.
 
 # Project modules.
+from pysemeels.hitachi.eels_su.map.ana_file import AnaFile
+from pysemeels.hitachi.eels_su.map.raw_spectra import RawSpectra
+from pysemeels.hitachi.eels_su.map.text_file import TextParameters
+from pysemeels.hdf5_storage import create_dataset, spectrum_image_chunks, SPECTRUM_IMAGE_STORAGE_OPTIONS
+from pysemeels.si.map import HDF5_GROUP_SPECTRA, HDF5_GROUP_EXTRA_PARAMETERS, HDF5_DATASET_ENERGIES_eV
 
 # Globals and constants variables.
+#:
+HDF5_DATASET_POSITIONS = "positions"
+#:
+HDF5_DATASET_SPECTRA = "spectra"
+#:
+HDF5_DATASET_RAW_SPECTRA = "raw spectra"
+#:
+HDF5_ATTRIBUTE_UNIT = "unit"
+
+#: Unit of the positions when the pitch of the line scan is unknown.
+POSITION_UNIT_POINT = "point"
+
+
+def _parse_length(value):
+    """
+    Extract the value and unit of a length parameter, e.g. "12.5nm".
+
+    :param str value: text of the parameter.
+    :return: the value and unit, or None if the text does not start with a number.
+    :rtype: tuple
+    """
+    match = re.match(r"\s*([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?)\s*(\S*)", value or "")
+    if match is None:
+        return None
+
+    return float(match.group(1)), match.group(2)
 
 
 class Linescan(object):
+    """
+    Container for spectral imaging line scan EELS data.
+
+    The spectra of each .ana file data id are stored in a (points, channels) array with the position of each point
+    along the line.
+    """
     def __init__(self, name):
+        """
+
+        :param str name: Name of the spectral imaging line scan EELS data folder.
+        """
         self.name = name
 
+        self.extra_parameters = {}
+
+        self.energies_eV = None
+        self.positions = None
+        self.position_unit = POSITION_UNIT_POINT
+
+        #: Total spectrum (points, channels) of each .ana file data id, a numpy array or a h5py dataset.
+        self.spectra = {}
+        #: Raw spectra (n_spectra, channels) of each rawspect-*.dat file data id, a numpy array or a h5py dataset.
+        self.raw_spectra = {}
+
     def read_hdf5(self, parent_group):
+        """
+        Read the line scan from the HDF5 parent group.
+
+        The spectra are not read, they are h5py datasets and a slice of points only reads the chunks of these points,
+        see :py:meth:`get_spectra`. The HDF5 file has to stay open while they are used.
+
+        :param `h5py.group` parent_group: read the data from this group.
+        :return: None.
+        :raises ValueError: If the parent group `parent_group` does not have the correct name.
+        """
         if self.name in parent_group:
             project_group = parent_group[self.name]
         else:
             raise ValueError("The parent group does not contain the project")
 
-    def write_hdf5(self, parent_group):
+        self.extra_parameters = {}
+        if HDF5_GROUP_EXTRA_PARAMETERS in project_group:
+            extra_parameters_group = project_group[HDF5_GROUP_EXTRA_PARAMETERS]
+            for name in extra_parameters_group.attrs:
+                self.extra_parameters[name] = extra_parameters_group.attrs[name]
+
+        if HDF5_DATASET_ENERGIES_eV in project_group:
+            self.energies_eV = project_group[HDF5_DATASET_ENERGIES_eV][...]
+        if HDF5_DATASET_POSITIONS in project_group:
+            positions = project_group[HDF5_DATASET_POSITIONS]
+            self.positions = positions[...]
+            self.position_unit = positions.attrs.get(HDF5_ATTRIBUTE_UNIT, POSITION_UNIT_POINT)
+
+        self.spectra = {}
+        self.raw_spectra = {}
+        for data_id, group_name in HDF5_GROUP_SPECTRA.items():
+            if group_name in project_group:
+                spectra_group = project_group[group_name]
+                if HDF5_DATASET_SPECTRA in spectra_group:
+                    self.spectra[data_id] = spectra_group[HDF5_DATASET_SPECTRA]
+                if HDF5_DATASET_RAW_SPECTRA in spectra_group:
+                    self.raw_spectra[data_id] = spectra_group[HDF5_DATASET_RAW_SPECTRA]
+
+    def write_hdf5(self, parent_group, storage_options=None):
+        """
+        Write the line scan in the HDF5 parent group.
+
+        The spectra of each data id are written in one chunked dataset, with the positions and energies attached as
+        dimension scales. The extra parameters are the attributes of the group :py:data:`HDF5_GROUP_EXTRA_PARAMETERS`.
+
+        :param `h5py.group` parent_group: write the data in this group.
+        :param storage_options: storage options of the spectra, gzip compression with shuffle if None.
+        :type storage_options: :py:class:`pysemeels.hdf5_storage.Hdf5StorageOptions`
+        :return: None.
+        """
         project_group = parent_group.require_group(self.name)
+
+        if storage_options is None:
+            storage_options = SPECTRUM_IMAGE_STORAGE_OPTIONS
+
+        if self.extra_parameters:
+            parameters_group = project_group.require_group(HDF5_GROUP_EXTRA_PARAMETERS)
+            for name in self.extra_parameters:
+                parameters_group.attrs[name] = self.extra_parameters[name]
+
+        energies_dataset = None
+        if self.energies_eV is not None:
+            energies_dataset = create_dataset(project_group, HDF5_DATASET_ENERGIES_eV, self.energies_eV)
+            energies_dataset.make_scale("energy (eV)")
+
+        positions_dataset = None
+        if self.positions is not None:
+            positions_dataset = create_dataset(project_group, HDF5_DATASET_POSITIONS, self.positions)
+            positions_dataset.attrs[HDF5_ATTRIBUTE_UNIT] = self.position_unit
+            positions_dataset.make_scale("position ({})".format(self.position_unit))
+
+        for data_id, spectra in sorted(self.spectra.items()):
+            spectra = np.asarray(spectra)
+            spectra_group = project_group.require_group(HDF5_GROUP_SPECTRA[data_id])
+            chunks = spectrum_image_chunks(spectra.shape, spectra.dtype.itemsize)
+            dataset = create_dataset(spectra_group, HDF5_DATASET_SPECTRA, spectra, storage_options, is_counts=True,
+                                     chunks=chunks)
+
+            if positions_dataset is not None and len(positions_dataset) == spectra.shape[0]:
+                dataset.dims[0].attach_scale(positions_dataset)
+            if energies_dataset is not None and len(energies_dataset) == spectra.shape[1]:
+                dataset.dims[1].attach_scale(energies_dataset)
+
+        for data_id, raw_spectra in sorted(self.raw_spectra.items()):
+            raw_spectra = np.asarray(raw_spectra)
+            spectra_group = project_group.require_group(HDF5_GROUP_SPECTRA[data_id])
+            chunks = spectrum_image_chunks(raw_spectra.shape, raw_spectra.dtype.itemsize)
+            create_dataset(spectra_group, HDF5_DATASET_RAW_SPECTRA, raw_spectra, storage_options, is_counts=True,
+                           chunks=chunks)
+
+    def get_spectra(self, data_id, start=None, stop=None):
+        """
+        Return the spectra of a range of points.
+
+        :param int data_id: .ana file data id.
+        :param int start: first point, the first point of the line if None.
+        :param int stop: point after the last point, the end of the line if None.
+        :return: the spectra of the points, shape (number of points, channels).
+        """
+        return self.spectra[data_id][start:stop]
+
+    def import_data(self, folder, pitch=None, extra_parameters=None):
+        """
+        Import the EELS spectral line scan data (.ana files and RawSpectra/rawspect-*.dat files).
+
+        :param str folder: Folder that contain the .ana files.
+        :param tuple pitch: (value, unit) of the distance between points, read from the text parameters file if None.
+        :param dict extra_parameters: Extra parameters to add as attribute in this data group.
+        :return: None.
+        """
+        if extra_parameters:
+            self.extra_parameters.update(extra_parameters)
+
+        self.spectra = {}
+        self.raw_spectra = {}
+
+        for data_id in HDF5_GROUP_SPECTRA:
+            filepath = os.path.join(folder, "spectra_{}.ana".format(data_id))
+            if os.path.isfile(filepath):
+                with open(filepath, 'r') as ana_file:
+                    ana_file_data = AnaFile()
+                    ana_file_data.read_total_spectra(ana_file)
+
+                    self.energies_eV = ana_file_data.energies_eV
+                    self.spectra[data_id] = ana_file_data.total_spectra
+
+            filepath = os.path.join(folder, "RawSpectra", "rawspect-{}.dat".format(data_id))
+            if os.path.isfile(filepath):
+                raw_spectra = RawSpectra()
+                raw_spectra.read_memmap(filepath, copy=True)
+                self.raw_spectra[data_id] = raw_spectra.raw_spectra
+
+        if pitch is None:
+            filepath_txt = os.path.join(folder, os.path.basename(folder) + ".txt")
+            if os.path.isfile(filepath_txt):
+                with open(filepath_txt, 'r', encoding="UTF-16") as text_file:
+                    text_parameters = TextParameters()
+                    text_parameters.read(text_file)
+                    pitch = _parse_length(getattr(text_parameters, "pitch", None))
+
+        number_points = max([len(spectra) for spectra in self.spectra.values()], default=0)
+        if pitch is None:
+            self.positions = np.arange(number_points, dtype=np.float64)
+            self.position_unit = POSITION_UNIT_POINT
+        else:
+            self.positions = np.arange(number_points) * pitch[0]
+            self.position_unit = pitch[1]
@@ -26,20 +26,93 @@ Spectral imaging map EELS data.
 ###############################################################################
 
 # Standard library modules.
+import math
 import os.path
+import logging
 
 # Third party modules.
+import numpy as np
 
 # Local modules.
 
 # Project modules.
 from pysemeels.hitachi.eels_su.map.ana_file import AnaFile
 from pysemeels.hitachi.eels_su.map.text_file import TextParameters
+from pysemeels.hdf5_storage import create_dataset, spectrum_image_chunks, SPECTRUM_IMAGE_STORAGE_OPTIONS
 
 # Globals and constants variables.
 HDF5_GROUP_SPECTRA_1 = "spectra 1"
 HDF5_GROUP_SPECTRA_2 = "spectra 2"
 HDF5_GROUP_SPECTRA_3 = "spectra 3"
+#: Name of the group of each .ana file data id.
+HDF5_GROUP_SPECTRA = {1: HDF5_GROUP_SPECTRA_1, 2: HDF5_GROUP_SPECTRA_2, 3: HDF5_GROUP_SPECTRA_3}
+
+#: Group of the extra parameters, the same group as :py:data:`pysemeels.raw_spectrum.HDF5_GROUP_EXTRA_PARAMETERS`.
+HDF5_GROUP_EXTRA_PARAMETERS = "extra parameters"
+
+#:
+HDF5_DATASET_ENERGIES_eV = "energies eV"
+#:
+HDF5_DATASET_SPECTRUM_IMAGE = "spectrum image"
+
+
+def _parse_size(value):
+    """
+    Parse a size "<columns>x<rows>" of the text file, e.g. the data size or the capture resolution.
+
+    :return: (rows, columns) or None if the value is not a size.
+    """
+    try:
+        columns, rows = value.lower().split('x')
+        return int(rows), int(columns)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _map_shape(number_points, text_parameters=None):
+    """
+    Find the (rows, columns) of a map from the data size or capture resolution of its text file.
+
+    The first size of the text file with the number of points is used. Otherwise the map is square if the number of
+    points is a square number, else the points are stored in one row.
+
+    :param int number_points: number of points of the map.
+    :param text_parameters: parameters of the map text file.
+    :type text_parameters: :py:class:`pysemeels.hitachi.eels_su.map.text_file.TextParameters`
+    :rtype: tuple
+    """
+    if text_parameters is not None:
+        for attribute_name in ["data_size", "capture_resolution"]:
+            shape = _parse_size(getattr(text_parameters, attribute_name, None))
+            if shape is not None and shape[0] * shape[1] == number_points:
+                return shape
+
+    size = math.isqrt(number_points)
+    if size * size == number_points:
+        return size, size
+
+    logging.warning("The shape of the map with %i points is unknown, the points are stored in one row", number_points)
+    return 1, number_points
+
+
+def _create_spectrum_image(spectra, shape=None, text_parameters=None):
+    """
+    Reshape the (points, channels) spectra of a map in a (rows, columns, channels) spectrum image.
+
+    :param spectra: spectrum of each point, in row order.
+    :param tuple shape: (rows, columns) of the map, found with :py:func:`_map_shape` if None.
+    :param text_parameters: parameters of the map text file, used to find the shape.
+    :type text_parameters: :py:class:`pysemeels.hitachi.eels_su.map.text_file.TextParameters`
+    :raises ValueError: If the number of points is not compatible with the map shape.
+    """
+    number_points, number_channels = spectra.shape
+    if shape is None:
+        shape = _map_shape(number_points, text_parameters)
+
+    if shape[0] * shape[1] != number_points:
+        raise ValueError("The {:d} points do not fit the map shape {}".format(number_points, shape))
+
+    return spectra.reshape(shape[0], shape[1], number_channels)
 
 
 class Map(object):
@@ -58,46 +131,138 @@ class Map(object):
 
         self.energies_eV = None
 
+        #: Spectrum image (rows, columns, channels) of each .ana file data id, a numpy array or a h5py dataset.
+        self.spectrum_images = {}
+
     def read_hdf5(self, parent_group):
+        """
+        Read the map from the HDF5 parent group.
+
+        The spectrum images are not read, they are h5py datasets and only the chunks of a slice are read from the file
+        when it is accessed, e.g. `spectrum_images[1][row, column, :]` or `spectrum_images[1][..., channel]`. The HDF5
+        file has to stay open while they are used.
+
+        :param `h5py.group` parent_group: read the data from this group.
+        :return: None.
+        :raises ValueError: If the parent group `parent_group` does not have the correct name.
+        """
         if self.name in parent_group:
             project_group = parent_group[self.name]
         else:
             raise ValueError("The parent group does not contain the project")
 
-    def write_hdf5(self, parent_group):
+        self.extra_parameters = {}
+        if HDF5_GROUP_EXTRA_PARAMETERS in project_group:
+            extra_parameters_group = project_group[HDF5_GROUP_EXTRA_PARAMETERS]
+            for name in extra_parameters_group.attrs:
+                self.extra_parameters[name] = extra_parameters_group.attrs[name]
+
+        if HDF5_DATASET_ENERGIES_eV in project_group:
+            self.energies_eV = project_group[HDF5_DATASET_ENERGIES_eV][...]
+
+        self.spectrum_images = {}
+        for data_id, group_name in HDF5_GROUP_SPECTRA.items():
+            if group_name in project_group and HDF5_DATASET_SPECTRUM_IMAGE in project_group[group_name]:
+                self.spectrum_images[data_id] = project_group[group_name][HDF5_DATASET_SPECTRUM_IMAGE]
+
+    def write_hdf5(self, parent_group, storage_options=None):
+        """
+        Write the map in the HDF5 parent group.
+
+        Each spectrum image is a chunked dataset with tiles of pixels and blocks of channels, see
+        :py:func:`pysemeels.hdf5_storage.spectrum_image_chunks`, with the energies attached as dimension scale of the
+        channels. The extra parameters are the attributes of the group :py:data:`HDF5_GROUP_EXTRA_PARAMETERS`.
+
+        :param `h5py.group` parent_group: write the data in this group.
+        :param storage_options: storage options of the spectrum images, gzip compression with shuffle if None.
+        :type storage_options: :py:class:`pysemeels.hdf5_storage.Hdf5StorageOptions`
+        :return: None.
+        """
         project_group = parent_group.require_group(self.name)
 
-    def import_data(self, folder, extra_parameters=None):
+        if storage_options is None:
+            storage_options = SPECTRUM_IMAGE_STORAGE_OPTIONS
+
+        if self.extra_parameters:
+            parameters_group = project_group.require_group(HDF5_GROUP_EXTRA_PARAMETERS)
+            for name in self.extra_parameters:
+                parameters_group.attrs[name] = self.extra_parameters[name]
+
+        energies_dataset = None
+        if self.energies_eV is not None:
+            energies_dataset = create_dataset(project_group, HDF5_DATASET_ENERGIES_eV, self.energies_eV)
+            energies_dataset.make_scale("energy (eV)")
+
+        for data_id, spectrum_image in sorted(self.spectrum_images.items()):
+            spectrum_image = np.asarray(spectrum_image)
+            spectra_group = project_group.require_group(HDF5_GROUP_SPECTRA[data_id])
+            chunks = spectrum_image_chunks(spectrum_image.shape, spectrum_image.dtype.itemsize)
+            dataset = create_dataset(spectra_group, HDF5_DATASET_SPECTRUM_IMAGE, spectrum_image, storage_options,
+                                     is_counts=True, chunks=chunks)
+
+            if energies_dataset is not None and len(energies_dataset) == spectrum_image.shape[2]:
+                dataset.dims[2].attach_scale(energies_dataset)
+
+    def get_spectrum(self, data_id, row, column):
+        """
+        Return the spectrum of one pixel.
+
+        :param int data_id: .ana file data id.
+        :param int row: row of the pixel.
+        :param int column: column of the pixel.
+        :return: the counts of each channel.
+        """
+        return self.spectrum_images[data_id][row, column, :]
+
+    def get_energy_image(self, data_id, channel):
+        """
+        Return the image of one energy channel.
+
+        :param int data_id: .ana file data id.
+        :param int channel: energy channel.
+        :return: the counts of each pixel, shape (rows, columns).
+        """
+        return self.spectrum_images[data_id][:, :, channel]
+
+    def import_data(self, folder, extra_parameters=None, shape=None):
         """
         Import the EELS spectral map data (ana file).
 
+        The total spectrum of each point of a .ana file is stored as a spectrum image with shape
+        (rows, columns, channels).
+
         :param str folder: Folder that contain the .ana file.
         :param dict extra_parameters: Extra parameters to add as attribute in this data group.
+        :param tuple shape: (rows, columns) of the map, if None the shape is found from the data size or capture
+            resolution of the text file, see :py:func:`_map_shape`.
         :return: None.
+        :raises ValueError: If the number of points is not compatible with the map shape.
         """
         if extra_parameters:
             self.extra_parameters.update(extra_parameters)
 
+        name = os.path.basename(folder)
+        filepath_txt = os.path.join(folder, name + ".txt")
+        with open(filepath_txt, 'r', encoding="UTF-16") as text_file:
+            text_parameters = TextParameters()
+            text_parameters.read(text_file)
+
+            # self.eels_parameters.update(text_parameters.items())
+
         for data_id in [1, 2, 3]:
             filename = "spectra_{}.ana".format(data_id)
             filepath = os.path.join(folder, filename)
             if os.path.isfile(filepath):
                 with open(filepath, 'r') as ana_file:
                     ana_file_data = AnaFile()
-                    ana_file_data.read(ana_file)
+                    ana_file_data.read_total_spectra(ana_file)
 
                     self.energies_eV = ana_file_data.energies_eV
+                    self.spectrum_images[data_id] = _create_spectrum_image(ana_file_data.total_spectra, shape,
+                                                                           text_parameters)
                     # self.energies_eV = np.array(elv_data.energies_eV)
                     # self.raw_counts = np.array(elv_data.raw_counts)
                     # self.gain_corrections = np.array(elv_data.gain_corrections)
                     # self.dark_currents = np.array(elv_data.dark_currents)
                     #
                     # self.eels_parameters.update(elv_data.parameters())
-
-        name = os.path.basename(folder)
-        filepath_txt = os.path.join(folder, name + ".txt")
-        with open(filepath_txt, 'r', encoding="UTF-16") as text_file:
-            text_parameters = TextParameters()
-            text_parameters.read(text_file)
-
-            # self.eels_parameters.update(text_parameters.items())
@@ -28,6 +28,10 @@ Convert elv file in batch mode.
 # Standard library modules.
 import os
 import logging
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 # Third party modules.
 
@@ -35,32 +39,215 @@ import logging
 
 # Project modules.
 from pysemeels.tools.convert_elv import ConvertElv
+from pysemeels.tools.conversion_manifest import ConversionManifest
+from pysemeels.tools.task_window import iterate_chunk_results, maximum_pending_tasks
 
 # Globals and constants variables.
+BatchConvertSummary = namedtuple('BatchConvertSummary', ['number_files', 'number_failed', 'number_skipped', 'size_MB',
+                                                         'time_s', 'files_per_s', 'MB_per_s'])
+
+
+def _msa_file_path(elv_file_path):
+    return os.path.splitext(elv_file_path)[0] + ".msa"
+
+
+def _convert_elv_file(elv_file_path, overwrite, manifest_root_path=None, fast_parser=False):
+    """
+    Convert one elv file and catch any error, so one bad file does not abort the batch.
+
+    The manifest records are created by :py:class:`pysemeels.tools.convert_elv.ConvertElv` in a manifest local to
+    this call and returned to the caller, which is the only writer of the batch manifest.
+
+    :param str elv_file_path: elv file to convert.
+    :param bool overwrite: overwrite the existing msa file.
+    :param str manifest_root_path: root folder of the batch manifest, no manifest record is created if None.
+    :param bool fast_parser: read the elv file with the fast parser.
+    :return: the file path, the file size in bytes, the error message or None if the conversion succeeded and the
+        manifest records of the converted files, empty if the file was skipped.
+    """
+    try:
+        size_B = os.path.getsize(elv_file_path)
+    except OSError:
+        size_B = 0
+
+    manifest = None
+    if manifest_root_path is not None:
+        manifest = ConversionManifest(manifest_root_path)
+
+    try:
+        convert_elv = ConvertElv(elv_file_path, overwrite=overwrite, manifest=manifest, fast_parser=fast_parser)
+        convert_elv.convert()
+    except Exception as message:
+        return elv_file_path, size_B, "{}: {}".format(type(message).__name__, message), {}
+
+    records = {}
+    if manifest is not None:
+        records = manifest.records
+
+    return elv_file_path, size_B, None, records
+
+
+def _convert_elv_files(elv_file_paths, overwrite, manifest_root_path=None, fast_parser=False):
+    """
+    Convert a chunk of elv files, see :py:func:`_convert_elv_file`.
+
+    :return: the list of results of each elv file.
+    """
+    return [_convert_elv_file(elv_file_path, overwrite, manifest_root_path, fast_parser)
+            for elv_file_path in elv_file_paths]
 
 
 class BatchConvertElv(object):
-    def __init__(self, path, overwrite=True, recursive=True):
+    def __init__(self, path, overwrite=True, recursive=True, workers=1, chunk_size=16, incremental=False,
+                 manifest_file_path=None, fast_parser=False):
+        """
+
+        :param str path: folder with the elv files.
+        :param bool overwrite: overwrite existing converted files.
+        :param bool recursive: search the elv files in the sub folders.
+        :param int workers: number of worker processes, 1 converts the files in this process and None uses all CPUs.
+        :param int chunk_size: number of files sent to a worker process in each task.
+        :param bool incremental: only convert the elv files that are new or changed since the last conversion.
+        :param str manifest_file_path: manifest of the converted files used in incremental mode,
+            see :py:class:`pysemeels.tools.conversion_manifest.ConversionManifest` for the default.
+        :param bool fast_parser: read the elv files with the fast parser, see
+            :py:meth:`pysemeels.hitachi.eels_su.elv_file.ElvFile.read_fast`.
+        """
         self.path = path
 
         self.overwrite = overwrite
         self.recursive = recursive
 
-    def convert(self):
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+        self.incremental = incremental
+        self.manifest_file_path = manifest_file_path
+
+        self.fast_parser = fast_parser
+
+        #: List of (file path, error message) of the files that could not be converted.
+        self.failed_files = []
+        self.summary = None
+
+    def find_elv_files(self):
+        """
+        Return the elv file paths to convert.
+        """
+        elv_file_paths = []
         if self.recursive:
             for current_path, folder_names, filenames in os.walk(self.path):
                 for file_name in filenames:
                     if file_name.endswith(".elv"):
-                        logging.info(file_name)
-                        elv_file_path = os.path.join(current_path, file_name)
-                        convert_elv = ConvertElv(elv_file_path, self.overwrite)
-                        convert_elv.convert()
+                        elv_file_paths.append(os.path.join(current_path, file_name))
         else:
             for file_name in os.listdir(self.path):
                 if file_name.endswith(".elv"):
-                    logging.info(file_name)
-                    elv_file_path = os.path.join(self.path, file_name)
-                    convert_elv = ConvertElv(elv_file_path, self.overwrite)
-                    convert_elv.convert()
+                    elv_file_paths.append(os.path.join(self.path, file_name))
+
+        return elv_file_paths
+
+    def convert(self):
+        """
+        Convert all elv files, in parallel if `workers` is not 1.
+
+        :return: the number of files, failures and the throughput of the conversion.
+        :rtype: :py:class:`BatchConvertSummary`
+        """
+        start_time_s = time.perf_counter()
+
+        elv_file_paths = self.find_elv_files()
+
+        manifest = None
+        number_skipped = 0
+        if self.incremental:
+            manifest = ConversionManifest(self.path, self.manifest_file_path)
+            manifest.load()
+
+            number_found = len(elv_file_paths)
+            elv_file_paths = [elv_file_path for elv_file_path in elv_file_paths
+                              if not manifest.is_up_to_date(elv_file_path, _msa_file_path(elv_file_path))]
+            number_skipped = number_found - len(elv_file_paths)
+            logging.info("Skip %i unchanged elv files", number_skipped)
+
+        number_files = len(elv_file_paths)
+
+        self.failed_files = []
+        size_B = 0
+
+        manifest_root_path = None
+        if manifest is not None:
+            manifest_root_path = manifest.root_path
+        if self.workers == 1:
+            results = map(_convert_elv_file, elv_file_paths, repeat(self.overwrite), repeat(manifest_root_path),
+                          repeat(self.fast_parser))
+            size_B = self._collect_results(results, number_files, manifest)
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = self._iterate_results(executor, elv_file_paths, manifest_root_path)
+                size_B = self._collect_results(results, number_files, manifest)
+
+        if manifest is not None:
+            manifest.save()
+
+        time_s = time.perf_counter() - start_time_s
+
+        size_MB = size_B / 1.0e6
+        if time_s > 0.0:
+            files_per_s = number_files / time_s
+            MB_per_s = size_MB / time_s
+        else:
+            files_per_s = 0.0
+            MB_per_s = 0.0
+
+        self.summary = BatchConvertSummary(number_files, len(self.failed_files), number_skipped, size_MB, time_s,
+                                           files_per_s, MB_per_s)
+
+        logging.info("Converted %i elv files (%i failed, %i skipped), %.1f MB in %.1f s: %.1f files/s, %.2f MB/s",
+                     number_files - len(self.failed_files), len(self.failed_files), number_skipped, size_MB, time_s,
+                     files_per_s, MB_per_s)
+
+        return self.summary
+
+    def _iterate_results(self, executor, elv_file_paths, manifest_root_path=None):
+        """
+        Submit the chunks of elv files to the executor and yield the results in the order of the elv files.
+
+        At most :py:data:`pysemeels.tools.task_window.MAX_PENDING_TASKS_PER_WORKER` tasks per worker are pending, so
+        the memory used by the submitted tasks and their results does not grow with the number of elv files.
+        """
+        arguments = (self.overwrite, manifest_root_path, self.fast_parser)
+        return iterate_chunk_results(executor, _convert_elv_files, elv_file_paths, arguments, self.chunk_size,
+                                     maximum_pending_tasks(self.workers))
+
+    def _collect_results(self, results, number_files, manifest=None):
+        size_B = 0
+        progress_step = max(1, number_files // 20)
+
+        for file_id, (elv_file_path, file_size_B, error_message, records) in enumerate(results, start=1):
+            size_B += file_size_B
+            if error_message is None:
+                logging.info(elv_file_path)
+                if manifest is not None:
+                    manifest.records.update(records)
+            else:
+                logging.error("Cannot convert %s: %s", elv_file_path, error_message)
+                self.failed_files.append((elv_file_path, error_message))
+
+            if file_id % progress_step == 0 or file_id == number_files:
+                logging.info("Progress: %i/%i elv files", file_id, number_files)
+
+        return size_B
+
 
+if __name__ == '__main__':
+    import sys
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) > 1:
+        path = sys.argv[1]
+        workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        batch_convert_elv = BatchConvertElv(path, workers=workers)
 
+        batch_convert_elv.convert()
+    else:
+        print("Usage: python batch_convert_elv.py path [workers]")
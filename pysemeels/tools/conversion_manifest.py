@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeels.tools.conversion_manifest
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Manifest of the converted files used to only convert new or modified files.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os
+import json
+import hashlib
+import logging
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+
+# Globals and constants variables.
+#: Default file name of the manifest written in the data root folder.
+MANIFEST_FILENAME = ".pysemeels_conversion_manifest.json"
+
+MANIFEST_VERSION = 1
+
+KEY_SIZE_B = "size (B)"
+KEY_MTIME_ns = "mtime (ns)"
+KEY_SHA256 = "sha256"
+
+
+def compute_file_hash(file_path, block_size_B=1 << 20):
+    """
+    Compute the SHA-256 hash of a file content.
+
+    :param str file_path: file to hash.
+    :param int block_size_B: size of the blocks read from the file.
+    :return: hexadecimal digest of the file content.
+    :rtype: str
+    """
+    file_hash = hashlib.sha256()
+    with open(file_path, 'rb') as input_file:
+        for block in iter(lambda: input_file.read(block_size_B), b''):
+            file_hash.update(block)
+
+    return file_hash.hexdigest()
+
+
+def create_record(file_path):
+    """
+    Create the manifest record (size, modification time and content hash) of a source file.
+
+    :param str file_path: source file.
+    :rtype: dict
+    """
+    stat = os.stat(file_path)
+    record = {KEY_SIZE_B: stat.st_size,
+              KEY_MTIME_ns: stat.st_mtime_ns,
+              KEY_SHA256: compute_file_hash(file_path)}
+    return record
+
+
+class ConversionManifest(object):
+    """
+    Persistent JSON index of the converted source files.
+
+    Each source file path, relative to the root folder, is recorded with its size, modification time and content hash.
+    A source file needs to be converted again only if its size or content changed, or if its output file is missing.
+    The content hash is only computed when the size is the same and the modification time changed.
+    """
+    def __init__(self, root_path, file_path=None):
+        """
+
+        :param str root_path: root folder of the source files.
+        :param str file_path: manifest file path, the file :py:data:`MANIFEST_FILENAME` in `root_path` if None.
+        """
+        self.root_path = root_path
+
+        if file_path is None:
+            file_path = os.path.join(root_path, MANIFEST_FILENAME)
+        self.file_path = file_path
+
+        self.records = {}
+
+    def load(self):
+        """
+        Read the manifest file, start with an empty manifest if the file does not exist or is invalid.
+        """
+        self.records = {}
+
+        if os.path.isfile(self.file_path):
+            try:
+                with open(self.file_path, 'r', encoding="UTF-8") as manifest_file:
+                    data = json.load(manifest_file)
+                if data.get("version") == MANIFEST_VERSION:
+                    self.records = data.get("records", {})
+            except (ValueError, OSError) as message:
+                logging.warning("Cannot read manifest %s: %s", self.file_path, message)
+
+    def save(self):
+        """
+        Write the manifest file, a temporary file is replaced to avoid a corrupted manifest.
+        """
+        data = {"version": MANIFEST_VERSION, "records": self.records}
+
+        temporary_file_path = self.file_path + ".tmp"
+        with open(temporary_file_path, 'w', encoding="UTF-8") as manifest_file:
+            json.dump(data, manifest_file, indent=1, sort_keys=True)
+        os.replace(temporary_file_path, self.file_path)
+
+    def _key(self, source_file_path):
+        return os.path.relpath(os.path.abspath(source_file_path), os.path.abspath(self.root_path)).replace(os.sep, '/')
+
+    def is_up_to_date(self, source_file_path, output_file_path=None):
+        """
+        Check if the source file was already converted and did not change since.
+
+        :param str source_file_path: source file.
+        :param str output_file_path: converted file, the source file is not up to date if this file does not exist.
+        :rtype: bool
+        """
+        if output_file_path is not None and not os.path.isfile(output_file_path):
+            return False
+
+        key = self._key(source_file_path)
+        if key not in self.records:
+            return False
+        record = self.records[key]
+
+        stat = os.stat(source_file_path)
+        if stat.st_size != record[KEY_SIZE_B]:
+            return False
+        if stat.st_mtime_ns == record[KEY_MTIME_ns]:
+            return True
+
+        if compute_file_hash(source_file_path) == record[KEY_SHA256]:
+            record[KEY_MTIME_ns] = stat.st_mtime_ns
+            return True
+
+        return False
+
+    def update(self, source_file_path, record=None):
+        """
+        Record the source file as converted.
+
+        :param str source_file_path: source file.
+        :param dict record: record from :py:func:`create_record`, computed from the file if None.
+        """
+        if record is None:
+            record = create_record(source_file_path)
+
+        self.records[self._key(source_file_path)] = record
+
+    def remove(self, source_file_path):
+        """
+        Remove the source file from the manifest.
+        """
+        self.records.pop(self._key(source_file_path), None)
@@ -27,6 +27,7 @@ Convert an elv file into msa and/or hdf5 file.
 
 # Standard library modules.
 import os.path
+import logging
 
 # Third party modules.
 
@@ -34,33 +35,83 @@ import os.path
 
 # Project modules.
 from pysemeels.hitachi.eels_su.elv_file import ElvFile
+from pysemeels.tools.conversion_manifest import create_record
 
 # Globals and constants variables.
 
 
 class ConvertElv(object):
-    def __init__(self, elv_file_path, convert_msa=True, convert_hdf5=False):
+    def __init__(self, elv_file_path, convert_msa=True, convert_hdf5=False, overwrite=True, manifest=None,
+                 fast_parser=False):
+        """
+
+        :param str elv_file_path: elv file to convert.
+        :param bool convert_msa: convert the elv file into a msa file.
+        :param bool convert_hdf5: convert the elv file into a hdf5 file.
+        :param bool overwrite: overwrite the converted file if it already exists.
+        :param manifest: if not None, the msa file is only generated if the elv file is new or changed.
+        :type manifest: :py:class:`pysemeels.tools.conversion_manifest.ConversionManifest`
+        :param bool fast_parser: read the elv file with the fast parser, see
+            :py:meth:`pysemeels.hitachi.eels_su.elv_file.ElvFile.read_fast`.
+        """
         self.elv_file_path = elv_file_path
 
         self.convert_msa = convert_msa
         self.convert_hdf5 = convert_hdf5
 
+        self.overwrite = overwrite
+        self.manifest = manifest
+        self.fast_parser = fast_parser
+
         self.msa_file_path = None
         self.hdf5_file_path = None
 
     def convert(self):
+        """
+        Convert the elv file.
+
+        :return: True if the msa file was written, False if it was skipped or not requested.
+        :rtype: bool
+        """
+        converted = False
         if self.convert_msa:
-            self.generate_msa()
+            converted = self.generate_msa()
         if self.convert_hdf5:
             self.generate_hdf5()
 
+        return converted
+
     def generate_msa(self):
-        if self.msa_file_path is None:
+        """
+        Generate the msa file.
+
+        :return: True if the msa file was written, False if it was skipped.
+        :rtype: bool
+        """
+        file_path = self.msa_file_path
+        if file_path is None:
             file_path, _extension = os.path.splitext(self.elv_file_path)
             file_path += ".msa"
 
+        if os.path.isfile(file_path):
+            if not self.overwrite:
+                logging.debug("Skip existing msa file: %s", file_path)
+                return False
+            if self.manifest is not None and self.manifest.is_up_to_date(self.elv_file_path, file_path):
+                logging.debug("Skip unchanged elv file: %s", self.elv_file_path)
+                return False
+
+        record = None
+        if self.manifest is not None:
+            record = create_record(self.elv_file_path)
+
         with open(self.elv_file_path, 'r', encoding="ANSI", errors='ignore') as elv_text_file:
             elv_file = ElvFile()
-            elv_file.read(elv_text_file)
+            elv_file.read(elv_text_file, fast=self.fast_parser)
 
             elv_file.export_msa(file_path)
+
+        if self.manifest is not None:
+            self.manifest.update(self.elv_file_path, record)
+
+        return True
@@ -28,6 +28,10 @@ Generate HDF5 file from Hitachi EELS data.
 # Standard library modules.
 import os.path
 import logging
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 # Third party modules.
 import numpy as np
@@ -38,101 +42,270 @@ import numpy as np
 from pysemeels.hitachi.eels_su.elv_text_file import ElvTextParameters
 from pysemeels.hitachi.eels_su.elv_file import ElvFile
 from pysemeels.tools.hdf5_file_labels import *
+from pysemeels.calibration_store import CalibrationStore, HDF5_GROUP_CALIBRATIONS
+from pysemeels.metadata_index import MetadataIndex, METADATA_INDEX_CHUNK_ROWS
+from pysemeels.tools.task_window import iterate_chunk_results, maximum_pending_tasks
 
 # Globals and constants variables.
+#: Spectrum read from a .elv/.txt pair, ready to be written in the HDF5 file.
+ParsedSpectrum = namedtuple('ParsedSpectrum', ['name', 'attributes', 'energies_eV', 'counts', 'raw_counts',
+                                               'gain_corrections', 'dark_currents'])
+
+
+def _compare_attribute(attributes, attribute_name, attribute_value):
+    if attribute_name in attributes:
+        if attribute_value != attributes[attribute_name]:
+            logging.error("{} is not the same in .txt and .elv files".format(attribute_name))
+    else:
+        attributes[attribute_name] = attribute_value
+
+
+def parse_spectrum(file_path, name=None, fast_parser=False):
+    """
+    Read the .elv file and its .txt parameters file without writing anything.
+
+    The parsing is independent of the HDF5 file, so it can be done in a worker process, see
+    :py:meth:`GenerateHdf5File.add_spectra`.
+
+    :param str file_path: path of the .elv file, the .txt file has the same name.
+    :param str name: name of the spectrum group, the file name without extension if None.
+    :param bool fast_parser: read the .elv file with the fast parser, see
+        :py:meth:`pysemeels.hitachi.eels_su.elv_file.ElvFile.read_fast`.
+    :rtype: :py:class:`ParsedSpectrum`
+    """
+    if name is None:
+        basename, _extension = os.path.splitext(os.path.basename(file_path))
+        name = basename
+
+    attributes = {}
+
+    elv_text_file_path, _extension = os.path.splitext(file_path)
+    elv_text_file_path += '.txt'
+    with open(elv_text_file_path, 'r', encoding="UTF-16", errors='ignore') as elv_text_file:
+        elv_text_parameters = ElvTextParameters()
+        elv_text_parameters.read(elv_text_file)
+
+        attributes[HDF5_MODEL] = elv_text_parameters.model
+        attributes[HDF5_SAMPLE_HEIGHT] = elv_text_parameters.sample_height_mm
+        attributes[HDF5_FILE_PATH] = elv_text_parameters.file_name
+        attributes[HDF5_COMMENT] = elv_text_parameters.comment
+        attributes[HDF5_DATE] = elv_text_parameters.date
+        attributes[HDF5_TIME] = elv_text_parameters.time
+        attributes[HDF5_ACCELERATING_VOLTAGE_V] = elv_text_parameters.accelerating_voltage_V
+        attributes[HDF5_ENERGY_WIDTH_eV] = elv_text_parameters.energy_width_eV
+        attributes[HDF5_ENERGY_LOSS] = elv_text_parameters.energy_loss_eV
+        attributes[HDF5_ACQUISITION_SPEED] = elv_text_parameters.speed_us
+
+    with open(file_path, 'r', encoding="ANSI", errors='ignore') as elv_text_file:
+        elv_file = ElvFile()
+        elv_file.read(elv_text_file, fast=fast_parser)
+
+        _compare_attribute(attributes, HDF5_DATE, elv_file.date)
+        _compare_attribute(attributes, HDF5_TIME, elv_file.time)
+        _compare_attribute(attributes, HDF5_COMMENT, elv_file.comment)
+        _compare_attribute(attributes, HDF5_ACQUISITION_SPEED, elv_file.dose)
+        _compare_attribute(attributes, HDF5_ENERGY_LOSS, elv_file.le)
+
+        attributes[HDF5_RAW] = elv_file.raw
+
+        _compare_attribute(attributes, HDF5_ENERGY_WIDTH_eV, elv_file.energy_width)
+
+        attributes[HDF5_DUAL_DET_POSITION] = elv_file.dual_det_position
+        attributes[HDF5_DUAL_DET_POST] = elv_file.dual_det_post
+        attributes[HDF5_DUAL_DET_CENTER] = elv_file.dual_det_center
+        attributes[HDF5_Q1] = elv_file.q1
+        attributes[HDF5_Q1S] = elv_file.q1s
+        attributes[HDF5_Q2] = elv_file.q2
+        attributes[HDF5_Q2S] = elv_file.q2s
+        attributes[HDF5_Q3] = elv_file.q3
+        attributes[HDF5_H1] = elv_file.h1
+        attributes[HDF5_H1S] = elv_file.h1s
+        attributes[HDF5_H2] = elv_file.h2
+        attributes[HDF5_H2S] = elv_file.h2s
+        attributes[HDF5_H4] = elv_file.h4
+        attributes[HDF5_ELV_X] = elv_file.elv_x
+        attributes[HDF5_ELV_Y] = elv_file.elv_y
+        attributes[HDF5_SPECTRUM_ALIGNMENT_X] = elv_file.spectrum_alignment_x
+        attributes[HDF5_SPECTRUM_ALIGNMENT_Y] = elv_file.spectrum_alignment_y
+        attributes[HDF5_DET_SPEC_ALIGNMENT_X] = elv_file.det_spec_alignment_x
+        attributes[HDF5_DET_SPEC_ALIGNMENT_Y] = elv_file.det_spec_alignment_y
+        attributes[HDF5_DET_MAP_ALIGNMENT_X] = elv_file.det_map_alignment_x
+        attributes[HDF5_DET_MAP_ALIGNMENT_Y] = elv_file.det_map_alignment_y
+
+        attributes[HDF5_MAGNIFICATION] = elv_file.mag
+
+        return ParsedSpectrum(name, attributes,
+                              np.array(elv_file.energies_eV[:-1], dtype=float),
+                              np.array(elv_file.counts[:-1], dtype=float),
+                              np.array(elv_file.raw_counts[:-1], dtype=float),
+                              np.array(elv_file.gain_corrections[:-1], dtype=float),
+                              np.array(elv_file.dark_currents[:-1], dtype=float))
+
+
+def _parse_spectrum(file_path, name, fast_parser=False):
+    """
+    Parse one spectrum and catch any error, so one bad file does not abort the batch.
+
+    :return: the file path, the parsed spectrum or None and the error message or None if the parsing succeeded.
+    """
+    try:
+        parsed_spectrum = parse_spectrum(file_path, name, fast_parser)
+    except Exception as message:
+        return file_path, None, "{}: {}".format(type(message).__name__, message)
+
+    return file_path, parsed_spectrum, None
+
+
+def _parse_spectra(file_paths_names, fast_parser=False):
+    """
+    Parse a chunk of spectra, see :py:func:`_parse_spectrum`.
+
+    :param list file_paths_names: (file path, name) of each spectrum.
+    :param bool fast_parser: read the .elv files with the fast parser.
+    :return: the list of results of each spectrum.
+    """
+    return [_parse_spectrum(file_path, name, fast_parser) for file_path, name in file_paths_names]
 
 
 class GenerateHdf5File(object):
-    def __init__(self, hdf5_file):
+    def __init__(self, hdf5_file, deduplicate_calibrations=False, metadata_index=False):
+        """
+
+        :param `h5py.File` hdf5_file: HDF5 file where the spectra are added.
+        :param bool deduplicate_calibrations: store each distinct gain corrections and dark currents vector once in the
+            root group :py:data:`pysemeels.calibration_store.HDF5_GROUP_CALIBRATIONS` and link them in the spectrum
+            groups, the spectrum dataset then only has the energies, counts and raw counts columns.
+        :param bool metadata_index: add the attributes of each spectrum in the root dataset
+            :py:data:`pysemeels.metadata_index.HDF5_DATASET_METADATA_INDEX`, see
+            :py:class:`pysemeels.metadata_index.MetadataIndex`.
+        """
         self.hdf5_file = hdf5_file
 
-    def add_spectrum(self, file_path, name=None):
-        if name is None:
-            basename, _extension = os.path.splitext(os.path.basename(file_path))
-            name = basename
-
-        spectrum_group = self.hdf5_file.create_group(name)
-
-        elv_text_file_path, _extension = os.path.splitext(file_path)
-        elv_text_file_path += '.txt'
-        with open(elv_text_file_path, 'r', encoding="UTF-16", errors='ignore') as elv_text_file:
-            elv_text_parameters = ElvTextParameters()
-            elv_text_parameters.read(elv_text_file)
-
-            spectrum_group.attrs[HDF5_MODEL] = elv_text_parameters.model
-            spectrum_group.attrs[HDF5_SAMPLE_HEIGHT] = elv_text_parameters.sample_height_mm
-            spectrum_group.attrs[HDF5_FILE_PATH] = elv_text_parameters.file_name
-            spectrum_group.attrs[HDF5_COMMENT] = elv_text_parameters.comment
-            spectrum_group.attrs[HDF5_DATE] = elv_text_parameters.date
-            spectrum_group.attrs[HDF5_TIME] = elv_text_parameters.time
-            spectrum_group.attrs[HDF5_ACCELERATING_VOLTAGE_V] = elv_text_parameters.accelerating_voltage_V
-            spectrum_group.attrs[HDF5_ENERGY_WIDTH_eV] = elv_text_parameters.energy_width_eV
-            spectrum_group.attrs[HDF5_ENERGY_LOSS] = elv_text_parameters.energy_loss_eV
-            spectrum_group.attrs[HDF5_ACQUISITION_SPEED] = elv_text_parameters.speed_us
-
-        with open(file_path, 'r', encoding="ANSI", errors='ignore') as elv_text_file:
-            elv_file = ElvFile()
-            elv_file.read(elv_text_file)
-
-            self.compare_attribute(spectrum_group, HDF5_DATE, elv_file.date)
-            self.compare_attribute(spectrum_group, HDF5_TIME, elv_file.time)
-            self.compare_attribute(spectrum_group, HDF5_COMMENT, elv_file.comment)
-            self.compare_attribute(spectrum_group, HDF5_ACQUISITION_SPEED, elv_file.dose)
-            self.compare_attribute(spectrum_group, HDF5_ENERGY_LOSS, elv_file.le)
-
-            spectrum_group.attrs[HDF5_RAW] = elv_file.raw
-
-            self.compare_attribute(spectrum_group, HDF5_ENERGY_WIDTH_eV, elv_file.energy_width)
-
-            spectrum_group.attrs[HDF5_DUAL_DET_POSITION] = elv_file.dual_det_position
-            spectrum_group.attrs[HDF5_DUAL_DET_POST] = elv_file.dual_det_post
-            spectrum_group.attrs[HDF5_DUAL_DET_CENTER] = elv_file.dual_det_center
-            spectrum_group.attrs[HDF5_Q1] = elv_file.q1
-            spectrum_group.attrs[HDF5_Q1S] = elv_file.q1s
-            spectrum_group.attrs[HDF5_Q2] = elv_file.q2
-            spectrum_group.attrs[HDF5_Q2S] = elv_file.q2s
-            spectrum_group.attrs[HDF5_Q3] = elv_file.q3
-            spectrum_group.attrs[HDF5_H1] = elv_file.h1
-            spectrum_group.attrs[HDF5_H1S] = elv_file.h1s
-            spectrum_group.attrs[HDF5_H2] = elv_file.h2
-            spectrum_group.attrs[HDF5_H2S] = elv_file.h2s
-            spectrum_group.attrs[HDF5_H4] = elv_file.h4
-            spectrum_group.attrs[HDF5_ELV_X] = elv_file.elv_x
-            spectrum_group.attrs[HDF5_ELV_Y] = elv_file.elv_y
-            spectrum_group.attrs[HDF5_SPECTRUM_ALIGNMENT_X] = elv_file.spectrum_alignment_x
-            spectrum_group.attrs[HDF5_SPECTRUM_ALIGNMENT_Y] = elv_file.spectrum_alignment_y
-            spectrum_group.attrs[HDF5_DET_SPEC_ALIGNMENT_X] = elv_file.det_spec_alignment_x
-            spectrum_group.attrs[HDF5_DET_SPEC_ALIGNMENT_Y] = elv_file.det_spec_alignment_y
-            spectrum_group.attrs[HDF5_DET_MAP_ALIGNMENT_X] = elv_file.det_map_alignment_x
-            spectrum_group.attrs[HDF5_DET_MAP_ALIGNMENT_Y] = elv_file.det_map_alignment_y
-
-            spectrum_group.attrs[HDF5_MAGNIFICATION] = elv_file.mag
-
-            data = np.zeros((1023, 5))
-            data[:, 0] = elv_file.energies_eV[:-1]
-            data[:, 1] = elv_file.counts[:-1]
-            data[:, 2] = elv_file.raw_counts[:-1]
-            data[:, 3] = elv_file.gain_corrections[:-1]
-            data[:, 4] = elv_file.dark_currents[:-1]
-
-            spectrum_data_set = spectrum_group.create_dataset(HDF5_SPECTRUM, data=data)
-
-            data = np.arange(1, 1023+1)
-            spectrum_channel_data_set = spectrum_group.create_dataset(HDF5_SPECTRUM_CHANNELS, data=data)
-            spectrum_data_set.dims.create_scale(spectrum_channel_data_set, HDF5_SPECTRUM_CHANNEL)
-            spectrum_data_set.dims[0].attach_scale(spectrum_channel_data_set)
-
-            data_types = [HDF5_SPECTRUM_ENERGIES_eV, HDF5_SPECTRUM_COUNTS, HDF5_SPECTRUM_RAW_COUNTS,
-                          HDF5_SPECTRUM_GAIN_CORRECTIONS, HDF5_SPECTRUM_DARK_CURRENTS]
-            max_size = max([len(data_type) for data_type in data_types])
-            data = np.array(data_types, dtype="S{}".format(max_size+1))
-            spectrum_types_data_set = spectrum_group.create_dataset(HDF5_SPECTRUM_DATA_TYPES, data=data)
-            spectrum_data_set.dims.create_scale(spectrum_types_data_set, HDF5_SPECTRUM_DATA_TYPE)
-            spectrum_data_set.dims[1].attach_scale(spectrum_types_data_set)
+        self.calibration_store = None
+        if deduplicate_calibrations:
+            self.calibration_store = CalibrationStore(self.hdf5_file.require_group(HDF5_GROUP_CALIBRATIONS))
 
-    def compare_attribute(self, spectrum_group, attribute_name, attribute_value):
-        if attribute_name in spectrum_group.attrs:
-            if attribute_value != spectrum_group.attrs[attribute_name]:
-                logging.error("{} is not the same in .txt and .elv files".format(attribute_name))
+        self.metadata_index = None
+        if metadata_index:
+            self.metadata_index = MetadataIndex(self.hdf5_file)
+
+        #: List of (file path, error message) of the files that could not be added by :py:meth:`add_spectra`.
+        self.failed_files = []
+
+    def add_spectrum(self, file_path, name=None, fast_parser=False):
+        self.write_spectrum(parse_spectrum(file_path, name, fast_parser))
+
+    def add_spectra(self, file_paths, names=None, workers=None, chunk_size=4, fast_parser=False):
+        """
+        Add many spectra, the files are parsed in parallel by worker processes and written by this process only.
+
+        h5py writes must be serialized, so the workers only return the arrays and attributes of each spectrum,
+        through the result queue of the :py:class:`concurrent.futures.ProcessPoolExecutor`, and this process writes
+        them in the HDF5 file in the order of `file_paths` as they arrive. At most
+        :py:data:`pysemeels.tools.task_window.MAX_PENDING_TASKS_PER_WORKER` tasks per worker are pending, so the
+        parsed spectra waiting to be written do not pile up in memory when the writer is slower than the workers.
+        A file that cannot be parsed is logged and added to :py:attr:`failed_files`. The rows of the metadata index
+        are kept in memory and written every :py:data:`pysemeels.metadata_index.METADATA_INDEX_CHUNK_ROWS` spectra
+        and at the end, instead of one dataset write for each spectrum.
+
+        :param list file_paths: paths of the .elv files.
+        :param list names: names of the spectrum groups, the file names without extension if None.
+        :param int workers: number of worker processes, 1 parses the files in this process and None uses all CPUs.
+        :param int chunk_size: number of files sent to a worker process in each task.
+        :param bool fast_parser: read the .elv files with the fast parser, see :py:func:`parse_spectrum`.
+        :return: the number of spectra added.
+        :rtype: int
+        """
+        file_paths = list(file_paths)
+        if names is None:
+            names = [None] * len(file_paths)
+
+        start_time_s = time.perf_counter()
+
+        if workers == 1:
+            number_spectra = self._write_results(map(_parse_spectrum, file_paths, names, repeat(fast_parser)))
         else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = iterate_chunk_results(executor, _parse_spectra, list(zip(file_paths, names)), (fast_parser,),
+                                                chunk_size, maximum_pending_tasks(workers))
+                number_spectra = self._write_results(results)
+
+        time_s = time.perf_counter() - start_time_s
+        logging.info("Added %i spectra (%i failed) in %.1f s", number_spectra, len(file_paths) - number_spectra,
+                     time_s)
+
+        return number_spectra
+
+    def _write_results(self, results):
+        number_spectra = 0
+        metadata_rows = []
+        try:
+            for file_path, parsed_spectrum, error_message in results:
+                if error_message is None:
+                    self._write_spectrum_group(parsed_spectrum)
+                    number_spectra += 1
+
+                    if self.metadata_index is not None:
+                        metadata_rows.append((parsed_spectrum.name, parsed_spectrum.attributes))
+                        if len(metadata_rows) >= METADATA_INDEX_CHUNK_ROWS:
+                            self.metadata_index.update_many(metadata_rows)
+                            metadata_rows = []
+                else:
+                    logging.error("Cannot add %s: %s", file_path, error_message)
+                    self.failed_files.append((file_path, error_message))
+        finally:
+            if metadata_rows:
+                self.metadata_index.update_many(metadata_rows)
+
+        return number_spectra
+
+    def write_spectrum(self, parsed_spectrum):
+        """
+        Write a parsed spectrum in a new group of the HDF5 file.
+
+        :param parsed_spectrum: spectrum returned by :py:func:`parse_spectrum`.
+        :type parsed_spectrum: :py:class:`ParsedSpectrum`
+        """
+        self._write_spectrum_group(parsed_spectrum)
+
+        if self.metadata_index is not None:
+            self.metadata_index.update(parsed_spectrum.name, parsed_spectrum.attributes)
+
+    def _write_spectrum_group(self, parsed_spectrum):
+        spectrum_group = self.hdf5_file.create_group(parsed_spectrum.name)
+
+        for attribute_name, attribute_value in parsed_spectrum.attributes.items():
             spectrum_group.attrs[attribute_name] = attribute_value
+
+        data_types = [HDF5_SPECTRUM_ENERGIES_eV, HDF5_SPECTRUM_COUNTS, HDF5_SPECTRUM_RAW_COUNTS,
+                      HDF5_SPECTRUM_GAIN_CORRECTIONS, HDF5_SPECTRUM_DARK_CURRENTS]
+        if self.calibration_store is not None:
+            data_types = data_types[:3]
+
+        data = np.zeros((1023, len(data_types)))
+        data[:, 0] = parsed_spectrum.energies_eV
+        data[:, 1] = parsed_spectrum.counts
+        data[:, 2] = parsed_spectrum.raw_counts
+        if self.calibration_store is None:
+            data[:, 3] = parsed_spectrum.gain_corrections
+            data[:, 4] = parsed_spectrum.dark_currents
+        else:
+            self.calibration_store.link(spectrum_group, HDF5_SPECTRUM_GAIN_CORRECTIONS,
+                                        parsed_spectrum.gain_corrections)
+            self.calibration_store.link(spectrum_group, HDF5_SPECTRUM_DARK_CURRENTS, parsed_spectrum.dark_currents)
+
+        spectrum_data_set = spectrum_group.create_dataset(HDF5_SPECTRUM, data=data)
+
+        data = np.arange(1, 1023+1)
+        spectrum_channel_data_set = spectrum_group.create_dataset(HDF5_SPECTRUM_CHANNELS, data=data)
+        spectrum_data_set.dims.create_scale(spectrum_channel_data_set, HDF5_SPECTRUM_CHANNEL)
+        spectrum_data_set.dims[0].attach_scale(spectrum_channel_data_set)
+
+        max_size = max([len(data_type) for data_type in data_types])
+        data = np.array(data_types, dtype="S{}".format(max_size+1))
+        spectrum_types_data_set = spectrum_group.create_dataset(HDF5_SPECTRUM_DATA_TYPES, data=data)
+        spectrum_data_set.dims.create_scale(spectrum_types_data_set, HDF5_SPECTRUM_DATA_TYPE)
+        spectrum_data_set.dims[1].attach_scale(spectrum_types_data_set)
+
+    def compare_attribute(self, spectrum_group, attribute_name, attribute_value):
+        _compare_attribute(spectrum_group.attrs, attribute_name, attribute_value)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeels.tools.scan_catalog
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Catalog of the acquisition files of a data folder from their header parameters only.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os
+import csv
+import logging
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeels.hitachi.eels_su.elv_file import ElvFile
+from pysemeels.hitachi.eels_su.elv_text_file import ElvTextParameters, HDF5_ATTRIBUTE_MODEL, \
+    HDF5_ATTRIBUTE_SAMPLE_HEIGHT_mm, HDF5_ATTRIBUTE_ACCELERATING_VOLTAGE_V
+from pysemeels.hitachi.eels_su.map.ana_file import AnaFile
+from pysemeels.hitachi.eels_su.map.text_file import TextParameters
+from pysemeels.tools.hdf5_file_labels import *
+from pysemeels.tools.task_window import iterate_chunk_results, maximum_pending_tasks
+
+# Globals and constants variables.
+CatalogSummary = namedtuple('CatalogSummary', ['number_files', 'number_failed', 'time_s', 'files_per_s'])
+
+FILE_TYPE_ELV = "elv"
+FILE_TYPE_ANA = "ana"
+
+KEY_FILE_PATH = "relative file path"
+KEY_FILE_TYPE = "file type"
+KEY_SIZE_B = "size (B)"
+KEY_MTIME_ns = "mtime (ns)"
+
+#: Header attributes of :py:class:`pysemeels.hitachi.eels_su.elv_file.ElvFile` and
+#: :py:class:`pysemeels.hitachi.eels_su.map.ana_file.AnaFile` with their catalog column.
+_HEADER_ATTRIBUTES = (("date", HDF5_DATE), ("time", HDF5_TIME), ("comment", HDF5_COMMENT),
+                      ("dose", HDF5_ACQUISITION_SPEED), ("energy_width", HDF5_ENERGY_WIDTH_eV),
+                      ("le", HDF5_ENERGY_LOSS), ("raw", HDF5_RAW), ("dual_det_position", HDF5_DUAL_DET_POSITION),
+                      ("dual_det_post", HDF5_DUAL_DET_POST), ("dual_det_center", HDF5_DUAL_DET_CENTER),
+                      ("q1", HDF5_Q1), ("q1s", HDF5_Q1S), ("q2", HDF5_Q2), ("q2s", HDF5_Q2S), ("q3", HDF5_Q3),
+                      ("h1", HDF5_H1), ("h1s", HDF5_H1S), ("h2", HDF5_H2), ("h2s", HDF5_H2S), ("h4", HDF5_H4),
+                      ("elv_x", HDF5_ELV_X), ("elv_y", HDF5_ELV_Y),
+                      ("spectrum_alignment_x", HDF5_SPECTRUM_ALIGNMENT_X),
+                      ("spectrum_alignment_y", HDF5_SPECTRUM_ALIGNMENT_Y),
+                      ("det_spec_alignment_x", HDF5_DET_SPEC_ALIGNMENT_X),
+                      ("det_spec_alignment_y", HDF5_DET_SPEC_ALIGNMENT_Y),
+                      ("det_map_alignment_x", HDF5_DET_MAP_ALIGNMENT_X),
+                      ("det_map_alignment_y", HDF5_DET_MAP_ALIGNMENT_Y),
+                      ("mag", HDF5_MAGNIFICATION))
+
+#: Columns of the catalog table.
+CATALOG_COLUMNS = [KEY_FILE_PATH, KEY_FILE_TYPE, KEY_SIZE_B, KEY_MTIME_ns, HDF5_MODEL, HDF5_SAMPLE_HEIGHT,
+                   HDF5_ACCELERATING_VOLTAGE_V] + [label for _attribute_name, label in _HEADER_ATTRIBUTES]
+
+
+def _header_record(data):
+    return {label: getattr(data, attribute_name) for attribute_name, label in _HEADER_ATTRIBUTES
+            if hasattr(data, attribute_name)}
+
+
+def scan_elv_file(file_path):
+    """
+    Read the header parameters of an .elv file and of its .txt parameters file, if it exists.
+
+    The .elv file is read up to the first data line with
+    :py:meth:`pysemeels.hitachi.eels_su.elv_file.ElvFile.read_header`.
+
+    :param str file_path: path of the .elv file.
+    :return: the parameters with the catalog column names.
+    :rtype: dict
+    """
+    with open(file_path, 'r', encoding="latin-1", errors='ignore') as elv_text_file:
+        elv_file = ElvFile()
+        elv_file.read_header(elv_text_file)
+    record = _header_record(elv_file)
+
+    elv_text_file_path = os.path.splitext(file_path)[0] + ".txt"
+    if os.path.isfile(elv_text_file_path):
+        with open(elv_text_file_path, 'r', encoding="UTF-16", errors='ignore') as elv_text_file:
+            elv_text_parameters = ElvTextParameters()
+            elv_text_parameters.read(elv_text_file)
+
+        parameters = elv_text_parameters.items()
+        record[HDF5_MODEL] = parameters.get(HDF5_ATTRIBUTE_MODEL)
+        record[HDF5_SAMPLE_HEIGHT] = parameters.get(HDF5_ATTRIBUTE_SAMPLE_HEIGHT_mm)
+        record[HDF5_ACCELERATING_VOLTAGE_V] = parameters.get(HDF5_ATTRIBUTE_ACCELERATING_VOLTAGE_V)
+
+    return record
+
+
+def scan_ana_file(file_path):
+    """
+    Read the header parameters of a map .ana file and of the .txt parameters file of its folder, if it exists.
+
+    The .ana file is read up to the `Mag` keyword or the first data line with
+    :py:meth:`pysemeels.hitachi.eels_su.map.ana_file.AnaFile.read_header`.
+
+    :param str file_path: path of the .ana file.
+    :return: the parameters with the catalog column names.
+    :rtype: dict
+    """
+    with open(file_path, 'r', encoding="latin-1", errors='ignore') as ana_text_file:
+        ana_file = AnaFile()
+        ana_file.read_header(ana_text_file)
+    record = _header_record(ana_file)
+
+    folder = os.path.dirname(file_path)
+    text_file_path = os.path.join(folder, os.path.basename(folder) + ".txt")
+    if os.path.isfile(text_file_path):
+        with open(text_file_path, 'r', encoding="UTF-16", errors='ignore') as text_file:
+            text_parameters = TextParameters()
+            text_parameters.read(text_file)
+
+        record[HDF5_MODEL] = getattr(text_parameters, "model", None)
+        record[HDF5_SAMPLE_HEIGHT] = getattr(text_parameters, "sample_height", None)
+        record[HDF5_ACCELERATING_VOLTAGE_V] = getattr(text_parameters, "accelerating_voltage_V", None)
+
+    return record
+
+
+def _is_catalog_file(file_path):
+    """
+    Return True for the .elv files and the map .ana files, the point spectrum .ana file saved next to each .elv file
+    with the same name is not cataloged.
+    """
+    root_path, extension = os.path.splitext(file_path)
+    if extension == ".elv":
+        return True
+    if extension == ".ana":
+        return not os.path.isfile(root_path + ".elv")
+
+    return False
+
+
+def _scan_file(file_path, root_path):
+    """
+    Scan one file and catch any error, so one bad file does not abort the catalog.
+
+    :return: the file path, the catalog record or None and the error message or None if the scan succeeded.
+    """
+    try:
+        stat = os.stat(file_path)
+        if file_path.endswith(".elv"):
+            file_type = FILE_TYPE_ELV
+            record = scan_elv_file(file_path)
+        else:
+            file_type = FILE_TYPE_ANA
+            record = scan_ana_file(file_path)
+    except Exception as message:
+        return file_path, None, "{}: {}".format(type(message).__name__, message)
+
+    record[KEY_FILE_PATH] = os.path.relpath(file_path, root_path)
+    record[KEY_FILE_TYPE] = file_type
+    record[KEY_SIZE_B] = stat.st_size
+    record[KEY_MTIME_ns] = stat.st_mtime_ns
+
+    return file_path, record, None
+
+
+def _scan_files(file_paths, root_path):
+    """
+    Scan a chunk of files, see :py:func:`_scan_file`.
+
+    :return: the list of results of each file.
+    """
+    return [_scan_file(file_path, root_path) for file_path in file_paths]
+
+
+class ScanCatalog(object):
+    def __init__(self, path, recursive=True, workers=1, chunk_size=64):
+        """
+        Catalog of the .elv spectrum files and .ana map files of a data folder.
+
+        Only the header of each file is read, so the scan time depends on the number of files and not on their size.
+
+        :param str path: root folder of the acquisition files.
+        :param bool recursive: search the files in the sub folders.
+        :param int workers: number of worker processes, 1 scans the files in this process and None uses all CPUs.
+        :param int chunk_size: number of files sent to a worker process in each task.
+        """
+        self.path = path
+        self.recursive = recursive
+
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+        #: Catalog records, one dict for each file with the keys of :py:data:`CATALOG_COLUMNS`.
+        self.records = []
+        #: List of (file path, error message) of the files that could not be scanned.
+        self.failed_files = []
+        self.summary = None
+
+    def find_files(self):
+        """
+        Return the .elv and map .ana file paths to scan.
+        """
+        file_paths = []
+        if self.recursive:
+            for current_path, folder_names, filenames in os.walk(self.path):
+                for file_name in filenames:
+                    file_paths.append(os.path.join(current_path, file_name))
+        else:
+            for file_name in os.listdir(self.path):
+                file_paths.append(os.path.join(self.path, file_name))
+
+        return sorted(file_path for file_path in file_paths if _is_catalog_file(file_path))
+
+    def scan(self):
+        """
+        Scan the header of all files, in parallel if `workers` is not 1.
+
+        At most :py:data:`pysemeels.tools.task_window.MAX_PENDING_TASKS_PER_WORKER` tasks per worker are pending, so
+        the memory used by the submitted tasks and their results does not grow with the number of files.
+
+        :return: the number of files, failures and the throughput of the scan.
+        :rtype: :py:class:`CatalogSummary`
+        """
+        start_time_s = time.perf_counter()
+
+        file_paths = self.find_files()
+        number_files = len(file_paths)
+
+        self.records = []
+        self.failed_files = []
+
+        if self.workers == 1:
+            self._collect_results(map(_scan_file, file_paths, repeat(self.path)))
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = iterate_chunk_results(executor, _scan_files, file_paths, (self.path,), self.chunk_size,
+                                                maximum_pending_tasks(self.workers))
+                self._collect_results(results)
+
+        time_s = time.perf_counter() - start_time_s
+        if time_s > 0.0:
+            files_per_s = number_files / time_s
+        else:
+            files_per_s = 0.0
+
+        self.summary = CatalogSummary(number_files, len(self.failed_files), time_s, files_per_s)
+
+        logging.info("Cataloged %i files (%i failed) in %.1f s: %.1f files/s", number_files - len(self.failed_files),
+                     len(self.failed_files), time_s, files_per_s)
+
+        return self.summary
+
+    def _collect_results(self, results):
+        for file_path, record, error_message in results:
+            if error_message is None:
+                self.records.append(record)
+            else:
+                logging.error("Cannot scan %s: %s", file_path, error_message)
+                self.failed_files.append((file_path, error_message))
+
+    def write_csv(self, file_path):
+        """
+        Write the catalog records in a CSV file, one row for each file.
+
+        :param str file_path: path of the CSV file.
+        """
+        with open(file_path, 'w', encoding="UTF-8", newline='') as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=CATALOG_COLUMNS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(self.records)
+
+
+if __name__ == '__main__':
+    import sys
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) > 2:
+        path = sys.argv[1]
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        scan_catalog = ScanCatalog(path, workers=workers)
+
+        scan_catalog.scan()
+        scan_catalog.write_csv(sys.argv[2])
+    else:
+        print("Usage: python scan_catalog.py path catalog.csv [workers]")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeels.tools.task_window
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Submit chunks of items to an executor with a bounded number of pending tasks.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import os
+from collections import deque
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+
+# Globals and constants variables.
+#: Maximum number of tasks submitted and not yet completed for each worker process.
+MAX_PENDING_TASKS_PER_WORKER = 2
+
+
+def maximum_pending_tasks(workers):
+    """
+    Return the maximum number of pending tasks of an executor.
+
+    :param int workers: number of worker processes, None for all CPUs.
+    :rtype: int
+    """
+    number_workers = workers or os.cpu_count() or 1
+    return MAX_PENDING_TASKS_PER_WORKER * number_workers
+
+
+def iterate_chunk_results(executor, function, items, arguments=(), chunk_size=1, maximum_pending=1):
+    """
+    Submit the items to the executor by chunks and yield the result of each item in the order of the items.
+
+    At most `maximum_pending` tasks are submitted and not yet consumed, so the memory used by the submitted tasks and
+    their results does not grow with the number of items when the consumer is slower than the workers.
+
+    :param executor: executor of the tasks, e.g. :py:class:`concurrent.futures.ProcessPoolExecutor`.
+    :param function: function called as `function(chunk_items, *arguments)` in a task, it returns the list of the
+        results of the chunk items.
+    :param list items: items to process.
+    :param tuple arguments: other arguments of the function.
+    :param int chunk_size: number of items of each task.
+    :param int maximum_pending: maximum number of pending tasks, see :py:func:`maximum_pending_tasks`.
+    :return: generator of the result of each item.
+    """
+    chunk_size = max(1, chunk_size)
+    maximum_pending = max(1, maximum_pending)
+
+    pending_futures = deque()
+    for start_id in range(0, len(items), chunk_size):
+        pending_futures.append(executor.submit(function, items[start_id:start_id + chunk_size], *arguments))
+
+        if len(pending_futures) >= maximum_pending:
+            yield from pending_futures.popleft().result()
+
+    while pending_futures:
+        yield from pending_futures.popleft().result()
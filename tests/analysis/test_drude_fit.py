@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: tests.analysis.test_drude_fit
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeels.analysis.drude_fit`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+from unittest import mock
+
+# Third party modules.
+import numpy as np
+from scipy.optimize import OptimizeResult
+
+# Local modules.
+
+# Project modules.
+from pysemeels.analysis.drude_fit import DrudeFitEngine, guess_drude_parameters, create_drude_map
+
+# Globals and constants variables.
+
+
+class TestDrudeFitEngine(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeels.analysis.drude_fit`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        random_state = np.random.RandomState(12345)
+        self.energies_eV = np.arange(-49, 501) * 0.1
+        self.intensities, self.plasmon_energies_eV, self.plasmon_widths_eV, self.thicknesses_nm = \
+            create_drude_map(self.energies_eV[self.energies_eV > 0.0], (2, 3), noise=0.01, random_state=random_state)
+        # Spectra with a zero-loss region not fitted.
+        self.intensities = np.concatenate([np.zeros((2, 3, 50)), self.intensities], axis=-1)
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def test_guess_drude_parameters(self):
+        """
+        Test the initial plasmon energy and width from the peak of the spectra.
+        """
+
+        mask = self.energies_eV > 0.0
+        guesses = guess_drude_parameters(self.energies_eV[mask], self.intensities.reshape(6, -1)[:, mask])
+
+        self.assertEqual((6, 2), guesses.shape)
+        np.testing.assert_allclose(self.plasmon_energies_eV.ravel(), guesses[:, 0], rtol=0.05)
+        np.testing.assert_allclose(self.plasmon_widths_eV.ravel(), guesses[:, 1], rtol=0.1)
+
+        # Flat spectra use the maximum position and the width above half maximum.
+        guesses = guess_drude_parameters(self.energies_eV[mask], np.ones((1, np.count_nonzero(mask))))
+        self.assertTrue(np.all(np.isfinite(guesses)))
+        self.assertTrue(np.all(guesses > 0.0))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_fit(self):
+        """
+        Test the fit method recovers the parameters of the synthetic spectra.
+        """
+
+        engine = DrudeFitEngine(self.energies_eV, 200.0, 5.0)
+        results = engine.fit(self.intensities.reshape(6, -1))
+
+        self.assertEqual(6, engine.number_fits)
+        self.assertTrue(np.all(results.success))
+        self.assertEqual((6,), results.plasmon_energy_eV.shape)
+
+        np.testing.assert_allclose(self.plasmon_energies_eV.ravel(), results.plasmon_energy_eV, rtol=1.0e-2)
+        np.testing.assert_allclose(self.plasmon_widths_eV.ravel(), results.plasmon_width_eV, rtol=3.0e-2)
+        np.testing.assert_allclose(self.thicknesses_nm.ravel(), results.thickness_nm, rtol=3.0e-2)
+        self.assertTrue(np.all(results.residual < 0.02 * np.max(self.intensities)))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_fit_failed(self):
+        """
+        Test the fit method returns nan for the failed fits.
+        """
+
+        def least_squares(function, parameters, **kwargs):
+            return OptimizeResult(x=np.asarray(parameters), success=False, cost=0.0, message="failed")
+
+        engine = DrudeFitEngine(self.energies_eV, 200.0, 5.0)
+        with mock.patch("pysemeels.analysis.drude_fit.least_squares", least_squares):
+            results = engine.fit(self.intensities.reshape(6, -1))
+
+        self.assertFalse(np.any(results.success))
+        for values in results[:-1]:
+            self.assertTrue(np.all(np.isnan(values)))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_fit_map(self):
+        """
+        Test the fit method with a map of spectra.
+        """
+
+        engine = DrudeFitEngine(self.energies_eV, 200.0, 5.0)
+        results = engine.fit(self.intensities)
+        results_spectra = engine.fit(self.intensities.reshape(6, -1))
+
+        self.assertEqual((2, 3), results.plasmon_energy_eV.shape)
+        self.assertEqual((2, 3), results.residual.shape)
+        self.assertEqual((2, 3), results.success.shape)
+        np.testing.assert_allclose(results_spectra.plasmon_energy_eV.reshape(2, 3), results.plasmon_energy_eV,
+                                   rtol=1.0e-4)
+        np.testing.assert_allclose(self.plasmon_widths_eV, results.plasmon_width_eV, rtol=3.0e-2)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_fit_range(self):
+        """
+        Test the channels fitted.
+        """
+
+        engine = DrudeFitEngine(self.energies_eV, 200.0, 5.0)
+        self.assertEqual(500, np.count_nonzero(engine.find_fit_channels()))
+
+        engine = DrudeFitEngine(self.energies_eV, 200.0, 5.0, fit_range_eV=(5.0, 40.0))
+        self.assertEqual(351, np.count_nonzero(engine.find_fit_channels()))
+        results = engine.fit(self.intensities)
+        np.testing.assert_allclose(self.plasmon_energies_eV, results.plasmon_energy_eV, rtol=1.0e-2)
+
+        engine = DrudeFitEngine(self.energies_eV, 200.0, 5.0, fit_range_eV=(60.0, 70.0))
+        self.assertRaises(ValueError, engine.fit, self.intensities)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_fit_workers(self):
+        """
+        Test the fit method with a process pool.
+        """
+
+        engine = DrudeFitEngine(self.energies_eV, 200.0, 5.0, workers=2, chunk_size=4)
+        results = engine.fit(self.intensities)
+        results_sequential = DrudeFitEngine(self.energies_eV, 200.0, 5.0).fit(self.intensities)
+
+        self.assertTrue(np.all(results.success))
+        np.testing.assert_allclose(results_sequential.plasmon_energy_eV, results.plasmon_energy_eV, rtol=1.0e-4)
+        np.testing.assert_allclose(results_sequential.thickness_nm, results.thickness_nm, rtol=1.0e-3)
+
+        # self.fail("Test if the testcase is working.")
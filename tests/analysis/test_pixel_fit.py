@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: tests.analysis.test_pixel_fit
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeels.analysis.pixel_fit`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+from collections import namedtuple
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeels.analysis.pixel_fit import serpentine_indices, PixelFitEngine
+
+# Globals and constants variables.
+MeanFitResults = namedtuple("MeanFitResults", ["mean", "offset", "success"])
+
+
+def _fit_means(intensities, offset):
+    values = np.empty((len(intensities), 2))
+    values[:, 0] = np.mean(intensities, axis=-1)
+    values[:, 1] = offset
+    return values, np.ones(len(intensities), dtype=bool)
+
+
+class MeanFitEngine(PixelFitEngine):
+    results_class = MeanFitResults
+    fit_description = "means"
+
+    def prepare_fit(self, ordered_intensities):
+        return _fit_means, (ordered_intensities,), (2.0,)
+
+
+class TestPixelFit(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeels.analysis.pixel_fit`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.intensities = np.arange(3 * 4 * 5, dtype=np.float64).reshape((3, 4, 5))
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def test_serpentine_indices(self):
+        """
+        Test the odd rows of a map are visited in reverse order.
+        """
+        np.testing.assert_array_equal(serpentine_indices((5,)), [0, 1, 2, 3, 4])
+        np.testing.assert_array_equal(serpentine_indices((3, 3)), [0, 1, 2, 5, 4, 3, 6, 7, 8])
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_fit(self):
+        """
+        Test the fitted values are returned with the shape of the map.
+        """
+        results = MeanFitEngine().fit(self.intensities)
+
+        np.testing.assert_allclose(results.mean, np.mean(self.intensities, axis=-1))
+        np.testing.assert_allclose(results.offset, np.full((3, 4), 2.0))
+        self.assertTrue(np.all(results.success))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_fit_workers(self):
+        """
+        Test the fit with many workers gives the same results as with one worker.
+        """
+        engine = MeanFitEngine(workers=2, chunk_size=5)
+        results = engine.fit(self.intensities)
+
+        np.testing.assert_allclose(results.mean, np.mean(self.intensities, axis=-1))
+        self.assertEqual(12, engine.number_fits)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_prepare_fit(self):
+        """
+        Test the base class and a subclass without fit function cannot be created.
+        """
+        class NoFitEngine(PixelFitEngine):
+            pass
+
+        self.assertRaises(TypeError, PixelFitEngine)
+        self.assertRaises(TypeError, NoFitEngine)
+
+        # self.fail("Test if the testcase is working.")
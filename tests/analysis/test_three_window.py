@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: tests.analysis.test_three_window
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeels.analysis.three_window`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import tempfile
+import os
+import shutil
+
+# Third party modules.
+import h5py
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeels.analysis.three_window import ThreeWindowEngine, ThreeWindowResults, iter_tiles, window_energies_eV
+from pysemeels.eftem import Eftem, EFTEM_PRE_LOW, EFTEM_PRE_HIGH, EFTEM_POST
+
+# Globals and constants variables.
+
+
+class TestThreeWindowEngine(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeels.analysis.three_window`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        random_state = np.random.RandomState(12345)
+        self.shape = (37, 53)
+        self.amplitudes = random_state.uniform(1.0e5, 1.0e6, self.shape)
+        self.exponents = random_state.uniform(2.0, 4.0, self.shape)
+        self.signal = random_state.uniform(0.0, 100.0, self.shape)
+
+        self.energies_eV = (250.0, 270.0, 300.0)
+        self.pre_low = self.amplitudes * self.energies_eV[0] ** -self.exponents
+        self.pre_high = self.amplitudes * self.energies_eV[1] ** -self.exponents
+        self.background = self.amplitudes * self.energies_eV[2] ** -self.exponents
+        self.post = self.background + self.signal
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def test_iter_tiles(self):
+        """
+        Test iter_tiles function covers the image once.
+        """
+
+        counts = np.zeros(self.shape, dtype=int)
+        tiles = list(iter_tiles(self.shape, (16, 20)))
+        for tile in tiles:
+            counts[tile] += 1
+
+        self.assertEqual(3 * 3, len(tiles))
+        np.testing.assert_array_equal(1, counts)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_window_energies_eV(self):
+        """
+        Test window_energies_eV function.
+        """
+
+        energies_eV = np.arange(1024) * 0.1
+        segments_channel = {EFTEM_PRE_LOW: (300, 433), EFTEM_PRE_HIGH: (443, 576), EFTEM_POST: (586, 719)}
+
+        self.assertEqual((36.6, 50.9, 65.2), tuple(round(energy_eV, 6) for energy_eV in
+                                                   window_energies_eV(energies_eV, segments_channel)))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_compute(self):
+        """
+        Test compute method recovers the power-law background and the net signal, with and without tiles.
+        """
+
+        engine = ThreeWindowEngine(*self.energies_eV, tile_shape=(16, 20))
+        results = engine.compute(self.pre_low, self.pre_high, self.post)
+
+        np.testing.assert_allclose(self.exponents, results.exponent, rtol=1.0e-10)
+        np.testing.assert_allclose(self.background, results.background, rtol=1.0e-10)
+        np.testing.assert_allclose(self.signal, results.net_signal, rtol=1.0e-6, atol=1.0e-8)
+        np.testing.assert_allclose(self.post / self.pre_high, results.jump_ratio)
+
+        results_one_tile = ThreeWindowEngine(*self.energies_eV, tile_shape=self.shape).compute(
+            self.pre_low, self.pre_high, self.post)
+        for tile_map, one_tile_map in zip(results, results_one_tile):
+            np.testing.assert_array_equal(one_tile_map, tile_map)
+
+        engine = ThreeWindowEngine(*self.energies_eV, dtype=np.float32)
+        results = engine.compute(self.pre_low, self.pre_high, self.post)
+        self.assertEqual(np.float32, results.net_signal.dtype)
+        np.testing.assert_allclose(self.exponents, results.exponent, rtol=1.0e-3)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_compute_invalid_pixels(self):
+        """
+        Test compute method with pixels without pre-edge intensity and bad arguments.
+        """
+
+        self.pre_low[0, 0] = 0.0
+        self.pre_high[1, 1] = 0.0
+
+        results = ThreeWindowEngine(*self.energies_eV).compute(self.pre_low, self.pre_high, self.post)
+
+        for output_map in results:
+            self.assertTrue(np.isnan(output_map[0, 0]))
+            self.assertTrue(np.isnan(output_map[1, 1]))
+            self.assertEqual(2, np.count_nonzero(np.isnan(output_map)))
+
+        engine = ThreeWindowEngine(*self.energies_eV)
+        self.assertRaises(ValueError, engine.compute, self.pre_low, self.pre_high, self.post[1:])
+        self.assertRaises(ValueError, ThreeWindowEngine, 270.0, 250.0, 300.0)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_compute_eftem_hdf5(self):
+        """
+        Test compute_eftem method reads the micrographs from HDF5 datasets and writes the maps in HDF5 datasets.
+        """
+
+        eftem = Eftem("EFTEM")
+        eftem.micrographs = {EFTEM_PRE_LOW: self.pre_low, EFTEM_PRE_HIGH: self.pre_high, EFTEM_POST: self.post}
+
+        path = tempfile.mkdtemp()
+        try:
+            with h5py.File(os.path.join(path, "eftem.hdf5"), 'w') as hdf5_file:
+                eftem.write_hdf5(hdf5_file)
+
+                eftem = Eftem("EFTEM")
+                eftem.read_hdf5(hdf5_file)
+                self.assertIsInstance(eftem.micrographs[EFTEM_POST], h5py.Dataset)
+
+                maps_group = hdf5_file.create_group("maps")
+                out = ThreeWindowResults(*[maps_group.create_dataset(field, shape=self.shape, dtype=np.float64)
+                                           for field in ThreeWindowResults._fields])
+
+                engine = ThreeWindowEngine(*self.energies_eV, tile_shape=(8, 8))
+                results = engine.compute_eftem(eftem, out)
+
+                self.assertIs(out, results)
+                np.testing.assert_allclose(self.signal, maps_group["net_signal"][...], rtol=1.0e-6, atol=1.0e-8)
+        finally:
+            shutil.rmtree(path)
+
+        del eftem.micrographs[EFTEM_POST]
+        self.assertRaises(KeyError, engine.compute_eftem, eftem)
+
+        # self.fail("Test if the testcase is working.")
@@ -31,12 +31,14 @@ import sys
 
 # Third party modules.
 import pytest
+import numpy as np
+import scipy.stats
 
 # Local modules.
 
 # Project modules.
 from pysemeels import get_current_module_path
-from pysemeels.analysis.zero_loss_peak import ZeroLossPeak
+from pysemeels.analysis.zero_loss_peak import ZeroLossPeak, compute_fwhm_batch, compute_statistics_batch
 from pysemeels.hitachi.eels_su.elv_file import ElvFile
 from tests import is_bad_file
 
@@ -130,3 +132,104 @@ class TestZeroLossPeak(unittest.TestCase):
             self.assertAlmostEqual(1.5175832076107003, zero_lost_peak.kurtosis)
 
         # self.fail("Test if the testcase is working.")
+
+
+class TestZeroLossPeakBatch(unittest.TestCase):
+    """
+    TestCase class for the batch functions of the module `pysemeels.analysis.zero_loss_peak`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        random_state = np.random.RandomState(12345)
+        self.energies_eV = np.linspace(-32.0, 21.84, 1024)
+        positions_eV = random_state.uniform(-3.0, 3.0, 200)
+        mean_counts = 50.0 + 40000.0 * np.exp(-0.5 * ((self.energies_eV - positions_eV[:, np.newaxis]) / 0.3) ** 2)
+        self.intensities = random_state.poisson(mean_counts).astype(np.float64)
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def test_compute_fwhm_batch(self):
+        """
+        Test the compute_fwhm_batch function gives the same results as the compute_fwhm method.
+        """
+
+        results = compute_fwhm_batch(self.energies_eV, self.intensities)
+        self.assertEqual((200,), results.fwhm_eV.shape)
+        self.assertEqual((200, 2), results.roi_indices.shape)
+
+        for spectrum_id, intensities in enumerate(self.intensities):
+            zero_lost_peak = ZeroLossPeak(self.energies_eV, intensities)
+            zero_lost_peak.compute_fwhm()
+
+            self.assertEqual(zero_lost_peak.max_intensity_index, results.max_intensity_index[spectrum_id])
+            self.assertEqual(zero_lost_peak.roi_indices, tuple(results.roi_indices[spectrum_id]))
+            self.assertAlmostEqual(zero_lost_peak.position_eV, results.position_eV[spectrum_id])
+            self.assertAlmostEqual(zero_lost_peak.maximum, results.maximum[spectrum_id])
+            self.assertAlmostEqual(zero_lost_peak.background, results.background[spectrum_id])
+            self.assertAlmostEqual(zero_lost_peak.fwhm_eV, results.fwhm_eV[spectrum_id])
+            self.assertAlmostEqual(zero_lost_peak.fwtm_eV, results.fwtm_eV[spectrum_id])
+            self.assertAlmostEqual(zero_lost_peak.fwfm_eV, results.fwfm_eV[spectrum_id])
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_compute_fwhm_batch_energies(self):
+        """
+        Test the compute_fwhm_batch function with one energy axis per spectrum.
+        """
+
+        energies_eV = np.tile(self.energies_eV, (len(self.intensities), 1))
+        results_shared = compute_fwhm_batch(self.energies_eV, self.intensities)
+        results = compute_fwhm_batch(energies_eV, self.intensities)
+
+        np.testing.assert_array_equal(results_shared.fwhm_eV, results.fwhm_eV)
+        np.testing.assert_array_equal(results_shared.background, results.background)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_compute_statistics_batch(self):
+        """
+        Test the compute_statistics_batch function gives the same results as the statistics of the list of events.
+        """
+
+        statistics = compute_statistics_batch(self.energies_eV, self.intensities)
+        self.assertEqual((200,), statistics.mean_eV.shape)
+
+        for spectrum_id, intensities in enumerate(self.intensities[:20]):
+            zero_lost_peak = ZeroLossPeak(self.energies_eV, intensities)
+            zero_lost_peak.compute_statistics()
+            roi_min, roi_max = zero_lost_peak.roi_indices
+
+            data = np.repeat(self.energies_eV[roi_min:roi_max], intensities[roi_min:roi_max].astype(int))
+            describe = scipy.stats.describe(data)
+
+            self.assertEqual(describe.nobs, statistics.number_counts[spectrum_id])
+            self.assertEqual(describe.nobs, zero_lost_peak.number_counts)
+            self.assertAlmostEqual(describe.minmax[0], statistics.minimum_eV[spectrum_id])
+            self.assertAlmostEqual(describe.minmax[1], statistics.maximum_eV[spectrum_id])
+            self.assertAlmostEqual(describe.mean, statistics.mean_eV[spectrum_id])
+            self.assertAlmostEqual(describe.variance, statistics.variance_eV2[spectrum_id])
+            self.assertAlmostEqual(np.sqrt(describe.variance), statistics.std_eV[spectrum_id])
+            self.assertAlmostEqual(describe.skewness, statistics.skewness[spectrum_id])
+            self.assertAlmostEqual(describe.kurtosis, statistics.kurtosis[spectrum_id])
+            self.assertAlmostEqual(describe.kurtosis, zero_lost_peak.kurtosis)
+
+        # self.fail("Test if the testcase is working.")
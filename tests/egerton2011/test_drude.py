@@ -27,14 +27,18 @@ Tests for the module :py:mod:`pysemeels.egerton2011.drude`.
 
 # Standard library modules.
 import unittest
+import os.path
+import tempfile
+import shutil
 
 # Third party modules.
 import pytest
+import numpy as np
 
 # Local modules.
 
 # Project modules.
-from pysemeels.egerton2011.drude import drude
+from pysemeels.egerton2011.drude import drude, drude_grid, drude_spectra, write_drude_files
 from pysemeels import get_current_module_path
 from tests import is_bad_file
 
@@ -149,3 +153,90 @@ class TestDrude(unittest.TestCase):
         self.assertAlmostEqual(131.691587, mfp_free_nm, 6)
 
         # self.fail("Test if the testcase is working.")
+
+    def test_drude_grid(self):
+        """
+        Test the Drude model computed over a grid of parameters.
+        """
+        eps = np.array([10.0, 15.0, 20.0])
+        ews = np.array([2.0, 3.0])
+        tnms = np.array([50.0, 100.0, 150.0, 200.0])
+
+        results = drude_grid(eps[:, np.newaxis, np.newaxis], ews[np.newaxis, :, np.newaxis], 0, 0.1, 200, 5, 500,
+                             tnms[np.newaxis, np.newaxis, :])
+
+        self.assertEqual((500,), results.energies_eV.shape)
+        self.assertEqual((3, 2, 4, 500), results.eps1.shape)
+        self.assertEqual((3, 2, 4, 500), results.ssd.shape)
+        self.assertEqual((3, 2, 4), results.ps.shape)
+        self.assertEqual((3, 2, 4), results.pv.shape)
+        self.assertEqual((3, 2, 4), results.lam.shape)
+        self.assertEqual((3, 2, 4), results.lamfe.shape)
+
+        for ep_id, ep in enumerate(eps):
+            for ew_id, ew in enumerate(ews):
+                for tnm_id, tnm in enumerate(tnms):
+                    expected = drude(ep, ew, 0, 0.1, 200, 5, 500, tnm)
+                    index = (ep_id, ew_id, tnm_id)
+                    np.testing.assert_allclose(expected.eps1, results.eps1[index])
+                    np.testing.assert_allclose(expected.ssd, results.ssd[index])
+                    self.assertAlmostEqual(expected.ps, results.ps[index])
+                    self.assertAlmostEqual(expected.pv, results.pv[index])
+                    self.assertAlmostEqual(expected.lam, results.lam[index])
+                    self.assertAlmostEqual(expected.lamfe, results.lamfe[index])
+
+        self.assertAlmostEqual(0.25491101951346251, results.pv[1, 1, 0], 6)
+        self.assertAlmostEqual(196.14687546828225, results.lam[1, 1, 0], 3)
+
+        results = drude_grid(15, 3, 0, 0.1, 200, 5, 500, 50)
+        self.assertEqual((500,), results.ssd.shape)
+        self.assertEqual((), np.shape(results.ps))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_drude_spectra(self):
+        """
+        Test the Drude model on an energy axis not starting at the first channel.
+        """
+        results_grid = drude_grid([15.0, 20.0], 3, 0, 0.1, 200, 5, 500, 50)
+
+        results = drude_spectra(results_grid.energies_eV[100:], [15.0, 20.0], 3, 0, 200, 5, 50)
+
+        self.assertEqual((2, 400), results.ssd.shape)
+        np.testing.assert_allclose(results_grid.ssd[:, 100:], results.ssd)
+        np.testing.assert_allclose(results_grid.eps1[:, 100:], results.eps1)
+        self.assertTrue(np.all(results.pv < results_grid.pv))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_write_drude_files(self):
+        """
+        Test the explicit writer of the Drude spectra.
+        """
+        path = tempfile.mkdtemp()
+        try:
+            eps_file_path = os.path.join(path, "Drude.eps")
+            ssd_file_path = os.path.join(path, "Drude.ssd")
+
+            results = drude(15, 3, 0, 0.1, 200, 5, 500, 50)
+            write_drude_files(results, eps_file_path, None)
+            self.assertTrue(os.path.isfile(eps_file_path))
+            self.assertFalse(os.path.isfile(ssd_file_path))
+
+            write_drude_files(results, eps_file_path, ssd_file_path)
+            data = np.loadtxt(ssd_file_path)
+            self.assertEqual((500, 2), data.shape)
+            np.testing.assert_allclose(results.energies_eV, data[:, 0])
+            np.testing.assert_allclose(results.ssd, data[:, 1])
+
+            data = np.loadtxt(eps_file_path)
+            self.assertEqual((500, 3), data.shape)
+            np.testing.assert_allclose(results.eps1, data[:, 1])
+            np.testing.assert_allclose(results.eps2, data[:, 2])
+
+            results = drude_grid([10.0, 15.0], 3, 0, 0.1, 200, 5, 500, 50)
+            self.assertRaises(ValueError, write_drude_files, results, eps_file_path, ssd_file_path)
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+
+        # self.fail("Test if the testcase is working.")
@@ -29,11 +29,12 @@ Tests for the module :py:mod:`pysemeels.egerton2011.lenzplus`.
 import unittest
 
 # Third party modules.
+import numpy as np
 
 # Local modules.
 
 # Project modules.
-from pysemeels.egerton2011.lenzplus import lenz_plus
+from pysemeels.egerton2011.lenzplus import lenz_plus, lenz_plus_grid, to_structured_array
 
 
 # Globals and constants variables.
@@ -107,3 +108,57 @@ class TestSigAdf(unittest.TestCase):
         self.assertAlmostEqual(1.2306, result3_w_broadening.lnIt_I0, 4)
 
         #self.fail("Test if the testcase is working.")
+
+    def test_lenz_plus_grid(self):
+        """
+        Test the results over arrays of Z, E0 and beta are the same as the scalar ones.
+        """
+        zs = np.array([6, 14, 29, 79])
+        e0s = np.array([100.0, 200.0])
+        betas = np.array([5.0, 10.0, 20.0])
+
+        results = lenz_plus_grid(e0s[np.newaxis, :, np.newaxis], 0, zs[:, np.newaxis, np.newaxis],
+                                 betas[np.newaxis, np.newaxis, :], 1.5)
+
+        for result in results:
+            for value in result:
+                self.assertEqual((4, 2, 3), value.shape)
+
+        for z_id, z in enumerate(zs):
+            for e0_id, e0 in enumerate(e0s):
+                for beta_id, beta in enumerate(betas):
+                    expected_results = lenz_plus(e0, 0, z, beta, 1.5)
+                    for expected_result, result in zip(expected_results, results):
+                        for field in expected_result._fields:
+                            self.assertAlmostEqual(getattr(expected_result, field),
+                                                   getattr(result, field)[z_id, e0_id, beta_id], msg=field)
+
+        result1, result2, result3_wo_broadening, result3_w_broadening = lenz_plus_grid(100, 40, 6, 10, 1.5)
+        self.assertEqual((), np.shape(result1.theta0_rad))
+        self.assertAlmostEqual(2.0231e-2, result1.theta0_rad, 6)
+        self.assertAlmostEqual(1.2306, result2.t_lambda_beta, 4)
+        self.assertAlmostEqual(1.3498, result3_wo_broadening.lnIt_I0, 4)
+        self.assertAlmostEqual(1.2306, result3_w_broadening.lnIt_I0, 4)
+
+        result1, result2, result3_wo_broadening, result3_w_broadening = lenz_plus_grid(100, 40, 6, 10, [0.0, 1.5])
+        np.testing.assert_allclose([0.0, 1.2306], result2.t_lambda_beta, atol=1.0e-4)
+        np.testing.assert_allclose([1.0, 1.3580e-1], result3_w_broadening.p_unscat, atol=1.0e-5)
+
+        #self.fail("Test if the testcase is working.")
+
+    def test_to_structured_array(self):
+        """
+        Test the conversion of the results into structured arrays.
+        """
+        results = lenz_plus_grid([100.0, 200.0], 0, 6, 10, 1.5)
+
+        array = to_structured_array(results[0])
+        self.assertEqual((2,), array.shape)
+        self.assertEqual(results[0]._fields, array.dtype.names)
+        np.testing.assert_allclose(results[0].sigma_inelastic_nm2, array['sigma_inelastic_nm2'])
+
+        array = to_structured_array(results[3])
+        self.assertEqual(results[3]._fields, array.dtype.names)
+        np.testing.assert_allclose(results[3].lnIt_I0, array['lnIt_I0'])
+
+        #self.fail("Test if the testcase is working.")
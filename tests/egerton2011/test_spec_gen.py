@@ -30,11 +30,12 @@ import unittest
 
 # Third party modules.
 import pytest
+import numpy as np
 
 # Local modules.
 
 # Project modules.
-from pysemeels.egerton2011.spec_gen import spec_gen
+from pysemeels.egerton2011.spec_gen import spec_gen, spec_gen_vectorized, spec_gen_batch
 from pysemeels import get_current_module_path
 from tests import is_bad_file
 
@@ -111,3 +112,67 @@ class TestSpecGen(unittest.TestCase):
                 self.assertAlmostEqual(yy, outpsd[channel_id], 7, channel_id)
 
         # self.fail("Test if the testcase is working.")
+
+    def test_spec_gen_vectorized(self):
+        """
+        Test the vectorized function reproduces the spec_gen function, including its noise.
+        """
+        for parameters in [(16.7, 3.2, 1, 5, 0.1, 10000, 1.5, 1000, 2, 0.5, 10),
+                           (10.0, 1.2, 0.5, 2, 0.05, 1000, 0.3, 500, 1, 0.1, 1)]:
+            eout_ref, outssd_ref, outpsd_ref = spec_gen(*parameters)
+            eout, outssd, outpsd = spec_gen_vectorized(*parameters)
+
+            np.testing.assert_array_equal(eout_ref, eout)
+            np.testing.assert_allclose(outssd_ref, outssd, rtol=1.0e-12)
+            np.testing.assert_allclose(outpsd_ref, outpsd, rtol=1.0e-12)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_spec_gen_batch(self):
+        """
+        Test the batch function generates one spectrum for each parameter value.
+        """
+        tols = [0.5, 1.0, 1.5]
+        eout, outssd, outpsd = spec_gen_batch(16.7, 3.2, 1, 5, 0.1, 10000, tols, 1000, 2, 0.5, 10)
+
+        self.assertEqual((1000,), eout.shape)
+        self.assertEqual((3, 1000), outssd.shape)
+        self.assertEqual((3, 1000), outpsd.shape)
+
+        for spectrum_id, tol in enumerate(tols):
+            _eout_ref, outssd_ref, outpsd_ref = spec_gen(16.7, 3.2, 1, 5, 0.1, 10000, tol, 1000, 2, 0.5, 10)
+            np.testing.assert_allclose(outssd_ref, outssd[spectrum_id], rtol=1.0e-12)
+            np.testing.assert_allclose(outpsd_ref, outpsd[spectrum_id], rtol=1.0e-12)
+
+        eout, outssd, outpsd = spec_gen_batch([15.0, 16.7], [3.0, 3.2], 1, 5, 0.1, 10000, 1.5, 1000, 2, 0.5, 10,
+                                              random_state=np.random.RandomState(12345))
+        _eout, _outssd, outpsd_same_seed = spec_gen_batch([15.0, 16.7], [3.0, 3.2], 1, 5, 0.1, 10000, 1.5, 1000, 2,
+                                                          0.5, 10, random_state=np.random.RandomState(12345))
+        self.assertEqual((2, 1000), outpsd.shape)
+        np.testing.assert_array_equal(outpsd, outpsd_same_seed)
+        self.assertTrue(np.all(outpsd >= 2.0))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_spec_gen_batch_chunks(self):
+        """
+        Test the spectra of the batch function do not depend on the chunk size.
+        """
+        tols = np.linspace(0.1, 2.0, 7)
+        eout, outssd, outpsd = spec_gen_batch(16.7, 3.2, 1, 5, 0.1, 10000, tols, 500, 2, 0.5, 10,
+                                              random_state=np.random.RandomState(12345), chunk_size=7)
+
+        for chunk_size in [1, 3]:
+            _eout, outssd_chunks, outpsd_chunks = spec_gen_batch(16.7, 3.2, 1, 5, 0.1, 10000, tols, 500, 2, 0.5, 10,
+                                                                 random_state=np.random.RandomState(12345),
+                                                                 chunk_size=chunk_size)
+            np.testing.assert_array_equal(outssd, outssd_chunks)
+            np.testing.assert_array_equal(outpsd, outpsd_chunks)
+
+        _eout, outssd_chunks, outpsd_chunks = spec_gen_batch(16.7, 3.2, 1, 5, 0.1, 10000, tols, 500, 2, 0.5, 10,
+                                                             chunk_size=2)
+        _eout_ref, outssd_ref, outpsd_ref = spec_gen(16.7, 3.2, 1, 5, 0.1, 10000, tols[-1], 500, 2, 0.5, 10)
+        np.testing.assert_allclose(outssd_ref, outssd_chunks[-1], rtol=1.0e-12)
+        np.testing.assert_allclose(outpsd_ref, outpsd_chunks[-1], rtol=1.0e-12)
+
+        # self.fail("Test if the testcase is working.")
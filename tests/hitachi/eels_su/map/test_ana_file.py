@@ -28,9 +28,11 @@ Tests for the module :py:mod:`pysemeels.hitachi.eels_su.map.ana_file`.
 # Standard library modules.
 import unittest
 import os.path
+import io
 
 # Third party modules.
 import pytest
+import numpy as np
 
 # Local modules.
 
@@ -42,6 +44,33 @@ from tests import is_bad_file
 # Globals and constants variables.
 
 
+def create_ana_text(number_channels=8, number_points=3, number_blocks=2):
+    """
+    Create the text of a small .ana file with the total spectra block followed by the raw data blocks.
+    """
+    lines = ["date = 01/Mar/2017", "Time = 11:20", "Mag = 37443", "total"]
+    for block_id in range(-1, number_blocks):
+        if block_id >= 0:
+            lines.append("raw data {:d}".format(block_id + 1))
+        for channel_id in range(number_channels):
+            energy_eV = -1.0 + 0.5 * channel_id
+            counts = [(block_id + 2) * 100 + point_id * 10 + channel_id for point_id in range(number_points)]
+            lines.append(",".join(["{:.3f}".format(energy_eV)] + [str(count) for count in counts]))
+
+    return "\n".join(lines) + "\n"
+
+
+def create_point_ana_text(number_channels=8):
+    """
+    Create the text of a small point spectrum .ana file, saved with each .elv file, without `Mag` keyword.
+    """
+    lines = ["date = 01/Mar/2017", "Time = 11:20", "Dose = 0.5ms"]
+    for channel_id in range(number_channels):
+        lines.append("{:.3f},{:d}".format(-1.0 + 0.5 * channel_id, 100 + channel_id))
+
+    return "\n".join(lines) + "\n"
+
+
 class TestSimulationData(unittest.TestCase):
     """
     TestCase class for the module `pysemeels.hitachi.eels_su.ana_file`.
@@ -185,3 +214,173 @@ class TestSimulationData(unittest.TestCase):
             self.assertEqual(49, ana_file.spectrum_id)
 
         # self.fail("Test if the testcase is working.")
+
+
+class TestAnaFileDense(unittest.TestCase):
+    """
+    TestCase class for the dense parser of the module `pysemeels.hitachi.eels_su.ana_file`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.text = create_ana_text()
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def test_read_dense(self):
+        """
+        Test the dense parser gives the same data as the dictionary parser.
+        """
+
+        ana_file_ref = AnaFile()
+        ana_file_ref.read(io.StringIO(self.text))
+
+        ana_file = AnaFile()
+        ana_file.read(io.StringIO(self.text), dense=True)
+
+        self.assertEqual("01/Mar/2017", ana_file.date)
+        self.assertEqual(37443, ana_file.mag)
+        self.assertEqual(ana_file_ref.spectrum_id, ana_file.spectrum_id)
+        self.assertEqual({}, ana_file.spectra)
+        self.assertEqual((2, 3, 8), ana_file.raw_spectra.shape)
+
+        np.testing.assert_array_equal(ana_file_ref.energies_eV, ana_file.energies_eV)
+        np.testing.assert_array_equal(ana_file_ref.total_spectra, ana_file.total_spectra)
+        for point_id in range(3):
+            for spectrum_id in range(2):
+                spectrum = ana_file_ref.spectra[point_id][spectrum_id]
+                np.testing.assert_array_equal(spectrum.counts, ana_file.raw_spectra[spectrum_id, point_id])
+                np.testing.assert_array_equal(spectrum.energies_eV, ana_file.energies_eV)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_read_dense_truncated(self):
+        """
+        Test the dense parser with a truncated raw data block.
+        """
+
+        text = "\n".join(self.text.splitlines()[:-1])
+
+        ana_file = AnaFile()
+        self.assertRaises(ValueError, ana_file.read, io.StringIO(text), dense=True)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_iter_blocks(self):
+        """
+        Test the streaming of the raw data blocks gives the same data as the dense parser.
+        """
+
+        ana_file_ref = AnaFile()
+        ana_file_ref.read(io.StringIO(self.text), dense=True)
+
+        ana_file = AnaFile()
+        blocks = ana_file.iter_blocks(io.StringIO(self.text))
+        block_id, counts = next(blocks)
+
+        self.assertEqual(0, block_id)
+        self.assertEqual(37443, ana_file.mag)
+        np.testing.assert_array_equal(ana_file_ref.energies_eV, ana_file.energies_eV)
+        np.testing.assert_array_equal(ana_file_ref.total_spectra, ana_file.total_spectra)
+        np.testing.assert_array_equal(ana_file_ref.raw_spectra[0], counts)
+
+        block_id, counts = next(blocks)
+        self.assertEqual(1, block_id)
+        self.assertEqual(1, ana_file.spectrum_id)
+        np.testing.assert_array_equal(ana_file_ref.raw_spectra[1], counts)
+
+        self.assertRaises(StopIteration, next, blocks)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_read_total_spectra(self):
+        """
+        Test the reading stops after the total spectra.
+        """
+
+        ana_file_ref = AnaFile()
+        ana_file_ref.read(io.StringIO(self.text), dense=True)
+
+        ana_text_file = io.StringIO(self.text)
+        ana_file = AnaFile()
+        ana_file.read_total_spectra(ana_text_file)
+
+        self.assertEqual(37443, ana_file.mag)
+        self.assertIsNone(ana_file.raw_spectra)
+        self.assertEqual(-1, ana_file.spectrum_id)
+        np.testing.assert_array_equal(ana_file_ref.energies_eV, ana_file.energies_eV)
+        np.testing.assert_array_equal(ana_file_ref.total_spectra, ana_file.total_spectra)
+
+        # The first raw data block is not read.
+        remaining_lines = ana_text_file.readlines()
+        self.assertEqual(1, sum(1 for line in remaining_lines if line.startswith("raw data")))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_iter_points(self):
+        """
+        Test the streaming of the spectrum of each point.
+        """
+
+        ana_file_ref = AnaFile()
+        ana_file_ref.read(io.StringIO(self.text), dense=True)
+
+        number_spectra = 0
+        for block_id, point_id, counts in AnaFile().iter_points(io.StringIO(self.text)):
+            self.assertEqual((8,), counts.shape)
+            np.testing.assert_array_equal(ana_file_ref.raw_spectra[block_id, point_id], counts)
+            number_spectra += 1
+
+        self.assertEqual(6, number_spectra)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_read_header(self):
+        """
+        Test the read_header method stops after the Mag keyword.
+        """
+
+        ana_text_file = io.StringIO(create_ana_text())
+        ana_file = AnaFile()
+        ana_file.read_header(ana_text_file)
+
+        self.assertEqual("01/Mar/2017", ana_file.date)
+        self.assertEqual(37443, ana_file.mag)
+        self.assertEqual([], ana_file.energies_eV)
+        self.assertEqual("total\n", ana_text_file.readline())
+
+        # Point spectrum .ana file without Mag keyword, the reading stops at the first data line.
+        ana_text_file = io.StringIO(create_point_ana_text())
+        ana_file = AnaFile()
+        ana_file.read_header(ana_text_file)
+
+        self.assertEqual("01/Mar/2017", ana_file.date)
+        self.assertEqual("0.5ms", ana_file.dose)
+        self.assertFalse(hasattr(ana_file, "mag"))
+        self.assertEqual("-0.500,101\n", ana_text_file.readline())
+
+        # The first data line is not lost by the readers.
+        ana_file = AnaFile()
+        ana_file.read_total_spectra(io.StringIO(create_point_ana_text()))
+        self.assertEqual((1, 8), ana_file.total_spectra.shape)
+        self.assertEqual(-1.0, ana_file.energies_eV[0])
+
+        # self.fail("Test if the testcase is working.")
@@ -28,9 +28,13 @@ Tests for the module :py:mod:`pysemeels.hitachi.eels_su.map.spectra`.
 # Standard library modules.
 import unittest
 import os.path
+import struct
+import tempfile
+import shutil
 
 # Third party modules.
 import pytest
+import numpy as np
 
 # Local modules.
 
@@ -92,3 +96,105 @@ class TestSimulationData(unittest.TestCase):
             self.assertEqual(1024, len(spectrum))
 
         # self.fail("Test if the testcase is working.")
+
+
+class TestRawSpectraMemmap(unittest.TestCase):
+    """
+    TestCase class for the numpy reader of the module `pysemeels.hitachi.eels_su.map.raw_spectra`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.path = tempfile.mkdtemp()
+        self.raw_spectra_file_path = os.path.join(self.path, "rawspect-1.dat")
+
+        self.counts = np.arange(3 * 1024).reshape(3, 1024) % 65536
+        with open(self.raw_spectra_file_path, 'wb') as raw_spectra_file:
+            for counts in self.counts:
+                raw_spectra_file.write(struct.pack("1024H", *counts))
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.path)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def test_read_memmap(self):
+        """
+        Test the read_memmap method gives the same spectra as the read method.
+        """
+
+        with open(self.raw_spectra_file_path, 'rb') as raw_spectra_file:
+            raw_spectra_ref = RawSpectra()
+            raw_spectra_ref.read(raw_spectra_file)
+
+        for copy in [False, True]:
+            raw_spectra = RawSpectra()
+            raw_spectra.read_memmap(self.raw_spectra_file_path, copy=copy)
+
+            self.assertEqual(3, raw_spectra.number_spectra)
+            self.assertEqual(3, raw_spectra.raw_spectrum_id)
+            self.assertEqual((3, 1024), raw_spectra.raw_spectra.shape)
+            self.assertEqual(np.uint16, raw_spectra.raw_spectra.dtype)
+            self.assertEqual(copy, not isinstance(raw_spectra.raw_spectra, np.memmap))
+            np.testing.assert_array_equal(raw_spectra_ref.raw_spectra, raw_spectra.raw_spectra)
+            np.testing.assert_array_equal(self.counts[2], raw_spectra.get_spectrum(2))
+
+            self.assertRaises(IndexError, raw_spectra.get_spectrum, 3)
+
+            del raw_spectra
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_read_memmap_bad_size(self):
+        """
+        Test the read_memmap method with a truncated file.
+        """
+
+        with open(self.raw_spectra_file_path, 'ab') as raw_spectra_file:
+            raw_spectra_file.write(b"\x00\x01")
+
+        raw_spectra = RawSpectra()
+        self.assertRaises(ValueError, raw_spectra.read_memmap, self.raw_spectra_file_path)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_get_corrected_counts(self):
+        """
+        Test the get_corrected_counts method with the memory-mapped and the list spectra.
+        """
+
+        gain_corrections = np.linspace(0.9, 1.1, 1024)
+        dark_currents = np.full(1024, 2.0)
+        counts_ref = (self.counts - dark_currents) / gain_corrections
+
+        raw_spectra = RawSpectra()
+        raw_spectra.read_memmap(self.raw_spectra_file_path)
+        counts = raw_spectra.get_corrected_counts(dark_currents, gain_corrections)
+        np.testing.assert_allclose(counts_ref, counts)
+        del raw_spectra
+
+        with open(self.raw_spectra_file_path, 'rb') as raw_spectra_file:
+            raw_spectra = RawSpectra()
+            raw_spectra.read(raw_spectra_file)
+        counts = raw_spectra.get_corrected_counts(dark_currents, gain_corrections, dtype=np.float32)
+        self.assertEqual(np.float32, counts.dtype)
+        np.testing.assert_allclose(counts_ref, counts, rtol=1.0e-6)
+
+        # self.fail("Test if the testcase is working.")
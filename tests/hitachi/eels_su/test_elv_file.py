@@ -28,9 +28,14 @@ Tests for the module :py:mod:`xrayspectrummodeling.map.simulation_data as simula
 # Standard library modules.
 import unittest
 import sys
+import io
+import os.path
+import tempfile
+import shutil
 
 # Third party modules.
 import pytest
+import numpy as np
 
 # Local modules.
 
@@ -42,6 +47,23 @@ from tests import is_bad_file
 # Globals and constants variables.
 
 
+def create_elv_text(number_channels=4):
+    """
+    Create the text of a small .elv file with the header, the spectrum block and the calibration block.
+    """
+    lines = ["date=01/Mar/2017", "Time=10:59", "comment=", "dose=500µs",
+             "LE=0.0eV, Raw=98.7, Dual det. position=586ch, post=133ch", "Energy Window Width=7.0eV", "center=608ch",
+             "Q1=13575", "Q1S=3850", "Q2=0", "Q2S=0", "Q3=2700", "H1=3050", "H1S=5850", "H2=-600", "H2S=1250", "H4=0",
+             "ELV-x=0", "ELV-y=0", "Spectrum align-x=196", "Spectrum align-y=0", "DET alignment-x(spec.)=0",
+             "DET alignment-y(spec.)=0", "DET alignment-x(map)=-1280", "DET alignment-y(map)=1500", "Mag=37443"]
+    for channel_id in range(number_channels):
+        lines.append("{:.2f},{:d}".format(-32.0 + 0.05 * channel_id, 2282 + channel_id))
+    for channel_id in range(2 * number_channels):
+        lines.append("{:.6f}".format(1.0 + 0.001 * channel_id))
+
+    return "\n".join(lines) + "\n"
+
+
 class TestSimulationData(unittest.TestCase):
     """
     TestCase class for the module `xrayspectrummodeling.map.simulation_data`.
@@ -131,3 +153,172 @@ class TestSimulationData(unittest.TestCase):
             self.assertEqual(1024, len(elv_file.dark_currents))
 
         # self.fail("Test if the testcase is working.")
+
+    def test_read_file_fast(self):
+        """
+        Test the fast parser gives the same results as the legacy parser.
+        """
+
+        with open(self.elv_file_path, 'r', encoding="latin-1", errors='ignore') as elv_text_file:
+            elv_file_ref = ElvFile()
+            elv_file_ref.read(elv_text_file)
+
+        with open(self.elv_file_path, 'r', encoding="latin-1", errors='ignore') as elv_text_file:
+            elv_file = ElvFile()
+            elv_file.read(elv_text_file, fast=True)
+
+        self.assertEqual(elv_file_ref.parameters(), elv_file.parameters())
+
+        self.assertEqual(np.float64, elv_file.energies_eV.dtype)
+        self.assertEqual(np.int64, elv_file.raw_counts.dtype)
+        self.assertEqual(1024, len(elv_file.gain_corrections))
+        self.assertEqual(1024, len(elv_file.dark_currents))
+
+        np.testing.assert_array_equal(elv_file_ref.energies_eV, elv_file.energies_eV)
+        np.testing.assert_array_equal(elv_file_ref.raw_counts, elv_file.raw_counts)
+        np.testing.assert_array_equal(elv_file_ref.gain_corrections, elv_file.gain_corrections)
+        np.testing.assert_array_equal(elv_file_ref.dark_currents, elv_file.dark_currents)
+
+        # self.fail("Test if the testcase is working.")
+
+
+class TestElvFileFast(unittest.TestCase):
+    """
+    TestCase class for the fast parser of the module `pysemeels.hitachi.eels_su.elv_file` with synthetic files.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def test_read_fast(self):
+        """
+        Test the fast parser gives the same header and data as the legacy parser, with LF and CRLF line endings.
+        """
+
+        text = create_elv_text(number_channels=1024)
+        for line_ending in ["\n", "\r\n"]:
+            elv_text = text.replace("\n", line_ending)
+
+            elv_file_ref = ElvFile()
+            elv_file_ref.read(io.StringIO(elv_text, newline=''))
+
+            elv_file = ElvFile()
+            elv_file.read(io.StringIO(elv_text, newline=''), fast=True)
+
+            self.assertEqual(elv_file_ref.parameters(), elv_file.parameters())
+            self.assertEqual(37443, elv_file.mag)
+            self.assertEqual(98.7, elv_file.raw)
+
+            self.assertEqual(np.float64, elv_file.energies_eV.dtype)
+            self.assertEqual(np.int64, elv_file.raw_counts.dtype)
+            self.assertEqual(1024, len(elv_file.raw_counts))
+            self.assertEqual(1024, len(elv_file.gain_corrections))
+            self.assertEqual(1024, len(elv_file.dark_currents))
+
+            np.testing.assert_array_equal(elv_file_ref.energies_eV, elv_file.energies_eV)
+            np.testing.assert_array_equal(elv_file_ref.raw_counts, elv_file.raw_counts)
+            np.testing.assert_array_equal(elv_file_ref.gain_corrections, elv_file.gain_corrections)
+            np.testing.assert_array_equal(elv_file_ref.dark_currents, elv_file.dark_currents)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_export_msa_fast(self):
+        """
+        Test the export_msa method writes the same msa file with the numpy arrays of the fast parser.
+        """
+
+        text = create_elv_text(number_channels=1024)
+
+        path = tempfile.mkdtemp()
+        try:
+            msa_texts = []
+            for fast in [False, True]:
+                elv_file = ElvFile()
+                elv_file.read(io.StringIO(text), fast=fast)
+
+                msa_file_path = os.path.join(path, "30kV_7eV_{}.msa".format(fast))
+                elv_file.export_msa(msa_file_path)
+                with open(msa_file_path, 'r') as msa_file:
+                    msa_texts.append(msa_file.read())
+        finally:
+            shutil.rmtree(path)
+
+        self.assertEqual(msa_texts[0], msa_texts[1])
+
+        # self.fail("Test if the testcase is working.")
+
+
+class TestElvFileHeader(unittest.TestCase):
+    """
+    TestCase class for the header only reading of the module `pysemeels.hitachi.eels_su.elv_file`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def test_read_header(self):
+        """
+        Test the read_header method stops at the first data line.
+        """
+
+        elv_text_file = io.StringIO(create_elv_text())
+        elv_file = ElvFile()
+        elv_file.read_header(elv_text_file)
+
+        self.assertEqual("01/Mar/2017", elv_file.date)
+        self.assertEqual("", elv_file.comment)
+        self.assertEqual(500.0, elv_file.dose)
+        self.assertEqual(0.0, elv_file.le)
+        self.assertEqual(98.7, elv_file.raw)
+        self.assertEqual(133, elv_file.dual_det_post)
+        self.assertEqual(7.0, elv_file.energy_width)
+        self.assertEqual(13575, elv_file.q1)
+        self.assertEqual(-600, elv_file.h2)
+        self.assertEqual(37443, elv_file.mag)
+        self.assertEqual([], elv_file.energies_eV)
+        self.assertEqual("-31.95,2283\n", elv_text_file.readline())
+
+        elv_file_ref = ElvFile()
+        elv_file_ref.read(io.StringIO(create_elv_text()))
+        self.assertEqual(elv_file_ref.mag, elv_file.mag)
+        self.assertEqual(elv_file_ref.dual_det_position, elv_file.dual_det_position)
+
+        # self.fail("Test if the testcase is working.")
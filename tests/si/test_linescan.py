@@ -28,16 +28,21 @@ Tests for the module :py:mod:`pysemeels.si.linescan`.
 # Standard library modules.
 import unittest
 import os
+import struct
+import tempfile
+import shutil
 
 # Third party modules.
 import h5py
 import pytest
+import numpy as np
 
 # Local modules.
 
 # Project modules.
 from pysemeels import get_current_module_path
-from pysemeels.si.linescan import Linescan
+from pysemeels.si.linescan import Linescan, _parse_length
+from tests.hitachi.eels_su.map.test_ana_file import create_ana_text
 from tests import is_bad_file
 
 # Globals and constants variables.
@@ -134,3 +139,66 @@ class TestLinescan(unittest.TestCase):
             self.assertRaises(ValueError, linescan.read_hdf5, hdf5_file)
 
         # self.fail("Test if the testcase is working.")
+
+    def test_import_write_read_hdf5(self):
+        """
+        Test import_data, write_hdf5 and read_hdf5 methods with a small line scan folder.
+        """
+
+        path = tempfile.mkdtemp()
+        folder = os.path.join(path, "linescan_5pts")
+        os.makedirs(os.path.join(folder, "RawSpectra"))
+
+        with open(os.path.join(folder, "spectra_3.ana"), 'w') as ana_file:
+            ana_file.write(create_ana_text(number_channels=16, number_points=5, number_blocks=2))
+        raw_counts = np.arange(10 * 1024).reshape(10, 1024) % 4096
+        with open(os.path.join(folder, "RawSpectra", "rawspect-3.dat"), 'wb') as raw_spectra_file:
+            for counts in raw_counts:
+                raw_spectra_file.write(struct.pack("1024H", *counts))
+
+        try:
+            linescan = Linescan(self.name_ref)
+            linescan.import_data(folder, pitch=(2.5, "nm"), extra_parameters={"sample": "vacuum"})
+
+            self.assertEqual([3], list(linescan.spectra.keys()))
+            self.assertEqual((5, 16), linescan.spectra[3].shape)
+            self.assertEqual((10, 1024), linescan.raw_spectra[3].shape)
+            np.testing.assert_array_equal([0.0, 2.5, 5.0, 7.5, 10.0], linescan.positions)
+            self.assertEqual("nm", linescan.position_unit)
+            self.assertEqual({"sample": "vacuum"}, linescan.extra_parameters)
+
+            filepath = os.path.join(path, "test_linescan.hdf5")
+            with h5py.File(filepath, "w") as hdf5_file:
+                linescan.write_hdf5(hdf5_file)
+
+            with h5py.File(filepath, "r") as hdf5_file:
+                linescan_read = Linescan(self.name_ref)
+                linescan_read.read_hdf5(hdf5_file)
+
+                dataset = linescan_read.spectra[3]
+                self.assertIsInstance(dataset, h5py.Dataset)
+                self.assertEqual((5, 16), dataset.chunks)
+                self.assertEqual("positions", os.path.basename(dataset.dims[0][0].name))
+
+                np.testing.assert_array_equal(linescan.positions, linescan_read.positions)
+                self.assertEqual("nm", linescan_read.position_unit)
+                self.assertEqual("vacuum", linescan_read.extra_parameters["sample"])
+                np.testing.assert_array_equal(linescan.energies_eV, linescan_read.energies_eV)
+                np.testing.assert_array_equal(linescan.spectra[3][1:4], linescan_read.get_spectra(3, 1, 4))
+                np.testing.assert_array_equal(raw_counts, linescan_read.raw_spectra[3][...])
+        finally:
+            shutil.rmtree(path)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_parse_length(self):
+        """
+        Test _parse_length function.
+        """
+
+        self.assertEqual((12.5, "nm"), _parse_length("12.5nm"))
+        self.assertEqual((3.0, "um"), _parse_length(" 3 um"))
+        self.assertIsNone(_parse_length(""))
+        self.assertIsNone(_parse_length(None))
+
+        # self.fail("Test if the testcase is working.")
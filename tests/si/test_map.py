@@ -28,16 +28,21 @@ Tests for the module :py:mod:`pysemeels.si.map`.
 # Standard library modules.
 import unittest
 import os
+import tempfile
+import shutil
 
 # Third party modules.
 import h5py
 import pytest
+import numpy as np
 
 # Local modules.
 
 # Project modules.
 from pysemeels import get_current_module_path
-from pysemeels.si.map import Map
+from pysemeels.si.map import Map, _create_spectrum_image
+from pysemeels.hitachi.eels_su.map.text_file import TextParameters
+from tests.hitachi.eels_su.map.test_ana_file import create_ana_text
 from tests import is_bad_file
 
 # Globals and constants variables.
@@ -157,3 +162,126 @@ class TestMap(unittest.TestCase):
         # self.assertEqual(1024, len(map.raw_counts))
 
         # self.fail("Test if the testcase is working.")
+
+    def test_import_data_synthetic(self):
+        """
+        Test import_data method with a small map folder, only the total spectra are read.
+        """
+
+        path = tempfile.mkdtemp()
+        name = "map_2x2"
+        folder = os.path.join(path, name)
+        os.makedirs(folder)
+
+        with open(os.path.join(folder, "spectra_1.ana"), 'w') as ana_file:
+            ana_file.write(create_ana_text(number_channels=16, number_points=4, number_blocks=3))
+        with open(os.path.join(folder, name + ".txt"), 'w', encoding="UTF-16") as text_file:
+            text_file.write("SU9000 Magnification = 37443\nAccelerating Voltage = 5000 Volt\n")
+
+        try:
+            si_map = Map(name)
+            si_map.import_data(folder)
+
+            self.assertEqual([1], list(si_map.spectrum_images.keys()))
+            self.assertEqual((2, 2, 16), si_map.spectrum_images[1].shape)
+            self.assertEqual(16, len(si_map.energies_eV))
+            self.assertEqual(120, si_map.spectrum_images[1][1, 0, 0])
+        finally:
+            shutil.rmtree(path)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_import_data_not_square(self):
+        """
+        Test import_data method with a map that is not square, the shape is read from the data size.
+        """
+
+        path = tempfile.mkdtemp()
+        name = "map_3x2"
+        folder = os.path.join(path, name)
+        os.makedirs(folder)
+
+        with open(os.path.join(folder, "spectra_1.ana"), 'w') as ana_file:
+            ana_file.write(create_ana_text(number_channels=16, number_points=6, number_blocks=1))
+
+        try:
+            with open(os.path.join(folder, name + ".txt"), 'w', encoding="UTF-16") as text_file:
+                text_file.write("SU9000 Magnification = 37443\n[Analysis]\nData Size = 3x2\n")
+            si_map = Map(name)
+            si_map.import_data(folder)
+            self.assertEqual((2, 3, 16), si_map.spectrum_images[1].shape)
+
+            with open(os.path.join(folder, name + ".txt"), 'w', encoding="UTF-16") as text_file:
+                text_file.write("SU9000 Magnification = 37443\n")
+            si_map = Map(name)
+            si_map.import_data(folder)
+            self.assertEqual((1, 6, 16), si_map.spectrum_images[1].shape)
+
+            si_map = Map(name)
+            si_map.import_data(folder, shape=(3, 2))
+            self.assertEqual((3, 2, 16), si_map.spectrum_images[1].shape)
+        finally:
+            shutil.rmtree(path)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_write_read_hdf5_spectrum_image(self):
+        """
+        Test write_hdf5 and read_hdf5 methods with spectrum images.
+        """
+
+        path = tempfile.mkdtemp()
+        filepath = os.path.join(path, "test_map_spectrum_image.hdf5")
+
+        spectrum_image = np.arange(6 * 5 * 1024, dtype=np.float64).reshape(6, 5, 1024) % 997
+        self.map.energies_eV = np.linspace(-32.0, 21.84, 1024)
+        self.map.spectrum_images[1] = spectrum_image
+        self.map.extra_parameters = {"sample": "SCNA9"}
+
+        try:
+            with h5py.File(filepath, "w") as hdf5_file:
+                self.map.write_hdf5(hdf5_file)
+
+                dataset = hdf5_file[self.name_ref]["spectra 1"]["spectrum image"]
+                self.assertEqual((6, 5, 1024), dataset.shape)
+                self.assertEqual((6, 5, 64), dataset.chunks)
+                self.assertEqual("gzip", dataset.compression)
+                self.assertEqual("energies eV", os.path.basename(dataset.dims[2][0].name))
+
+            with h5py.File(filepath, "r") as hdf5_file:
+                si_map = Map(self.name_ref)
+                self.assertIsNone(si_map.read_hdf5(hdf5_file))
+
+                self.assertEqual([1], list(si_map.spectrum_images.keys()))
+                self.assertIsInstance(si_map.spectrum_images[1], h5py.Dataset)
+                self.assertEqual("SCNA9", si_map.extra_parameters["sample"])
+                np.testing.assert_array_equal(self.map.energies_eV, si_map.energies_eV)
+                np.testing.assert_array_equal(spectrum_image[2, 3], si_map.get_spectrum(1, 2, 3))
+                np.testing.assert_array_equal(spectrum_image[:, :, 100], si_map.get_energy_image(1, 100))
+        finally:
+            shutil.rmtree(path)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_create_spectrum_image(self):
+        """
+        Test _create_spectrum_image function.
+        """
+
+        spectra = np.arange(12 * 4).reshape(12, 4)
+
+        self.assertEqual((3, 4, 4), _create_spectrum_image(spectra, (3, 4)).shape)
+        np.testing.assert_array_equal(spectra[5], _create_spectrum_image(spectra, (3, 4))[1, 1])
+        self.assertEqual((3, 3, 4), _create_spectrum_image(spectra[:9]).shape)
+        self.assertEqual((1, 12, 4), _create_spectrum_image(spectra).shape)
+        self.assertRaises(ValueError, _create_spectrum_image, spectra, (5, 2))
+
+        text_parameters = TextParameters()
+        text_parameters.data_size = "4x3"
+        text_parameters.capture_resolution = "512x512"
+        self.assertEqual((3, 4, 4), _create_spectrum_image(spectra, text_parameters=text_parameters).shape)
+        text_parameters.data_size = ""
+        text_parameters.capture_resolution = "6x2"
+        self.assertEqual((2, 6, 4), _create_spectrum_image(spectra, text_parameters=text_parameters).shape)
+
+        # self.fail("Test if the testcase is working.")
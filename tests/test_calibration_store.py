@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: tests.test_calibration_store
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeels.calibration_store`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import os
+import tempfile
+import shutil
+
+# Third party modules.
+import h5py
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeels.calibration_store import CalibrationStore, calibration_key, HDF5_GROUP_CALIBRATIONS
+
+# Globals and constants variables.
+
+
+class TestCalibrationStore(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeels.calibration_store`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.path = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.path, "test_calibration_store.hdf5")
+
+        self.gain_corrections = np.linspace(0.9, 1.1, 1024)
+        self.dark_currents = np.full(1024, 2313.0)
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.path)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def test_calibration_key(self):
+        """
+        Test calibration_key function.
+        """
+
+        self.assertEqual(calibration_key(self.gain_corrections), calibration_key(self.gain_corrections.copy()))
+        self.assertNotEqual(calibration_key(self.gain_corrections), calibration_key(self.dark_currents))
+        self.assertNotEqual(calibration_key(self.dark_currents), calibration_key(self.dark_currents.astype(np.float32)))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_link_read(self):
+        """
+        Test link and read methods.
+        """
+
+        with h5py.File(self.file_path, 'w') as hdf5_file:
+            calibration_store = CalibrationStore(hdf5_file.require_group(HDF5_GROUP_CALIBRATIONS))
+            for spectrum_id in range(3):
+                spectrum_group = hdf5_file.require_group("spectrum {}".format(spectrum_id))
+                calibration_store.link(spectrum_group, "gain corrections", self.gain_corrections.copy())
+                calibration_store.link(spectrum_group, "dark currents", self.dark_currents.copy())
+
+            self.assertEqual(2, len(hdf5_file[HDF5_GROUP_CALIBRATIONS]))
+
+        with h5py.File(self.file_path, 'r') as hdf5_file:
+            np.testing.assert_array_equal(self.gain_corrections, hdf5_file["spectrum 2/gain corrections"][...])
+
+            calibration_store = CalibrationStore(hdf5_file[HDF5_GROUP_CALIBRATIONS])
+            gain_corrections_0 = calibration_store.read(hdf5_file["spectrum 0/gain corrections"])
+            gain_corrections_1 = calibration_store.read(hdf5_file["spectrum 1/gain corrections"])
+            dark_currents_0 = calibration_store.read(hdf5_file["spectrum 0/dark currents"])
+
+            self.assertIs(gain_corrections_0, gain_corrections_1)
+            self.assertFalse(gain_corrections_0.flags.writeable)
+            self.assertEqual(2, len(calibration_store))
+            np.testing.assert_array_equal(self.dark_currents, dark_currents_0)
+
+            calibration_store = CalibrationStore()
+            self.assertIs(calibration_store.read(hdf5_file["spectrum 0/gain corrections"]),
+                          calibration_store.read(hdf5_file["spectrum 1/gain corrections"]))
+            self.assertRaises(ValueError, calibration_store.link, hdf5_file["spectrum 0"], "gain corrections",
+                              self.gain_corrections)
+
+        # self.fail("Test if the testcase is working.")
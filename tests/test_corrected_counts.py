@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: tests.test_corrected_counts
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeels.corrected_counts`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import tempfile
+import os
+import shutil
+
+# Third party modules.
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeels.corrected_counts import correct_counts, correct_counts_batch, counts_input_property, \
+    CorrectedCountsMixin
+
+# Globals and constants variables.
+
+
+class Spectrum(CorrectedCountsMixin):
+    raw_counts = counts_input_property("raw_counts")
+    gain_corrections = counts_input_property("gain_corrections")
+    dark_currents = counts_input_property("dark_currents")
+
+
+class TestCorrectedCounts(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeels.corrected_counts`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        random_state = np.random.RandomState(12345)
+        self.raw_counts = random_state.poisson(40000.0, 1024).astype(np.uint16)
+        self.gain_corrections = random_state.normal(1.0, 0.05, 1024)
+        self.dark_currents = np.round(random_state.normal(2300.0, 10.0, 1024))
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def test_correct_counts(self):
+        """
+        Test correct_counts function.
+        """
+
+        counts_ref = (self.raw_counts.astype(np.float64) - self.dark_currents) / self.gain_corrections
+
+        counts = correct_counts(self.raw_counts, self.dark_currents, self.gain_corrections)
+        self.assertEqual(np.float64, counts.dtype)
+        np.testing.assert_array_equal(counts_ref, counts)
+
+        counts = correct_counts(list(self.raw_counts), list(self.dark_currents), list(self.gain_corrections))
+        np.testing.assert_array_equal(counts_ref, counts)
+
+        counts = correct_counts(self.raw_counts, self.dark_currents, self.gain_corrections, dtype=np.float32)
+        self.assertEqual(np.float32, counts.dtype)
+        np.testing.assert_allclose(counts_ref, counts, rtol=1.0e-6)
+
+        out = np.empty((3, 1024))
+        counts = correct_counts(np.tile(self.raw_counts, (3, 1)), self.dark_currents, self.gain_corrections, out=out)
+        self.assertIs(out, counts)
+        np.testing.assert_array_equal(counts_ref, counts[2])
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_correct_counts_batch(self):
+        """
+        Test correct_counts_batch function with a memory-mapped stack, small chunks and threads.
+        """
+
+        raw_counts = np.tile(self.raw_counts, (10, 1))
+        raw_counts[:, 0] = np.arange(10)
+        counts_ref = (raw_counts.astype(np.float64) - self.dark_currents) / self.gain_corrections
+
+        path = tempfile.mkdtemp()
+        try:
+            file_path = os.path.join(path, "rawspect-1.dat")
+            raw_counts.tofile(file_path)
+            raw_counts_memmap = np.memmap(file_path, dtype=np.uint16, mode='r', shape=raw_counts.shape)
+
+            for workers in [1, 3]:
+                out = np.empty(raw_counts.shape)
+                counts = correct_counts_batch(raw_counts_memmap, self.dark_currents, self.gain_corrections, out=out,
+                                              chunk_size=3, workers=workers)
+                self.assertIs(out, counts)
+                np.testing.assert_array_equal(counts_ref, counts)
+
+            del raw_counts_memmap
+        finally:
+            shutil.rmtree(path)
+
+        counts = correct_counts_batch(raw_counts, self.dark_currents, self.gain_corrections, dtype=np.float32)
+        self.assertEqual(np.float32, counts.dtype)
+        np.testing.assert_allclose(counts_ref, counts, rtol=1.0e-6)
+
+        self.assertRaises(ValueError, correct_counts_batch, self.raw_counts, self.dark_currents, self.gain_corrections)
+        self.assertRaises(ValueError, correct_counts_batch, raw_counts, self.dark_currents, self.gain_corrections,
+                          out=np.empty((9, 1024)))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_cached_counts(self):
+        """
+        Test the counts are computed once and computed again when an input array is replaced.
+        """
+
+        spectrum = Spectrum()
+        spectrum.raw_counts = self.raw_counts
+        spectrum.gain_corrections = self.gain_corrections
+        spectrum.dark_currents = self.dark_currents
+
+        counts = spectrum.counts
+        self.assertIs(counts, spectrum.counts)
+        self.assertTrue(counts.flags.writeable)
+
+        spectrum.dark_currents = self.dark_currents + 1.0
+        self.assertIsNot(counts, spectrum.counts)
+        np.testing.assert_allclose(counts - 1.0 / self.gain_corrections, spectrum.counts)
+
+        counts = spectrum.compute_counts(dtype=np.float32)
+        self.assertEqual(np.float32, spectrum.counts.dtype)
+        self.assertIs(counts, spectrum.counts)
+
+        out = np.empty(1024)
+        self.assertIs(out, spectrum.compute_counts(out=out))
+        self.assertIs(out, spectrum.counts)
+
+        spectrum.invalidate_counts()
+        self.assertIsNot(out, spectrum.counts)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_cached_counts_in_place(self):
+        """
+        Test the counts are computed again after invalidate_counts when an input array or list is modified in place.
+        """
+
+        spectrum = Spectrum()
+        spectrum.raw_counts = list(self.raw_counts[:1023])
+        spectrum.gain_corrections = self.gain_corrections[:1023].copy()
+        spectrum.dark_currents = self.dark_currents[:1023].copy()
+
+        counts = spectrum.counts
+        self.assertIs(counts, spectrum.counts)
+        self.assertEqual(1023, len(counts))
+
+        spectrum.raw_counts.append(self.raw_counts[1023])
+        spectrum.gain_corrections = self.gain_corrections
+        spectrum.dark_currents = self.dark_currents.copy()
+        self.assertEqual(1024, len(spectrum.counts))
+
+        counts = spectrum.counts
+        spectrum.dark_currents[0] += 10.0
+        self.assertIs(counts, spectrum.counts)
+
+        spectrum.invalidate_counts()
+        self.assertIsNot(counts, spectrum.counts)
+        self.assertAlmostEqual(counts[0] - 10.0 / self.gain_corrections[0], spectrum.counts[0])
+
+        # self.fail("Test if the testcase is working.")
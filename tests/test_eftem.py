@@ -28,16 +28,19 @@ Tests for the module :py:mod:`pysemeels.eftem`.
 # Standard library modules.
 import unittest
 import os
+import tempfile
+import shutil
 
 # Third party modules.
 import h5py
+import numpy as np
 import pytest
 
 # Local modules.
 
 # Project modules.
 from pysemeels import get_current_module_path
-from pysemeels.eftem import Eftem
+from pysemeels.eftem import Eftem, EFTEM_PRE_LOW, EFTEM_POST, downsample_image, create_pyramid, HDF5_GROUP_PYRAMID
 from tests import is_bad_file
 
 # Globals and constants variables.
@@ -104,6 +107,102 @@ class TestEftem(unittest.TestCase):
 
         # self.fail("Test if the testcase is working.")
 
+    def test_import_data(self):
+        """
+        Test import_data method with 16 bits TIFF micrographs and the HDF5 round trip.
+        """
+        from PIL import Image
+
+        path = tempfile.mkdtemp()
+        try:
+            folder = os.path.join(path, "SCNA9_EFSTEM_C_04")
+            os.mkdir(folder)
+
+            pre_low = np.arange(300 * 400, dtype=np.uint16).reshape(300, 400)
+            post = pre_low[::-1].copy()
+            Image.fromarray(pre_low).save(os.path.join(folder, "SCNA9_EFSTEM_C_04-PreL.tif"))
+            Image.fromarray(post).save(os.path.join(folder, "SCNA9_EFSTEM_C_04-Post.tif"))
+            Image.fromarray(post).save(os.path.join(folder, "SCNA9_EFSTEM_C_04-.tif"))
+            Image.fromarray(post).save(os.path.join(folder, "2w_prel.tif"))
+            Image.fromarray(post.astype(np.uint8)).save(os.path.join(folder, "SCNA9_EFSTEM_C_04-Post.bmp"))
+            Image.fromarray((pre_low % 256).astype(np.uint8)).save(os.path.join(folder, "SCNA9_EFSTEM_C_04-SE.bmp"))
+
+            self.eftem.import_data(folder, extra_parameters={"sample": "SCNA9", "voltage (kV)": 5.0})
+
+            self.assertEqual([EFTEM_POST, EFTEM_PRE_LOW, "SE"], sorted(self.eftem.micrographs.keys()))
+            self.assertEqual(np.uint8, self.eftem.micrographs["SE"].dtype)
+            np.testing.assert_array_equal(pre_low, self.eftem.micrographs[EFTEM_PRE_LOW])
+            np.testing.assert_array_equal(post, self.eftem.micrographs[EFTEM_POST])
+
+            with h5py.File(os.path.join(path, "eftem.hdf5"), "w") as hdf5_file:
+                self.eftem.write_hdf5(hdf5_file)
+
+                eftem = Eftem(self.name_ref)
+                self.assertIsNone(eftem.read_hdf5(hdf5_file))
+                micrographs = eftem.micrographs
+
+                self.assertEqual((256, 256), micrographs[EFTEM_PRE_LOW].chunks)
+                self.assertEqual(np.uint16, micrographs[EFTEM_PRE_LOW].dtype)
+                np.testing.assert_array_equal(post[10:20, 300:310], micrographs[EFTEM_POST][10:20, 300:310])
+                self.assertEqual("gzip", micrographs[EFTEM_PRE_LOW].compression)
+
+                overview = eftem.get_overview(EFTEM_POST, 8)
+                self.assertEqual((38, 50), overview.shape)
+                self.assertEqual("4x", os.path.basename(eftem.get_overview(EFTEM_POST, 4).name))
+                self.assertEqual(["2x", "4x", "8x"], sorted(hdf5_file[self.name_ref][HDF5_GROUP_PYRAMID][EFTEM_POST]))
+                np.testing.assert_array_equal(self.eftem.pyramids[EFTEM_POST][8], overview[...])
+                self.assertIs(micrographs[EFTEM_POST], eftem.get_overview(EFTEM_POST, 1))
+
+                self.assertEqual([EFTEM_POST, EFTEM_PRE_LOW, "SE"], sorted(micrographs.keys()))
+                self.assertEqual("SCNA9", eftem.extra_parameters["sample"])
+                self.assertEqual(5.0, eftem.extra_parameters["voltage (kV)"])
+        finally:
+            shutil.rmtree(path)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_downsample_image(self):
+        """
+        Test downsample_image and create_pyramid functions.
+        """
+        image = np.arange(5 * 7, dtype=np.uint16).reshape(5, 7)
+
+        downsampled_image = downsample_image(image, 2)
+        self.assertEqual((3, 4), downsampled_image.shape)
+        self.assertEqual(np.uint16, downsampled_image.dtype)
+        self.assertEqual(4, downsampled_image[0, 0])
+        self.assertEqual(np.round(np.mean(image[4:, 6:])), downsampled_image[2, 3])
+        self.assertEqual(np.round(np.mean(image[:2, 6:])), downsampled_image[0, 3])
+
+        rgb_image = np.random.RandomState(12345).uniform(size=(16, 16, 3))
+        np.testing.assert_allclose(rgb_image.reshape(4, 4, 4, 4, 3).mean(axis=(1, 3)), downsample_image(rgb_image, 4))
+
+        pyramid = create_pyramid(rgb_image)
+        self.assertEqual([2, 4, 8], sorted(pyramid.keys()))
+        self.assertEqual((2, 2, 3), pyramid[8].shape)
+        np.testing.assert_allclose(downsample_image(rgb_image, 8), pyramid[8])
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_create_pyramid(self):
+        """
+        Test create_pyramid function with an image shape not a multiple of the factors.
+        """
+        image = np.random.RandomState(12345).randint(0, 1000, size=(7, 11)).astype(np.uint16)
+
+        pyramid = create_pyramid(image, factors=(2, 4, 8))
+        self.assertEqual((1, 2), pyramid[8].shape)
+        for factor in [2, 4, 8]:
+            self.assertEqual(np.uint16, pyramid[factor].dtype)
+            np.testing.assert_array_equal(downsample_image(image, factor), pyramid[factor])
+        self.assertEqual(np.round(np.mean(image[:, 8:])), pyramid[8][0, 1])
+
+        for factors in [(2, 3), (4, 2), (2, 2), (0, 2), (2.5,)]:
+            self.assertRaises(ValueError, create_pyramid, image, factors)
+        self.assertRaises(ValueError, downsample_image, image, 0)
+
+        # self.fail("Test if the testcase is working.")
+
     def test_read_hdf5(self):
         """
         Test read_hdf5 method.
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: tests.test_hdf5_storage
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeels.hdf5_storage`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import os
+import tempfile
+import shutil
+
+# Third party modules.
+import h5py
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeels.hdf5_storage import Hdf5StorageOptions, ARCHIVE_STORAGE_OPTIONS, SPECTRUM_IMAGE_STORAGE_OPTIONS, \
+    create_dataset, spectrum_image_chunks
+
+# Globals and constants variables.
+
+
+class TestHdf5Storage(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeels.hdf5_storage`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.path = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.path, "test_hdf5_storage.hdf5")
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.path)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def test_create_dataset_default(self):
+        """
+        Test create_dataset function without storage options.
+        """
+
+        data = np.arange(1024, dtype=np.int64)
+        with h5py.File(self.file_path, 'w') as hdf5_file:
+            dataset = create_dataset(hdf5_file, "counts", data, is_counts=True)
+
+            self.assertEqual(np.int64, dataset.dtype)
+            self.assertIsNone(dataset.chunks)
+            self.assertIsNone(dataset.compression)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_create_dataset_archive(self):
+        """
+        Test create_dataset function with the archive storage options.
+        """
+
+        counts = np.arange(1024, dtype=np.int64)
+        energies_eV = np.linspace(-32.0, 21.84, 1024)
+        with h5py.File(self.file_path, 'w') as hdf5_file:
+            dataset = create_dataset(hdf5_file, "counts", counts, ARCHIVE_STORAGE_OPTIONS, is_counts=True)
+
+            self.assertEqual(np.uint16, dataset.dtype)
+            self.assertIsNotNone(dataset.chunks)
+            self.assertEqual("gzip", dataset.compression)
+            self.assertEqual(4, dataset.compression_opts)
+            self.assertTrue(dataset.shuffle)
+            np.testing.assert_array_equal(counts, dataset[...])
+
+            dataset = create_dataset(hdf5_file, "energies", energies_eV, ARCHIVE_STORAGE_OPTIONS)
+            self.assertEqual(np.float64, dataset.dtype)
+            np.testing.assert_array_equal(energies_eV, dataset[...])
+
+            dataset = create_dataset(hdf5_file, "scalar", 1.0, ARCHIVE_STORAGE_OPTIONS)
+            self.assertEqual(1.0, dataset[()])
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_convert_counts(self):
+        """
+        Test convert_counts method only converts when the conversion is lossless.
+        """
+
+        storage_options = Hdf5StorageOptions(counts_dtype=np.uint16)
+
+        self.assertEqual(np.uint16, storage_options.convert_counts([0, 2282, 65535]).dtype)
+        self.assertEqual(np.uint16, storage_options.convert_counts(np.array([0.0, 2282.0])).dtype)
+        self.assertEqual(np.int64, storage_options.convert_counts(np.array([-1, 2282])).dtype)
+        self.assertEqual(np.int64, storage_options.convert_counts(np.array([0, 65536])).dtype)
+        self.assertEqual(np.float64, storage_options.convert_counts(np.array([0.5, 2282.0])).dtype)
+        self.assertEqual(np.float64, storage_options.convert_counts(np.array([np.nan, 2282.0])).dtype)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_convert_floats(self):
+        """
+        Test convert_floats method.
+        """
+
+        storage_options = Hdf5StorageOptions(float_dtype=np.float32)
+
+        self.assertEqual(np.float32, storage_options.convert_floats(np.array([0.5, 1.5])).dtype)
+        self.assertEqual(np.int64, storage_options.convert_floats(np.array([1, 2])).dtype)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_dataset_kwargs(self):
+        """
+        Test dataset_kwargs method.
+        """
+
+        self.assertEqual({}, Hdf5StorageOptions().dataset_kwargs())
+
+        storage_options = Hdf5StorageOptions(compression="lzf", compression_level=4, shuffle=True, chunks=(256,))
+        self.assertEqual({"compression": "lzf", "shuffle": True, "chunks": (256,)}, storage_options.dataset_kwargs())
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_spectrum_image_chunks(self):
+        """
+        Test spectrum_image_chunks function.
+        """
+
+        self.assertEqual((22, 22, 64), spectrum_image_chunks((256, 256, 1024), 8))
+        self.assertEqual((4, 4, 64), spectrum_image_chunks((4, 4, 1024), 8))
+        self.assertEqual((52, 64), spectrum_image_chunks((52, 1024), 8))
+        self.assertEqual((2, 3, 10), spectrum_image_chunks((2, 3, 10), 8))
+        self.assertEqual((64,), spectrum_image_chunks((1024,), 8))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_create_dataset_chunks(self):
+        """
+        Test create_dataset function with a chunk shape.
+        """
+
+        data = np.ones((8, 8, 128))
+        with h5py.File(self.file_path, 'w') as hdf5_file:
+            dataset = create_dataset(hdf5_file, "default", data, chunks=(4, 4, 64))
+            self.assertEqual((4, 4, 64), dataset.chunks)
+            self.assertIsNone(dataset.compression)
+
+            dataset = create_dataset(hdf5_file, "archive", data, SPECTRUM_IMAGE_STORAGE_OPTIONS, chunks=(4, 4, 64))
+            self.assertEqual((4, 4, 64), dataset.chunks)
+            self.assertEqual("gzip", dataset.compression)
+
+        # self.fail("Test if the testcase is working.")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: tests.test_metadata_index
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeels.metadata_index`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import tempfile
+import os
+import shutil
+
+# Third party modules.
+import h5py
+import numpy as np
+
+# Local modules.
+
+# Project modules.
+from pysemeels.metadata_index import MetadataIndex, HDF5_DATASET_METADATA_INDEX, METADATA_INDEX_NAME, \
+    _contiguous_runs
+from pysemeels.tools.hdf5_file_labels import *
+
+# Globals and constants variables.
+
+
+class TestMetadataIndex(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeels.metadata_index`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.path = tempfile.mkdtemp()
+        self.hdf5_file_path = os.path.join(self.path, "project.hdf5")
+
+        self.parameters = {"spectrum_1": {HDF5_ACCELERATING_VOLTAGE_V: 30000, HDF5_ENERGY_WIDTH_eV: 7.0,
+                                          HDF5_MAGNIFICATION: 37443, HDF5_DATE: "01/Mar/2017"},
+                           "spectrum_2": {HDF5_ACCELERATING_VOLTAGE_V: 30000, HDF5_ENERGY_WIDTH_eV: 3.0,
+                                          HDF5_MAGNIFICATION: 5000},
+                           "spectrum_3": {HDF5_ACCELERATING_VOLTAGE_V: 5000, HDF5_ENERGY_WIDTH_eV: 7.0,
+                                          "speed (us)": 500.0, HDF5_Q1: "bad value"}}
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.path)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def test_query(self):
+        """
+        Test the query, mask and select methods.
+        """
+
+        metadata_index = MetadataIndex()
+        metadata_index.update_many(self.parameters.items())
+
+        self.assertEqual(3, len(metadata_index))
+        self.assertIn("spectrum_2", metadata_index)
+        self.assertEqual(["spectrum_1", "spectrum_2", "spectrum_3"], metadata_index.names)
+
+        self.assertEqual(["spectrum_1"], metadata_index.query({HDF5_ACCELERATING_VOLTAGE_V: 30000,
+                                                               HDF5_ENERGY_WIDTH_eV: 7.0}))
+        self.assertEqual(["spectrum_1", "spectrum_2"],
+                         metadata_index.query({HDF5_ACCELERATING_VOLTAGE_V: (10000, None)}))
+        self.assertEqual(["spectrum_2"], metadata_index.query(magnification=(None, 10000)))
+        self.assertEqual(["spectrum_3"], metadata_index.query({HDF5_ACQUISITION_SPEED: 500.0}))
+        self.assertEqual([], metadata_index.query({HDF5_ENERGY_WIDTH_eV: 15.0}))
+        self.assertEqual(metadata_index.names, metadata_index.query())
+        self.assertTrue(np.isnan(metadata_index.table[HDF5_Q1][2]))
+
+        mask = metadata_index.table[HDF5_MAGNIFICATION] > 10000
+        self.assertEqual(["spectrum_1"], metadata_index.select(mask))
+
+        self.assertRaises(KeyError, metadata_index.query, {HDF5_DATE: "01/Mar/2017"})
+
+        metadata_index.update("spectrum_2", {HDF5_ACCELERATING_VOLTAGE_V: 5000})
+        self.assertEqual(3, len(metadata_index))
+        self.assertEqual(["spectrum_2", "spectrum_3"], metadata_index.query({HDF5_ACCELERATING_VOLTAGE_V: 5000}))
+        self.assertTrue(np.isnan(metadata_index.table[HDF5_MAGNIFICATION][1]))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_hdf5(self):
+        """
+        Test the metadata index dataset is kept in sync with the updates.
+        """
+
+        with h5py.File(self.hdf5_file_path, 'w') as hdf5_file:
+            metadata_index = MetadataIndex(hdf5_file)
+            self.assertNotIn(HDF5_DATASET_METADATA_INDEX, hdf5_file)
+
+            for name, parameters in self.parameters.items():
+                metadata_index.update(name, parameters)
+            metadata_index.update("spectrum_1", {HDF5_ACCELERATING_VOLTAGE_V: 20000})
+
+            dataset = hdf5_file[HDF5_DATASET_METADATA_INDEX]
+            self.assertEqual((3,), dataset.shape)
+            self.assertEqual(20000.0, dataset[0][HDF5_ACCELERATING_VOLTAGE_V])
+
+        with h5py.File(self.hdf5_file_path, 'r+') as hdf5_file:
+            metadata_index = MetadataIndex(hdf5_file)
+
+            self.assertEqual(["spectrum_1", "spectrum_2", "spectrum_3"], metadata_index.names)
+            self.assertEqual(["spectrum_3"], metadata_index.query({HDF5_ACCELERATING_VOLTAGE_V: 5000}))
+
+            metadata_index.update("spectrum_4", {HDF5_ACCELERATING_VOLTAGE_V: 5000})
+            self.assertEqual((4,), hdf5_file[HDF5_DATASET_METADATA_INDEX].shape)
+
+            metadata_index.update_many([("spectrum_4", {HDF5_ACCELERATING_VOLTAGE_V: 5000, HDF5_Q1: 4}),
+                                        ("spectrum_1", {HDF5_ACCELERATING_VOLTAGE_V: 20000, HDF5_Q1: 1})])
+            data = hdf5_file[HDF5_DATASET_METADATA_INDEX][...]
+            np.testing.assert_array_equal([1.0, np.nan, np.nan, 4.0], data[HDF5_Q1])
+
+            copy_index = MetadataIndex(hdf5_file.create_group("copy"))
+            copy_index.update_many(zip(metadata_index.names, [{}] * 4))
+            metadata_index.write(hdf5_file["copy"])
+            data = hdf5_file["copy"][HDF5_DATASET_METADATA_INDEX][...]
+            self.assertEqual([b"spectrum_1", b"spectrum_2", b"spectrum_3", b"spectrum_4"],
+                             list(data[METADATA_INDEX_NAME]))
+            self.assertEqual(5000.0, data[3][HDF5_ACCELERATING_VOLTAGE_V])
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_contiguous_runs(self):
+        """
+        Test _contiguous_runs function.
+        """
+
+        self.assertEqual([], _contiguous_runs([]))
+        self.assertEqual([(0, 1), (3, 4)], _contiguous_runs([3, 0]))
+        self.assertEqual([(2, 5), (7, 8)], _contiguous_runs([4, 2, 3, 7, 3]))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_many_spectra(self):
+        """
+        Test the index grows beyond the initial capacity.
+        """
+
+        metadata_index = MetadataIndex()
+        metadata_index.update_many(("spectrum {:d}".format(spectrum_id), {HDF5_Q1: spectrum_id})
+                                   for spectrum_id in range(2500))
+
+        self.assertEqual(2500, len(metadata_index))
+        self.assertEqual(["spectrum 2499"], metadata_index.query(q1=2499))
+        self.assertEqual(100, len(metadata_index.query(q1=(2400, None))))
+
+        # self.fail("Test if the testcase is working.")
@@ -31,6 +31,7 @@ import os
 
 # Third party modules.
 import h5py
+import numpy as np
 import pytest
 
 # Local modules.
@@ -44,6 +45,9 @@ from pysemeels.si.point import Point
 from pysemeels.si.linescan import Linescan
 from pysemeels.si.map import Map
 from pysemeels.eftem import Eftem
+from pysemeels.metadata_index import HDF5_DATASET_METADATA_INDEX
+from pysemeels.calibration_store import HDF5_GROUP_CALIBRATIONS
+from pysemeels.tools.hdf5_file_labels import HDF5_ACCELERATING_VOLTAGE_V, HDF5_ENERGY_WIDTH_eV
 from tests import is_bad_file
 
 # Globals and constants variables.
@@ -155,6 +159,130 @@ class TestProject(unittest.TestCase):
 
         # self.fail("Test if the testcase is working.")
 
+    def test_read_hdf5_lazy(self):
+        """
+        Test read_hdf5 method in lazy mode.
+        """
+
+        for spectrum_id, spectrum in enumerate(self.project.spectra):
+            spectrum.energies_eV = np.linspace(-32.0, 21.84, 1024)
+            spectrum.raw_counts = np.arange(1024) + spectrum_id
+            spectrum.gain_corrections = np.ones(1024)
+            spectrum.dark_currents = np.zeros(1024)
+
+        filepath = os.path.join(self.test_data_path, "test_project_read_hdf5_lazy.hdf5")
+        with h5py.File(filepath, "w") as hdf5_file:
+            self.project.write_hdf5(hdf5_file)
+
+        with h5py.File(filepath, "r") as hdf5_file:
+            project = Project(self.name_ref)
+            project.read_hdf5(hdf5_file, lazy=True, maximum_loaded_spectra=2)
+
+            self.assertEqual(3, len(project.spectra))
+            self.assertEqual(3, len(project.si_points))
+            self.assertEqual(["RawSpectrum_1", "RawSpectrum_2", "RawSpectrum_3"], sorted(project.spectrum_index.keys()))
+            for spectrum in project.spectra:
+                self.assertFalse(spectrum.is_loaded)
+
+            spectrum_1 = project.spectrum_index["RawSpectrum_1"]
+            self.assertEqual(0, spectrum_1.raw_counts[0])
+            self.assertEqual(1, project.spectrum_index["RawSpectrum_2"].raw_counts[0])
+            self.assertEqual(2, project.spectrum_index["RawSpectrum_3"].raw_counts[0])
+
+            self.assertEqual(2, len(project.loaded_spectra_cache))
+            self.assertIsNone(spectrum_1._arrays["raw_counts"])
+            self.assertEqual(0, spectrum_1.raw_counts[0])
+
+        os.remove(filepath)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_write_read_hdf5_calibrations(self):
+        """
+        Test the deduplication of the calibration vectors is opt-in and the shared vectors are read-only.
+        """
+
+        for spectrum in self.project.spectra:
+            spectrum.energies_eV = np.linspace(-32.0, 21.84, 1024)
+            spectrum.raw_counts = np.arange(1024)
+            spectrum.gain_corrections = np.ones(1024)
+            spectrum.dark_currents = np.zeros(1024)
+
+        filepath = os.path.join(self.test_data_path, "test_project_calibrations.hdf5")
+        with h5py.File(filepath, "w") as hdf5_file:
+            self.project.write_hdf5(hdf5_file)
+            self.assertFalse(HDF5_GROUP_CALIBRATIONS in hdf5_file[self.name_ref])
+
+        with h5py.File(filepath, "w") as hdf5_file:
+            self.project.write_hdf5(hdf5_file, deduplicate_calibrations=True)
+            self.assertEqual(2, len(hdf5_file[self.name_ref][HDF5_GROUP_CALIBRATIONS]))
+
+        with h5py.File(filepath, "r") as hdf5_file:
+            project = Project(self.name_ref)
+            project.read_hdf5(hdf5_file)
+
+            gain_corrections = project.spectra[0].gain_corrections
+            self.assertTrue(gain_corrections.flags.writeable)
+            self.assertIsNot(gain_corrections, project.spectra[1].gain_corrections)
+            gain_corrections[0] = 2.0
+
+            project = Project(self.name_ref)
+            project.read_hdf5(hdf5_file, share_calibrations=True)
+
+            self.assertIs(project.spectra[0].gain_corrections, project.spectra[1].gain_corrections)
+            self.assertFalse(project.spectra[0].gain_corrections.flags.writeable)
+
+        os.remove(filepath)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_query_spectra(self):
+        """
+        Test query_spectra method with the metadata index written in the project.
+        """
+
+        for spectrum, accelerating_voltage_V in zip(self.project.spectra, [30000, 5000, 30000]):
+            spectrum.eels_parameters[HDF5_ACCELERATING_VOLTAGE_V] = accelerating_voltage_V
+            spectrum.eels_parameters[HDF5_ENERGY_WIDTH_eV] = 7.0
+
+        spectra = self.project.query_spectra({HDF5_ACCELERATING_VOLTAGE_V: 30000})
+        self.assertEqual(["RawSpectrum_1", "RawSpectrum_3"], [spectrum.name for spectrum in spectra])
+
+        filepath = os.path.join(self.test_data_path, "test_project_query_spectra.hdf5")
+        with h5py.File(filepath, "w") as hdf5_file:
+            self.project.write_hdf5(hdf5_file)
+            self.assertFalse(HDF5_DATASET_METADATA_INDEX in hdf5_file[self.name_ref])
+
+            self.project.write_hdf5(hdf5_file, metadata_index=True)
+            self.assertTrue(HDF5_DATASET_METADATA_INDEX in hdf5_file[self.name_ref])
+
+        with h5py.File(filepath, "r") as hdf5_file:
+            project = Project(self.name_ref)
+            project.read_hdf5(hdf5_file, lazy=True)
+
+            self.assertEqual(3, len(project.metadata_index))
+            spectra = project.query_spectra({HDF5_ACCELERATING_VOLTAGE_V: 5000, HDF5_ENERGY_WIDTH_eV: 7.0})
+            self.assertEqual([project.spectrum_index["RawSpectrum_2"]], spectra)
+            self.assertEqual([], project.query_spectra({HDF5_ENERGY_WIDTH_eV: 3.0}))
+
+        # The index is rebuilt, the rows of the removed spectra are not kept.
+        with h5py.File(filepath, "a") as hdf5_file:
+            del hdf5_file[self.name_ref][HDF5_GROUP_SPECTRA]["RawSpectrum_3"]
+            self.project.spectra = self.project.spectra[:2]
+            self.project.write_hdf5(hdf5_file, metadata_index=True)
+
+        with h5py.File(filepath, "r") as hdf5_file:
+            project = Project(self.name_ref)
+            project.read_hdf5(hdf5_file, lazy=True)
+
+            self.assertEqual(2, len(project.metadata_index))
+            self.assertEqual(["RawSpectrum_1"], [spectrum.name for spectrum in
+                                                 project.query_spectra({HDF5_ACCELERATING_VOLTAGE_V: 30000})])
+
+        os.remove(filepath)
+
+        # self.fail("Test if the testcase is working.")
+
     def test_read_hdf5_bad_project(self):
         """
         Test read_hdf5 method with a different project name.
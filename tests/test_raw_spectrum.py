@@ -42,6 +42,7 @@ from pysemeels import get_current_module_path
 from pysemeels.raw_spectrum import RawSpectrum, HDF5_GROUP_EXTRA_PARAMETERS, HDF5_GROUP_EELS_PARAMETERS, \
     HDF5_DATASET_ENERGIES_keV, HDF5_DATASET_RAW_COUNTS, HDF5_DATASET_GAIN_CORRECTIONS, HDF5_DATASET_DARK_CURRENTS
 from pysemeels.hdf5_sem_parameters import HDF5_ATTRIBUTE_ACCELERATING_VOLTAGE_V
+from pysemeels.hdf5_storage import ARCHIVE_STORAGE_OPTIONS
 from pysemeels.hitachi.eels_su.elv_text_file import *
 from pysemeels.tools.hdf5_file_labels import *
 from tests import is_bad_file
@@ -125,6 +126,55 @@ class TestRawSpectrum(unittest.TestCase):
 
         # self.fail("Test if the testcase is working.")
 
+    def test_write_hdf5_storage_options(self):
+        """
+        Test write_hdf5 method with compressed storage and uint16 raw counts.
+        """
+
+        self.spectrum.energies_eV = np.linspace(-32.0, 21.84, 1024)
+        self.spectrum.raw_counts = np.arange(1024, dtype=np.int64)
+        self.spectrum.gain_corrections = np.ones(1024)
+        self.spectrum.dark_currents = np.zeros(1024)
+
+        filepath = os.path.join(self.test_data_path, "test_raw_spectrum_write_hdf5_storage_options.hdf5")
+        with h5py.File(filepath, "w") as hdf5_file:
+            self.spectrum.write_hdf5(hdf5_file, ARCHIVE_STORAGE_OPTIONS)
+
+            root_group = hdf5_file[self.name_ref]
+            self.assertEqual(np.uint16, root_group[HDF5_DATASET_RAW_COUNTS].dtype)
+            self.assertEqual("gzip", root_group[HDF5_DATASET_RAW_COUNTS].compression)
+            self.assertEqual(np.float64, root_group[HDF5_DATASET_GAIN_CORRECTIONS].dtype)
+
+            spectrum = RawSpectrum(self.name_ref)
+            spectrum.read_hdf5(hdf5_file)
+            np.testing.assert_array_equal(self.spectrum.counts, spectrum.counts)
+
+        os.remove(filepath)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_counts_cache(self):
+        """
+        Test the counts are cached and computed again when an array is replaced.
+        """
+
+        self.spectrum.raw_counts = np.arange(1024, dtype=np.int64)
+        self.spectrum.gain_corrections = np.ones(1024)
+        self.spectrum.dark_currents = np.zeros(1024)
+
+        counts = self.spectrum.counts
+        self.assertIs(counts, self.spectrum.counts)
+        np.testing.assert_array_equal(np.arange(1024), counts)
+
+        self.spectrum.gain_corrections = np.full(1024, 2.0)
+        self.assertIsNot(counts, self.spectrum.counts)
+        np.testing.assert_array_equal(np.arange(1024) / 2.0, self.spectrum.counts)
+
+        self.spectrum.unload()
+        self.assertIsNone(self.spectrum._cached_counts)
+
+        # self.fail("Test if the testcase is working.")
+
     def test_read_hdf5(self):
         """
         Test read_hdf5 method.
@@ -29,6 +29,10 @@ Tests for the module :py:mod:`pysemeels.tools.batch_convert_elv`.
 import unittest
 import os.path
 import sys
+import tempfile
+import shutil
+import codecs
+from concurrent.futures import Future
 
 # Third party modules.
 import pytest
@@ -37,12 +41,33 @@ import pytest
 
 # Project modules.
 from pysemeels.tools.batch_convert_elv import BatchConvertElv
+from pysemeels.tools.task_window import MAX_PENDING_TASKS_PER_WORKER
 from pysemeels import get_current_module_path
 from tests import is_bad_file
+from tests.hitachi.eels_su.test_elv_file import create_elv_text
 
 # Globals and constants variables.
 
 
+def _has_ansi_encoding():
+    try:
+        codecs.lookup("ANSI")
+        return True
+    except LookupError:
+        return False
+
+
+class _CompletedFutureExecutor(object):
+    def __init__(self):
+        self.number_submitted_tasks = 0
+
+    def submit(self, function, *args):
+        self.number_submitted_tasks += 1
+        future = Future()
+        future.set_result(function(*args))
+        return future
+
+
 class TestBatchConvertElv(unittest.TestCase):
     """
     TestCase class for the module `pysemeels.tools.batch_convert_elv`.
@@ -113,3 +138,129 @@ class TestBatchConvertElv(unittest.TestCase):
         self.assertTrue(os.path.isfile(self.msa_file_path_2))
 
         # self.fail("Test if the testcase is working.")
+
+
+class TestBatchConvertElvSyntheticFiles(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeels.tools.batch_convert_elv` with elv files written in a temporary folder.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.path)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def _write_elv_file(self, file_name):
+        elv_file_path = os.path.join(self.path, file_name)
+        with open(elv_file_path, 'w', newline='') as elv_file:
+            elv_file.write(create_elv_text(1024))
+        return elv_file_path
+
+    @pytest.mark.skipif(not _has_ansi_encoding(), reason="ANSI encoding only available on windows")
+    def test_convert_incremental(self):
+        """
+        Test convert method in incremental mode skips the unchanged files and converts the modified files.
+        """
+
+        elv_file_paths = [self._write_elv_file("spectrum_{}.elv".format(file_id)) for file_id in range(2)]
+
+        summary = BatchConvertElv(self.path, recursive=False, incremental=True).convert()
+        self.assertEqual(2, summary.number_files)
+        self.assertEqual(0, summary.number_failed)
+        self.assertEqual(0, summary.number_skipped)
+        for elv_file_path in elv_file_paths:
+            self.assertTrue(os.path.isfile(os.path.splitext(elv_file_path)[0] + ".msa"))
+
+        with open(elv_file_paths[1], 'a', newline='') as elv_file:
+            elv_file.write("\n")
+
+        batch_convert_elv = BatchConvertElv(self.path, recursive=False, incremental=True)
+        summary = batch_convert_elv.convert()
+        self.assertEqual(1, summary.number_files)
+        self.assertEqual(0, summary.number_failed)
+        self.assertEqual(1, summary.number_skipped)
+
+        summary = batch_convert_elv.convert()
+        self.assertEqual(0, summary.number_files)
+        self.assertEqual(2, summary.number_skipped)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_convert_incremental_no_overwrite(self):
+        """
+        Test convert method in incremental mode does not record the files skipped because the msa file exists.
+        """
+
+        self._write_elv_file("spectrum.elv")
+        with open(os.path.join(self.path, "spectrum.msa"), 'w') as msa_file:
+            msa_file.write("existing msa file\n")
+
+        batch_convert_elv = BatchConvertElv(self.path, recursive=False, overwrite=False, incremental=True)
+        summary = batch_convert_elv.convert()
+        self.assertEqual(1, summary.number_files)
+        self.assertEqual(0, summary.number_failed)
+
+        summary = batch_convert_elv.convert()
+        self.assertEqual(1, summary.number_files)
+        self.assertEqual(0, summary.number_skipped)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_iterate_results_bounded(self):
+        """
+        Test the tasks are submitted in a bounded window and all results are returned.
+        """
+
+        elv_file_paths = [os.path.join(self.path, "missing_{}.elv".format(file_id)) for file_id in range(20)]
+        batch_convert_elv = BatchConvertElv(self.path, recursive=False, workers=2, chunk_size=1)
+        executor = _CompletedFutureExecutor()
+
+        results = batch_convert_elv._iterate_results(executor, elv_file_paths)
+        next(results)
+        self.assertEqual(2 * MAX_PENDING_TASKS_PER_WORKER, executor.number_submitted_tasks)
+
+        remaining_results = list(results)
+        self.assertEqual(20, executor.number_submitted_tasks)
+        self.assertEqual(19, len(remaining_results))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_convert_workers_bad_files(self):
+        """
+        Test convert method with worker processes converts all files in chunks and does not stop on bad files.
+        """
+
+        for file_id in range(7):
+            with open(os.path.join(self.path, "bad_{}.elv".format(file_id)), 'w') as elv_file:
+                elv_file.write("not an elv file\n")
+
+        batch_convert_elv = BatchConvertElv(self.path, recursive=False, workers=2, chunk_size=2)
+        summary = batch_convert_elv.convert()
+
+        self.assertEqual(7, summary.number_files)
+        self.assertEqual(7, summary.number_failed)
+        self.assertEqual(7, len(batch_convert_elv.failed_files))
+        self.assertTrue(summary.size_MB > 0.0)
+
+        # self.fail("Test if the testcase is working.")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeels.tools.test_conversion_manifest
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeels.tools.conversion_manifest`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import os
+import tempfile
+import shutil
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeels.tools.conversion_manifest import ConversionManifest, MANIFEST_FILENAME, KEY_SHA256
+
+# Globals and constants variables.
+
+
+class TestConversionManifest(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeels.tools.conversion_manifest`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.path = tempfile.mkdtemp()
+
+        self.source_file_path = os.path.join(self.path, "spectrum.elv")
+        with open(self.source_file_path, 'w') as source_file:
+            source_file.write("date=01/Mar/2017\n")
+
+        self.output_file_path = os.path.join(self.path, "spectrum.msa")
+        with open(self.output_file_path, 'w') as output_file:
+            output_file.write("#FORMAT      : EMSA/MAS Spectral Data File\n")
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.path)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def test_is_up_to_date(self):
+        """
+        Test is_up_to_date method.
+        """
+
+        manifest = ConversionManifest(self.path)
+        self.assertFalse(manifest.is_up_to_date(self.source_file_path, self.output_file_path))
+
+        manifest.update(self.source_file_path)
+        self.assertTrue(manifest.is_up_to_date(self.source_file_path, self.output_file_path))
+
+        os.remove(self.output_file_path)
+        self.assertFalse(manifest.is_up_to_date(self.source_file_path, self.output_file_path))
+        self.assertTrue(manifest.is_up_to_date(self.source_file_path))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_is_up_to_date_modified(self):
+        """
+        Test is_up_to_date method when the source file is touched or modified.
+        """
+
+        manifest = ConversionManifest(self.path)
+        manifest.update(self.source_file_path)
+
+        stat = os.stat(self.source_file_path)
+        os.utime(self.source_file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertTrue(manifest.is_up_to_date(self.source_file_path, self.output_file_path))
+
+        with open(self.source_file_path, 'w') as source_file:
+            source_file.write("date=02/Mar/2017\n")
+        os.utime(self.source_file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+        self.assertFalse(manifest.is_up_to_date(self.source_file_path, self.output_file_path))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_save_load(self):
+        """
+        Test save and load methods.
+        """
+
+        manifest = ConversionManifest(self.path)
+        manifest.update(self.source_file_path)
+        manifest.save()
+
+        self.assertTrue(os.path.isfile(os.path.join(self.path, MANIFEST_FILENAME)))
+
+        manifest_read = ConversionManifest(self.path)
+        manifest_read.load()
+        self.assertEqual(["spectrum.elv"], list(manifest_read.records.keys()))
+        self.assertEqual(64, len(manifest_read.records["spectrum.elv"][KEY_SHA256]))
+        self.assertTrue(manifest_read.is_up_to_date(self.source_file_path, self.output_file_path))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_load_bad_file(self):
+        """
+        Test load method with an invalid manifest file.
+        """
+
+        with open(os.path.join(self.path, MANIFEST_FILENAME), 'w') as manifest_file:
+            manifest_file.write("{not json")
+
+        manifest = ConversionManifest(self.path)
+        manifest.load()
+        self.assertEqual({}, manifest.records)
+
+        # self.fail("Test if the testcase is working.")
@@ -27,17 +27,21 @@ Tests for the module :py:mod:`pysemeels.tools.generate_hdf5_file`.
 
 # Standard library modules.
 import unittest
+from unittest import mock
 import os.path
 import sys
 
 # Third party modules.
 import h5py
+import numpy as np
 import pytest
 
 # Local modules.
 
 # Project modules.
-from pysemeels.tools.generate_hdf5_file import GenerateHdf5File
+from pysemeels.tools.generate_hdf5_file import GenerateHdf5File, ParsedSpectrum
+from pysemeels.calibration_store import HDF5_GROUP_CALIBRATIONS
+from pysemeels.metadata_index import HDF5_DATASET_METADATA_INDEX, MetadataIndex
 from pysemeels import get_current_module_path
 from pysemeels.tools.hdf5_file_labels import *
 from tests import is_bad_file
@@ -185,3 +189,120 @@ class TestGenerateHdf5File(unittest.TestCase):
             self.assertEqual(1023, len(dark_currents))
 
         # self.fail("Test if the testcase is working.")
+
+    def test_write_spectrum(self):
+        """
+        Test the write_spectrum method with and without deduplicated calibrations.
+        """
+        energies_eV = np.linspace(-32.0, 21.79, 1023)
+        raw_counts = np.arange(1023, dtype=float)
+        gain_corrections = np.full(1023, 0.5)
+        dark_currents = np.full(1023, 10.0)
+        counts = (raw_counts - dark_currents) / gain_corrections
+        attributes = {HDF5_MODEL: "SU-EELS", HDF5_ACCELERATING_VOLTAGE_V: 30000}
+        parsed_spectrum = ParsedSpectrum("30kV_7eV", attributes, energies_eV, counts, raw_counts, gain_corrections,
+                                         dark_currents)
+
+        with h5py.File(self.hdf5_file_path, 'w') as hdf5_file:
+            generate_hdf5_file = GenerateHdf5File(hdf5_file)
+            generate_hdf5_file.write_spectrum(parsed_spectrum)
+
+            spectrum_group = hdf5_file["30kV_7eV"]
+            self.assertEqual("SU-EELS", spectrum_group.attrs[HDF5_MODEL])
+            self.assertEqual(30000, spectrum_group.attrs[HDF5_ACCELERATING_VOLTAGE_V])
+
+            spectrum_data_set = spectrum_group[HDF5_SPECTRUM]
+            self.assertEqual((1023, 5), spectrum_data_set.shape)
+            np.testing.assert_array_equal(energies_eV, spectrum_data_set[:, 0])
+            np.testing.assert_array_equal(counts, spectrum_data_set[:, 1])
+            np.testing.assert_array_equal(dark_currents, spectrum_data_set[:, 4])
+
+        with h5py.File(self.hdf5_file_path, 'w') as hdf5_file:
+            generate_hdf5_file = GenerateHdf5File(hdf5_file, deduplicate_calibrations=True)
+            generate_hdf5_file.write_spectrum(parsed_spectrum)
+            generate_hdf5_file.write_spectrum(parsed_spectrum._replace(name="copy"))
+
+            self.assertEqual((1023, 3), hdf5_file["copy"][HDF5_SPECTRUM].shape)
+            np.testing.assert_array_equal(gain_corrections, hdf5_file["copy"][HDF5_SPECTRUM_GAIN_CORRECTIONS])
+            self.assertEqual(2, len(hdf5_file[HDF5_GROUP_CALIBRATIONS]))
+
+        with h5py.File(self.hdf5_file_path, 'w') as hdf5_file:
+            generate_hdf5_file = GenerateHdf5File(hdf5_file, metadata_index=True)
+            generate_hdf5_file.write_spectrum(parsed_spectrum)
+            generate_hdf5_file.write_spectrum(parsed_spectrum._replace(name="5kV", attributes={
+                HDF5_ACCELERATING_VOLTAGE_V: 5000}))
+
+            self.assertEqual(2, len(hdf5_file[HDF5_DATASET_METADATA_INDEX]))
+            metadata_index = generate_hdf5_file.metadata_index
+            self.assertEqual(["30kV_7eV"], metadata_index.query({HDF5_ACCELERATING_VOLTAGE_V: 30000}))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_add_spectra_failed(self):
+        """
+        Test the add_spectra method records the files that cannot be parsed.
+        """
+        file_paths = ["missing_{:d}.elv".format(file_id) for file_id in range(3)]
+
+        for workers in [1, 2]:
+            with h5py.File(self.hdf5_file_path, 'w') as hdf5_file:
+                generate_hdf5_file = GenerateHdf5File(hdf5_file)
+
+                number_spectra = generate_hdf5_file.add_spectra(file_paths, workers=workers, chunk_size=1)
+
+                self.assertEqual(0, number_spectra)
+                self.assertEqual(0, len(hdf5_file))
+                self.assertEqual(file_paths, [file_path for file_path, _message in generate_hdf5_file.failed_files])
+                self.assertTrue(generate_hdf5_file.failed_files[0][1].startswith("FileNotFoundError"))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_add_spectra_metadata_index(self):
+        """
+        Test the metadata index dataset is in sync with the spectrum groups after the add_spectra method.
+        """
+        energies_eV = np.linspace(-32.0, 21.79, 1023)
+        values = np.ones(1023)
+
+        def parse_spectrum(file_path, name, fast_parser=False):
+            accelerating_voltage_V = int(name.split('_')[1])
+            attributes = {HDF5_MODEL: "SU-EELS", HDF5_ACCELERATING_VOLTAGE_V: accelerating_voltage_V}
+            return ParsedSpectrum(name, attributes, energies_eV, values, values, values, values)
+
+        names = ["spectrum_{:d}".format(accelerating_voltage_V) for accelerating_voltage_V in range(1000, 6000, 1000)]
+        with mock.patch("pysemeels.tools.generate_hdf5_file.parse_spectrum", parse_spectrum), \
+                mock.patch("pysemeels.tools.generate_hdf5_file.METADATA_INDEX_CHUNK_ROWS", 2):
+            with h5py.File(self.hdf5_file_path, 'w') as hdf5_file:
+                generate_hdf5_file = GenerateHdf5File(hdf5_file, metadata_index=True)
+
+                number_spectra = generate_hdf5_file.add_spectra(["file.elv"] * len(names), names=names, workers=1)
+                self.assertEqual(5, number_spectra)
+
+        with h5py.File(self.hdf5_file_path, 'r') as hdf5_file:
+            metadata_index = MetadataIndex(hdf5_file)
+
+            self.assertEqual(names, metadata_index.names)
+            self.assertEqual(["spectrum_3000"], metadata_index.query({HDF5_ACCELERATING_VOLTAGE_V: 3000}))
+            self.assertEqual(names[3:], metadata_index.query({HDF5_ACCELERATING_VOLTAGE_V: (4000, None)}))
+
+        # self.fail("Test if the testcase is working.")
+
+    @pytest.mark.skipif(sys.platform != "win32", reason="only run on windows")
+    def test_add_spectra(self):
+        """
+        Test the add_spectra method gives the same groups as the add_spectrum method.
+        """
+        with h5py.File(self.hdf5_file_path, 'w') as hdf5_file:
+            generate_hdf5_file = GenerateHdf5File(hdf5_file)
+
+            generate_hdf5_file.add_spectrum(self.elv_file_path, name="reference")
+            names = ["spectrum_1", "spectrum_2"]
+            number_spectra = generate_hdf5_file.add_spectra([self.elv_file_path] * 2, names=names, workers=2)
+
+            self.assertEqual(2, number_spectra)
+            self.assertEqual(0, len(generate_hdf5_file.failed_files))
+            for name in ["spectrum_1", "spectrum_2"]:
+                self.assertEqual(dict(hdf5_file["reference"].attrs), dict(hdf5_file[name].attrs))
+                np.testing.assert_array_equal(hdf5_file["reference"][HDF5_SPECTRUM], hdf5_file[name][HDF5_SPECTRUM])
+
+        # self.fail("Test if the testcase is working.")
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: tests.tools.test_scan_catalog
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeels.tools.scan_catalog`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+# Standard library modules.
+import unittest
+import os.path
+import tempfile
+import shutil
+import csv
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeels.tools.scan_catalog import ScanCatalog, scan_elv_file, scan_ana_file, CATALOG_COLUMNS, KEY_FILE_PATH, \
+    KEY_FILE_TYPE, KEY_SIZE_B, FILE_TYPE_ELV, FILE_TYPE_ANA
+from pysemeels.tools.hdf5_file_labels import *
+from tests.hitachi.eels_su.test_elv_file import create_elv_text
+from tests.hitachi.eels_su.map.test_ana_file import create_ana_text, create_point_ana_text
+
+# Globals and constants variables.
+
+
+class TestScanCatalog(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeels.tools.scan_catalog`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+        self.path = tempfile.mkdtemp()
+
+        self.elv_file_path = os.path.join(self.path, "30kV_7eV.elv")
+        with open(self.elv_file_path, 'w', encoding="latin-1") as elv_file:
+            elv_file.write(create_elv_text())
+        with open(os.path.join(self.path, "30kV_7eV.txt"), 'w', encoding="UTF-16") as text_file:
+            text_file.write("EELS model = SU-EELS\nS.H. = 0.0mm\nAccelerating Voltage = 30000 Volt\n")
+        # Point spectrum .ana file saved with the .elv file, without Mag keyword.
+        self.point_ana_file_path = os.path.join(self.path, "30kV_7eV.ana")
+        with open(self.point_ana_file_path, 'w') as ana_file:
+            ana_file.write(create_point_ana_text())
+
+        map_path = os.path.join(self.path, "30kV_march2017_7eV")
+        os.mkdir(map_path)
+        self.ana_file_path = os.path.join(map_path, "spectra_1.ana")
+        with open(self.ana_file_path, 'w') as ana_file:
+            ana_file.write(create_ana_text())
+        with open(os.path.join(map_path, "30kV_march2017_7eV.txt"), 'w', encoding="UTF-16") as text_file:
+            text_file.write("SU9000 Magnification = 37443\nAccelerating Voltage = 5000 Volt\n")
+
+        with open(os.path.join(map_path, "bad.elv"), 'w', encoding="latin-1") as elv_file:
+            elv_file.write("dose=500ns\n")
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+        shutil.rmtree(self.path)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def test_scan_elv_file(self):
+        """
+        Test scan_elv_file function.
+        """
+
+        record = scan_elv_file(self.elv_file_path)
+
+        self.assertEqual("SU-EELS", record[HDF5_MODEL])
+        self.assertEqual(30000, record[HDF5_ACCELERATING_VOLTAGE_V])
+        self.assertEqual(7.0, record[HDF5_ENERGY_WIDTH_eV])
+        self.assertEqual(98.7, record[HDF5_RAW])
+        self.assertEqual(37443, record[HDF5_MAGNIFICATION])
+        self.assertTrue(set(record).issubset(CATALOG_COLUMNS))
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_scan_ana_file(self):
+        """
+        Test scan_ana_file function.
+        """
+
+        record = scan_ana_file(self.ana_file_path)
+
+        self.assertEqual("01/Mar/2017", record[HDF5_DATE])
+        self.assertEqual(5000, record[HDF5_ACCELERATING_VOLTAGE_V])
+        self.assertEqual(37443, record[HDF5_MAGNIFICATION])
+        self.assertTrue(set(record).issubset(CATALOG_COLUMNS))
+
+        record = scan_ana_file(self.point_ana_file_path)
+        self.assertEqual("01/Mar/2017", record[HDF5_DATE])
+        self.assertNotIn(HDF5_MAGNIFICATION, record)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_scan(self):
+        """
+        Test scan and write_csv methods.
+        """
+
+        for workers in [1, 2]:
+            scan_catalog = ScanCatalog(self.path, workers=workers, chunk_size=1)
+            summary = scan_catalog.scan()
+
+            self.assertEqual(3, summary.number_files)
+            self.assertNotIn(self.point_ana_file_path, scan_catalog.find_files())
+            self.assertEqual(1, summary.number_failed)
+            self.assertEqual("bad.elv", os.path.basename(scan_catalog.failed_files[0][0]))
+
+            self.assertEqual(2, len(scan_catalog.records))
+            records = {record[KEY_FILE_TYPE]: record for record in scan_catalog.records}
+            self.assertEqual("30kV_7eV.elv", records[FILE_TYPE_ELV][KEY_FILE_PATH])
+            self.assertEqual(os.path.getsize(self.elv_file_path), records[FILE_TYPE_ELV][KEY_SIZE_B])
+            self.assertEqual(os.path.join("30kV_march2017_7eV", "spectra_1.ana"), records[FILE_TYPE_ANA][KEY_FILE_PATH])
+
+        scan_catalog = ScanCatalog(self.path, recursive=False)
+        self.assertEqual([self.elv_file_path], scan_catalog.find_files())
+
+        catalog_file_path = os.path.join(self.path, "catalog.csv")
+        scan_catalog.scan()
+        scan_catalog.write_csv(catalog_file_path)
+        with open(catalog_file_path, 'r', encoding="UTF-8", newline='') as csv_file:
+            rows = list(csv.DictReader(csv_file))
+
+        self.assertEqual(1, len(rows))
+        self.assertEqual(CATALOG_COLUMNS, list(rows[0].keys()))
+        self.assertEqual("30000", rows[0][HDF5_ACCELERATING_VOLTAGE_V])
+
+        # self.fail("Test if the testcase is working.")
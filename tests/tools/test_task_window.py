@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+.. py:currentmodule:: pysemeels.tools.test_task_window
+
+.. moduleauthor:: Hendrix Demers <hendrix.demers@mail.mcgill.ca>
+
+Tests for the module :py:mod:`pysemeels.tools.task_window`.
+"""
+
+###############################################################################
+# Copyright 2017 Hendrix Demers
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+###############################################################################
+
+
+# Standard library modules.
+import unittest
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Third party modules.
+
+# Local modules.
+
+# Project modules.
+from pysemeels.tools.task_window import iterate_chunk_results, maximum_pending_tasks, MAX_PENDING_TASKS_PER_WORKER
+
+# Globals and constants variables.
+
+
+def _square_items(items, offset):
+    return [item * item + offset for item in items]
+
+
+class _CompletedFutureExecutor(object):
+    def __init__(self):
+        self.number_submitted_tasks = 0
+
+    def submit(self, function, *args):
+        self.number_submitted_tasks += 1
+        future = Future()
+        future.set_result(function(*args))
+        return future
+
+
+class TestTaskWindow(unittest.TestCase):
+    """
+    TestCase class for the module `pysemeels.tools.task_window`.
+    """
+
+    def setUp(self):
+        """
+        Setup method.
+        """
+
+        unittest.TestCase.setUp(self)
+
+    def tearDown(self):
+        """
+        Teardown method.
+        """
+
+        unittest.TestCase.tearDown(self)
+
+    def testSkeleton(self):
+        """
+        First test to check if the testcase is working with the testing framework.
+        """
+
+        # self.fail("Test if the testcase is working.")
+        self.assertTrue(True)
+
+    def test_maximum_pending_tasks(self):
+        """
+        Test maximum_pending_tasks function.
+        """
+
+        self.assertEqual(4 * MAX_PENDING_TASKS_PER_WORKER, maximum_pending_tasks(4))
+        self.assertTrue(maximum_pending_tasks(None) >= MAX_PENDING_TASKS_PER_WORKER)
+
+        # self.fail("Test if the testcase is working.")
+
+    def test_iterate_chunk_results(self):
+        """
+        Test the results are returned in the order of the items with a bounded number of submitted tasks.
+        """
+
+        items = list(range(23))
+        expected_results = [item * item + 1 for item in items]
+
+        executor = _CompletedFutureExecutor()
+        results = iterate_chunk_results(executor, _square_items, items, (1,), chunk_size=2, maximum_pending=3)
+        self.assertEqual(expected_results[0], next(results))
+        self.assertEqual(3, executor.number_submitted_tasks)
+        self.assertEqual(expected_results[1:], list(results))
+        self.assertEqual(12, executor.number_submitted_tasks)
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results = iterate_chunk_results(executor, _square_items, items, (1,), chunk_size=5, maximum_pending=2)
+            self.assertEqual(expected_results, list(results))
+
+        self.assertEqual([], list(iterate_chunk_results(_CompletedFutureExecutor(), _square_items, [], (1,))))
+
+        # self.fail("Test if the testcase is working.")